@@ -0,0 +1,38 @@
+"""
+قياسات أداء مسار البيانات → الإشارة → الأمر (pytest-benchmark)
+
+التشغيل وحفظ النتائج JSON للمقارنة بين الإصدارات:
+
+    pytest benchmarks --benchmark-storage=benchmarks/results --benchmark-autosave
+
+المقارنة مع آخر نتيجة محفوظة والفشل عند تراجع المتوسط أكثر من 10%:
+
+    pytest benchmarks --benchmark-storage=benchmarks/results --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import logging
+import pytest
+from modules.data import DataFetcher
+from modules.store import CandleStore
+from tests.fakes import FakeExchange
+
+
+@pytest.fixture
+def fake_exchange():
+    return FakeExchange(bars=20000)
+
+
+@pytest.fixture
+def fetcher(tmp_path, fake_exchange):
+    fetcher = DataFetcher(store=CandleStore(tmp_path), refresh_interval=3600)
+    fetcher.exchange = fake_exchange
+    return fetcher
+
+
+@pytest.fixture(autouse=True)
+def quiet_logs():
+    # سجل INFO لكل صفقة يطغى على زمن المسار المقاس
+    logger = logging.getLogger('main')
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    yield
+    logger.setLevel(level)
@@ -0,0 +1,29 @@
+import os
+import pytest
+from core.hf_integration import HFIntegration
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('torch')
+pytest.importorskip('transformers')
+
+# نموذج صغير جداً حتى يقيس الزمن كلفة المسار لا حجم النموذج
+TINY_MODEL = os.getenv("HF_BENCH_MODEL", "sshleifer/tiny-gpt2")
+PROMPT = "BTC/USDT price 51200, RSI 67, MACD histogram 12.5. Recommendation:"
+
+
+@pytest.fixture(scope='module')
+def hf():
+    hf = HFIntegration(TINY_MODEL, os.getenv("HF_API_TOKEN"), device="cpu")
+    try:
+        hf._ensure_loaded()
+    except RuntimeError as e:
+        pytest.skip(f"النموذج {TINY_MODEL} غير متاح: {e}")
+    return hf
+
+
+def test_generate_text(benchmark, hf):
+    params = {"max_new_tokens": 16, "do_sample": False}
+    result = benchmark.pedantic(hf.generate_text, args=(PROMPT, params), rounds=20, warmup_rounds=2)
+    assert result["status"] == "success"
+    tokens = len(hf.tokenizer(result["text"]).input_ids) - len(hf.tokenizer(PROMPT).input_ids)
+    benchmark.extra_info["tokens_per_second"] = tokens / benchmark.stats.stats.mean
@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+import pandas as pd
+from main import TradingBot
+from core.backtest.exchange import SimulatedExchange
+from core.risk_management.manager import RiskManager
+from modules.analysis import calculate_rsi, rsi
+from modules.indicators import IndicatorSet
+from modules.strategy import TrendStrategy, TrailingStop
+
+pytest.importorskip('pytest_benchmark')
+
+
+class TestDataBenchmarks:
+    def test_get_ohlcv_from_store(self, benchmark, fetcher):
+        fetcher.get_ohlcv('BTC/USDT', limit=500)
+        data = benchmark(fetcher.get_ohlcv, 'BTC/USDT', '1h', 500)
+        assert len(data) == 500
+
+    def test_get_ohlcv_incremental_sync(self, benchmark, fetcher):
+        fetcher.get_ohlcv('BTC/USDT', limit=500)
+        fetcher.refresh_interval = 0  # كل استدعاء يجلب الذيل الناقص
+        data = benchmark(fetcher.get_ohlcv, 'BTC/USDT', '1h', 500)
+        assert len(data) == 500
+
+
+class TestSignalBenchmarks:
+    @pytest.fixture
+    def closes(self, fake_exchange):
+        return fake_exchange.candles('BTC/USDT')[:, 4]
+
+    def test_calculate_rsi_pandas(self, benchmark, closes):
+        frame = pd.DataFrame({'close': closes})
+        result = benchmark(calculate_rsi, frame)
+        assert len(result) == len(closes)
+
+    def test_rsi_numpy(self, benchmark, closes):
+        result = benchmark(rsi, closes)
+        assert result.shape == closes.shape
+
+    def test_indicator_set_single_bar(self, benchmark, fake_exchange):
+        candles = fake_exchange.candles('BTC/USDT').tolist()
+        indicators = IndicatorSet()
+        indicators.update(candles[:1000])
+        bars = iter(candles[1000:])
+        benchmark.pedantic(lambda: indicators.update([next(bars)]), rounds=5000, iterations=1)
+
+
+class TestStrategyBenchmarks:
+    @pytest.fixture
+    def block(self, fake_exchange):
+        return np.stack([fake_exchange.candles(f"S{i}/USDT") for i in range(50)])
+
+    def test_trend_strategy_bulk(self, benchmark, block):
+        signals = benchmark(TrendStrategy().evaluate, block)
+        assert signals.shape == block.shape[:2]
+
+    def test_trailing_stop_kernel(self, benchmark, block):
+        # مُترجم بـ numba إن وُجد، وإلا حلقة Python
+        signals = benchmark(TrailingStop(TrendStrategy(), 2.0).evaluate, block[:5])
+        assert signals.shape == (5, block.shape[1])
+
+
+class TestRiskBenchmarks:
+    @pytest.fixture
+    def manager(self):
+        manager = RiskManager(max_symbol_exposure=0.2)
+        manager.reset(1_000_000)
+        return manager
+
+    def test_calculate_position_size(self, benchmark, manager):
+        size = benchmark(manager.calculate_position_size, 10000, 2.0)
+        assert size > 0
+
+    def test_size_positions_1000(self, benchmark, manager):
+        symbols = [f"S{i}/USDT" for i in range(1000)]
+        sides = np.where(np.arange(1000) % 2, 'buy', 'sell')
+        sizes = benchmark(manager.size_positions, symbols, sides, 2.0)
+        assert sizes.shape == (1000,)
+
+
+class TestTickToOrder:
+    def test_analyze_and_execute(self, benchmark, fetcher, fake_exchange):
+        """شمعة جديدة → analyze_market → execute_trade → أمر على البورصة المحاكاة"""
+        exchange = SimulatedExchange(initial_balance=10000)
+        bot = TradingBot(data_fetcher=fetcher, trader=exchange,
+                         risk_manager=RiskManager(), live_trading=True)
+        candles = fake_exchange.candles('BTC/USDT').tolist()
+        for row in candles[:200]:
+            exchange.set_bar('BTC/USDT', row)
+            bot.analyze_market('BTC/USDT', [row])
+        bars = iter(candles[200:])
+
+        def tick():
+            row = next(bars)
+            exchange.set_bar('BTC/USDT', row)
+            return bot.execute_trade('BTC/USDT', bot.analyze_market('BTC/USDT', [row]))
+
+        benchmark.pedantic(tick, rounds=10000, iterations=1)
+        assert exchange.fills
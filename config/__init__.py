@@ -1,6 +1,6 @@
 """
 Package configuration for trading bot settings
 """
-from .settings import BINANCE_API_KEY, BINANCE_SECRET
+from .settings import Settings
 
-__all__ = ['BINANCE_API_KEY', 'BINANCE_SECRET']
\ No newline at end of file
+__all__ = ['Settings']
\ No newline at end of file
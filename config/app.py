@@ -1,8 +1,12 @@
 import streamlit as st
 from config import Settings
 from core.risk_management.manager import RiskManager
+from modules.data import DataFetcher
+from modules.store import CandleStore
+from modules.downsample import lttb
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 
 # إعداد الصفحة
 st.set_page_config(
@@ -10,6 +14,72 @@ st.set_page_config(
     layout="wide"
 )
 
+# نقاط الرسم بعد التقليص، والشموع الأخيرة التي تُرسم كما هي وتُحدَّث تدريجياً
+MAX_POINTS = 2000
+LIVE_BARS = 500
+
+
+@st.cache_resource
+def get_fetcher() -> DataFetcher:
+    """جالب واحد ومخزن شموع واحد لكل جلسات الخادم"""
+    return DataFetcher(store=CandleStore(Settings.CANDLE_STORE_DIR),
+                       refresh_interval=Settings.CANDLE_REFRESH_SECONDS)
+
+
+@st.cache_resource
+def get_risk_manager(risk_per_trade: float) -> RiskManager:
+    return RiskManager(risk_per_trade=risk_per_trade)
+
+
+@st.cache_data(max_entries=64)
+def load_history(symbol: str, timeframe: str, until: int, max_points: int = MAX_POINTS) -> pd.DataFrame:
+    """
+    الشموع المخزنة قبل until بعد تقليصها بـ LTTB
+
+    المفتاح (الرمز، الإطار، until) لا يتغير إلا كل LIVE_BARS شمعة جديدة،
+    فالتاريخ الطويل يُقرأ ويُقلَّص مرة واحدة لا مع كل تفاعل.
+    """
+    fetcher = get_fetcher()
+    data = fetcher.store.read(fetcher.exchange_id, symbol, timeframe, until=until)
+    kept = lttb(data[:, 0], data[:, 4], max_points)
+    return pd.DataFrame({
+        "time": pd.to_datetime(data[kept, 0], unit="ms"),
+        "price": np.asarray(data[kept, 4])
+    })
+
+
+@st.fragment(run_every=Settings.CANDLE_REFRESH_SECONDS)
+def price_chart(symbol: str, timeframe: str):
+    """الرسم البياني وحده يُعاد تشغيله دورياً، ولا يُعاد بناؤه إلا عند وصول شمعة جديدة"""
+    # نسخة بلا نسخ من المخزن، وتجلب من البورصة الشموع الناقصة فقط عند انتهاء الصلاحية
+    data = get_fetcher().get_ohlcv_array(symbol, timeframe)
+    if not len(data):
+        st.warning(f"لا توجد بيانات لـ {symbol}")
+        return
+
+    chart = st.session_state.get("chart")
+    last = int(data[-1, 0])
+    if chart is None or chart["key"] != (symbol, timeframe) or chart["last"] != last:
+        # التاريخ المقلَّص مخزن مؤقتاً، والذيل الحي فقط يُضاف من جديد
+        split = (len(data) - 1) // LIVE_BARS * LIVE_BARS
+        tail = data[split:]
+        times = pd.to_datetime(tail[:, 0], unit="ms")
+        prices = np.asarray(tail[:, 4])
+        if split:
+            head = load_history(symbol, timeframe, int(tail[0, 0]))
+            times = pd.DatetimeIndex(np.concatenate([head["time"].to_numpy(), times.to_numpy()]))
+            prices = np.concatenate([head["price"].to_numpy(), prices])
+
+        fig = go.Figure(go.Scattergl(x=times, y=prices, mode="lines", name=symbol))
+        fig.update_layout(title=f"سعر {symbol}", uirevision=f"{symbol}-{timeframe}")
+        chart = st.session_state["chart"] = {
+            "key": (symbol, timeframe), "last": last, "price": float(data[-1, 4]), "figure": fig
+        }
+
+    st.plotly_chart(chart["figure"], use_container_width=True)
+    st.caption(f"{len(data):,} شمعة، {len(chart['figure'].data[0].x):,} نقطة مرسومة")
+
+
 def main():
     st.title("🧠 Trading Bot Dashboard")
     
@@ -35,20 +105,15 @@ def main():
         risk = st.slider("نسبة المخاطرة %", 0.1, 5.0, 1.0, step=0.1)
         stop_loss = st.slider("وقف الخسارة %", 0.5, 10.0, 2.0, step=0.5)
     
-    # محاكاة بيانات (استبدل ببيانات حقيقية)
-    data = pd.DataFrame({
-        "time": pd.date_range(start="2024-01-01", periods=100),
-        "price": [100 + i + (i * 0.1) for i in range(100)]
-    })
-    
     # عرض الرسم البياني
-    fig = px.line(data, x="time", y="price", title=f"سعر {symbol}")
-    st.plotly_chart(fig, use_container_width=True)
+    price_chart(symbol, timeframe)
+    chart = st.session_state.get("chart")
+    last_price = chart["price"] if chart and chart["key"] == (symbol, timeframe) else None
     
     # قسم إدارة المخاطر
     st.header("🛡️ إدارة المخاطر")
     if st.button("حساب حجم المركز"):
-        risk_manager = RiskManager(risk_per_trade=risk/100)
+        risk_manager = get_risk_manager(risk / 100)
         size = risk_manager.calculate_position_size(
             portfolio_value=10000,  # يمكن استبدالها بالقيمة الفعلية
             stop_loss_pct=stop_loss
@@ -57,14 +122,14 @@ def main():
     
     # قسم التوصيات
     st.header("💡 التوصيات")
-    if st.button("إنشاء توصية"):
+    if st.button("إنشاء توصية") and last_price is not None:
         with st.spinner("جاري التحليل..."):
             # هنا تكامل مع نموذج Hugging Face
             recommendation = {
                 "action": "شراء",
                 "confidence": 75,
-                "target": data["price"].iloc[-1] * 1.05,
-                "stop_loss": data["price"].iloc[-1] * 0.98
+                "target": last_price * 1.05,
+                "stop_loss": last_price * 0.98
             }
             st.json(recommendation)
 
@@ -7,6 +7,64 @@ class Settings:
     # من Hugging Face
     HF_API_TOKEN = os.getenv("HF_API_TOKEN")
     HF_MODEL_NAME = os.getenv("HF_MODEL_NAME", "microsoft/phi-2")
+    HF_CPU_MODE = os.getenv("HF_CPU_MODE", "fp32")  # fp32 | bf16 | int8
+    HF_NUM_THREADS = int(os.getenv("HF_NUM_THREADS", "0")) or None
+
+    # مراجعة إشارات المؤشرات بالنموذج اللغوي (إجابة JSON قصيرة لكل رمز)
+    LLM_SIGNALS = os.getenv("LLM_SIGNALS", "0") == "1"
+    LLM_MIN_CONFIDENCE = float(os.getenv("LLM_MIN_CONFIDENCE", "0.6"))
+    LLM_MAX_NEW_TOKENS = int(os.getenv("LLM_MAX_NEW_TOKENS", "32"))
+
+    # من Binance
+    BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
+    BINANCE_SECRET = os.getenv("BINANCE_SECRET")
+
+    # البورصات المستخدمة، الأولى هي الأساسية والأوامر تُوجَّه لأفضل سعر بينها
+    # مفاتيح كل بورصة من <ID>_API_KEY و <ID>_SECRET (مثل BYBIT_API_KEY)
+    EXCHANGES = [e.strip().lower() for e in os.getenv("EXCHANGES", "binance").split(",") if e.strip()]
+    VENUE_QUOTE_MAX_AGE = float(os.getenv("VENUE_QUOTE_MAX_AGE", "5"))
+
+    @staticmethod
+    def credentials(exchange_id: str):
+        """(api_key, secret) لبورصة من متغيرات البيئة"""
+        prefix = exchange_id.upper()
+        return os.getenv(f"{prefix}_API_KEY"), os.getenv(f"{prefix}_SECRET")
+
+    # إرسال الأوامر فعلياً إلى البورصة
+    LIVE_TRADING = os.getenv("LIVE_TRADING", "0") == "1"
+
+    # مخزن الشموع المحلي
+    CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "data/candles")
+    CANDLE_REFRESH_SECONDS = float(os.getenv("CANDLE_REFRESH_SECONDS", "60"))
+
+    # بيانات الأسواق (الدقة والحدود) المحفوظة على القرص
+    MARKETS_CACHE_DIR = os.getenv("MARKETS_CACHE_DIR", "data/markets")
+    MARKETS_TTL = float(os.getenv("MARKETS_TTL", "21600"))
+
+    # الماسح متعدد الرموز
+    SYMBOLS = [s.strip() for s in os.getenv("SYMBOLS", "BTC/USDT").split(",") if s.strip()]
+    TIMEFRAME = os.getenv("TIMEFRAME", "1h")
+
+    # بث الأسعار عبر WebSocket
+    MARKET_FEED = os.getenv("MARKET_FEED", "0") == "1"
+    MARKET_FEED_URL = os.getenv("MARKET_FEED_URL", "wss://stream.binance.com:9443/stream")
     
+    # سجل الصفقات (SQLite WAL)، فارغ للتعطيل
+    TRADE_JOURNAL = os.getenv("TRADE_JOURNAL", "data/journal.db")
+    JOURNAL_FLUSH_SECONDS = float(os.getenv("JOURNAL_FLUSH_SECONDS", "0.5"))
+
+    # تسجيل بيانات السوق الواردة (فارغ للتعطيل)، والضغط zstd أو lz4 أو zlib
+    RECORD_DIR = os.getenv("RECORD_DIR", "")
+    RECORD_CODEC = os.getenv("RECORD_CODEC") or None
+
+    # عمليات عاملة تتقاسم الرموز (0 لعملية واحدة) وموجه أوامر واحد عبر مقبس Unix
+    SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+    ROUTER_SOCKET = os.getenv("ROUTER_SOCKET") or None
+
+    # مقاييس زمن المسار الساخن (Prometheus على /metrics)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+    METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "60"))
+
     # إعدادات عامة
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
\ No newline at end of file
@@ -0,0 +1,135 @@
+import time
+import logging
+import numpy as np
+from typing import Dict, Optional
+from .exchange import SimulatedExchange
+
+
+class BacktestResult:
+    """مخرجات الاختبار الخلفي: منحنى رأس المال والسحب وسجل الصفقات"""
+    def __init__(self,
+                 timestamps: np.ndarray,
+                 equity: np.ndarray,
+                 trades,
+                 elapsed: float = 0.0):
+        self.timestamps = timestamps
+        self.equity = equity
+        self.trades = trades
+        self.elapsed = elapsed
+        peak = np.maximum.accumulate(equity, axis=-1) if equity.size else equity
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.drawdown = np.where(peak > 0, 1.0 - equity / peak, 0.0)
+
+    def summary(self) -> Dict:
+        if not self.equity.size:
+            return {'bars': 0, 'total_return': 0.0, 'max_drawdown': 0.0, 'trades': 0}
+        bars = self.equity.size
+        return {
+            'bars': bars,
+            'total_return': float(self.equity[..., -1].sum() / self.equity[..., 0].sum() - 1.0),
+            'max_drawdown': float(self.drawdown.max()),
+            'trades': len(self.trades),
+            'bars_per_second': bars / self.elapsed if self.elapsed else None,
+        }
+
+
+class Backtester:
+    """
+    اختبار خلفي حدثي يعيد تشغيل الشموع المخزنة عبر نفس مسار البوت:
+    analyze_market ثم execute_trade (حجم RiskManager) ثم execute_order
+    على بورصة محاكاة.
+    """
+    def __init__(self, bot, exchange: SimulatedExchange):
+        """
+        :param bot: كائن TradingBot بُني بـ trader=exchange و live_trading=True
+        :param exchange: البورصة المحاكاة نفسها المحقونة في البوت
+        """
+        self.bot = bot
+        self.exchange = exchange
+
+    def run(self, symbol: str, candles: np.ndarray, warmup: int = 50) -> BacktestResult:
+        """
+        :param symbol: زوج التداول
+        :param candles: مصفوفة (n, 6) من المخزن
+        :param warmup: عدد الشموع لتهيئة المؤشرات قبل السماح بالتداول
+        :return: BacktestResult
+        """
+        rows = np.asarray(candles, dtype=np.float64).tolist()
+        equity = np.empty(len(rows))
+        bot, exchange = self.bot, self.exchange
+
+        # سجلات كل صفقة مكلفة داخل الحلقة
+        logger = logging.getLogger(type(bot).__module__)
+        previous_level = logger.level
+        logger.setLevel(logging.WARNING)
+        start = time.perf_counter()
+        try:
+            for i, row in enumerate(rows):
+                exchange.set_bar(symbol, row)
+                analysis = bot.analyze_market(symbol, [row])
+                if i >= warmup:
+                    bot.execute_trade(symbol, analysis)
+                equity[i] = exchange.equity()
+        finally:
+            logger.setLevel(previous_level)
+
+        return BacktestResult(
+            timestamps=np.asarray([r[0] for r in rows]),
+            equity=equity,
+            trades=list(exchange.fills),
+            elapsed=time.perf_counter() - start
+        )
+
+
+def vectorized_backtest(close: np.ndarray,
+                        positions: np.ndarray,
+                        initial_balance: float = 10000.0,
+                        fee_rate: float = 0.001,
+                        slippage: float = 0.0005,
+                        timestamps: Optional[np.ndarray] = None) -> BacktestResult:
+    """
+    وضع سريع لاستراتيجيات الإشارة البسيطة
+
+    الوزن المستهدف في الشمعة t (بين -1 و 1) يُحتفظ به على عائد الشمعة
+    t+1، وتُخصم التكلفة على كل تغيير في الوزن.
+
+    :param close: أسعار الإغلاق (bars,) أو (symbols, bars)
+    :param positions: الأوزان المستهدفة بنفس الشكل
+    :return: BacktestResult لكل رمز على حدة، والصفقات هي فهارس تغييرات الوزن
+    """
+    start = time.perf_counter()
+    close = np.asarray(close, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64)
+
+    returns = np.zeros_like(close)
+    returns[..., 1:] = close[..., 1:] / close[..., :-1] - 1.0
+    held = np.zeros_like(positions)
+    held[..., 1:] = positions[..., :-1]
+
+    turnover = np.abs(np.diff(positions, axis=-1, prepend=0.0))
+    net = held * returns - turnover * (fee_rate + slippage)
+    equity = initial_balance * np.cumprod(1.0 + net, axis=-1)
+
+    return BacktestResult(
+        timestamps=timestamps if timestamps is not None else np.arange(close.shape[-1]),
+        equity=equity,
+        trades=np.argwhere(turnover > 0),
+        elapsed=time.perf_counter() - start
+    )
+
+
+def strategy_backtest(strategy, candles: np.ndarray, **kwargs) -> BacktestResult:
+    """
+    تقييم جماعي لاستراتيجية Strategy على التاريخ كاملاً
+
+    نفس كائن الاستراتيجية المستخدم في البوت الحي: الإشارات لكل الشموع
+    في استدعاء واحد ثم vectorized_backtest عليها.
+
+    :param strategy: كائن Strategy
+    :param candles: مصفوفة (bars, 6) أو (symbols, bars, 6)
+    :param kwargs: معاملات vectorized_backtest (الرصيد والرسوم والانزلاق)
+    """
+    candles = np.asarray(candles, dtype=np.float64)
+    positions = strategy.evaluate(candles)
+    timestamps = candles[..., 0] if candles.ndim == 2 else candles[0, :, 0]
+    return vectorized_backtest(candles[..., 4], positions, timestamps=timestamps, **kwargs)
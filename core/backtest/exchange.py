@@ -0,0 +1,161 @@
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+
+class SimulatedExchange:
+    """
+    بورصة محاكاة فورية (Spot) بنفس واجهة AdvancedTrader
+
+    تُنفذ الأوامر على الشمعة الحالية مع رسوم وانزلاق سعري وتعبئة جزئية
+    محدودة بنسبة من حجم تداول الشمعة.
+    """
+    def __init__(self,
+                 initial_balance: float = 10000.0,
+                 quote_currency: str = 'USDT',
+                 fee_rate: float = 0.001,
+                 slippage: float = 0.0005,
+                 volume_participation: float = 0.1):
+        """
+        :param initial_balance: الرصيد الابتدائي بعملة التسعير
+        :param quote_currency: عملة التسعير
+        :param fee_rate: نسبة الرسوم من قيمة كل تعبئة
+        :param slippage: الانزلاق كنسبة من السعر ضد اتجاه الأمر
+        :param volume_participation: أقصى نسبة من حجم الشمعة تُعبأ في أمر واحد
+        """
+        self.quote_currency = quote_currency
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.volume_participation = volume_participation
+
+        self.cash = float(initial_balance)
+        self.positions: Dict[str, float] = {}
+        self.bars: Dict[str, Sequence[float]] = {}
+        self.open_orders: Dict[str, Dict] = {}
+        self.fills: List[Dict] = []
+        self._ids = itertools.count(1)
+
+    # --- تغذية البيانات ---
+
+    def set_bar(self, symbol: str, candle: Sequence[float]):
+        """تحديث الشمعة الحالية للرمز ومطابقة أوامر الحد المفتوحة عليها"""
+        self.bars[symbol] = candle
+        for order in list(self.open_orders.values()):
+            if order['symbol'] == symbol:
+                self._match_limit(order, candle)
+
+    def equity(self) -> float:
+        """القيمة الإجمالية بسعر الإغلاق الحالي"""
+        value = self.cash
+        for symbol, qty in self.positions.items():
+            if qty:
+                value += qty * self.bars[symbol][4]
+        return value
+
+    # --- واجهة AdvancedTrader ---
+
+    def get_balance(self, currency: str = 'USDT') -> float:
+        if currency == self.quote_currency:
+            return self.cash
+        return sum(qty for symbol, qty in self.positions.items()
+                   if symbol.split('/')[0] == currency)
+
+    def get_current_price(self, symbol: str) -> Optional[float]:
+        bar = self.bars.get(symbol)
+        return float(bar[4]) if bar is not None else None
+
+    def execute_order(self,
+                      symbol: str,
+                      side: str,
+                      amount: float,
+                      order_type: str = 'market',
+                      price: Optional[float] = None,
+                      **kwargs) -> Optional[Dict]:
+        if order_type == 'limit' and price is None:
+            raise ValueError("Price must be specified for limit orders")
+        if amount <= 0 or symbol not in self.bars:
+            return None
+
+        order = {
+            'id': str(next(self._ids)),
+            'symbol': symbol,
+            'type': order_type,
+            'side': side,
+            'amount': float(amount),
+            'price': price,
+            'filled': 0.0,
+            'remaining': float(amount),
+            'cost': 0.0,
+            'fee': 0.0,
+            'status': 'open',
+            'timestamp': self.bars[symbol][0],
+        }
+        if order_type == 'market':
+            bar = self.bars[symbol]
+            direction = 1 if side == 'buy' else -1
+            self._fill(order, bar[4] * (1 + direction * self.slippage), bar)
+            # ما لم يُعبأ من أمر السوق يُلغى ولا يبقى معلقاً
+            order['status'] = 'closed' if order['remaining'] == 0 else (
+                'canceled' if order['filled'] == 0 else 'partially_filled')
+        else:
+            self.open_orders[order['id']] = order
+            self._match_limit(order, self.bars[symbol])
+        return order
+
+    def cancel_order(self, order_id: str, symbol: str) -> bool:
+        order = self.open_orders.pop(order_id, None)
+        if order is None:
+            return False
+        order['status'] = 'canceled'
+        return True
+
+    def get_order_status(self, order_id: str, symbol: str) -> Optional[Dict]:
+        return self.open_orders.get(order_id)
+
+    # --- التعبئة ---
+
+    def _match_limit(self, order: Dict, candle: Sequence[float]):
+        limit = order['price']
+        crossed = candle[3] <= limit if order['side'] == 'buy' else candle[2] >= limit
+        if crossed:
+            self._fill(order, limit, candle)
+            if order['remaining'] == 0:
+                order['status'] = 'closed'
+                self.open_orders.pop(order['id'], None)
+
+    def _fill(self, order: Dict, price: float, candle: Sequence[float]):
+        symbol = order['symbol']
+        held = self.positions.get(symbol, 0.0)
+        qty = min(order['remaining'], self.volume_participation * candle[5])
+        if order['side'] == 'buy':
+            # لا رافعة: الكمية محدودة بالنقد المتاح بعد الرسوم
+            qty = min(qty, self.cash / (price * (1 + self.fee_rate)))
+        else:
+            qty = min(qty, held)
+        if qty <= 0:
+            return
+
+        cost = qty * price
+        fee = cost * self.fee_rate
+        if order['side'] == 'buy':
+            self.cash -= cost + fee
+            self.positions[symbol] = held + qty
+        else:
+            self.cash += cost - fee
+            self.positions[symbol] = held - qty
+
+        order['filled'] += qty
+        order['remaining'] = max(order['remaining'] - qty, 0.0)
+        if order['remaining'] < 1e-12:
+            order['remaining'] = 0.0
+        order['cost'] += cost
+        order['fee'] += fee
+        order['average'] = order['cost'] / order['filled']
+        self.fills.append({
+            'timestamp': candle[0],
+            'order_id': order['id'],
+            'symbol': symbol,
+            'side': order['side'],
+            'amount': qty,
+            'price': price,
+            'fee': fee,
+        })
@@ -0,0 +1,242 @@
+import json
+import random
+import hashlib
+import itertools
+import logging
+import numpy as np
+from pathlib import Path
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+from .engine import Backtester
+from .exchange import SimulatedExchange
+
+logger = logging.getLogger(__name__)
+
+RISK_PARAMS = ('risk_per_trade', 'max_drawdown', 'max_gross_exposure', 'max_symbol_exposure')
+INDICATOR_PARAMS = ('rsi_window', 'ema_fast', 'ema_slow', 'macd_signal', 'bb_window', 'bb_std', 'atr_window')
+
+
+class SharedCandles:
+    """نسخة واحدة من الشموع في ذاكرة مشتركة تقرؤها كل العمليات دون pickle"""
+    def __init__(self, candles: np.ndarray):
+        data = np.ascontiguousarray(candles, dtype=np.float64)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        np.ndarray(data.shape, np.float64, buffer=self.shm.buf)[:] = data
+        self.handle = (self.shm.name, data.shape)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# الذاكرة المشتركة المفتوحة داخل كل عملية عاملة
+_ATTACHED: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+def _attach(handle: Tuple[str, Tuple[int, ...]]) -> np.ndarray:
+    name, shape = handle
+    if name not in _ATTACHED:
+        # العمال يرثون متتبع موارد العملية الرئيسية، فالحذف يبقى مسؤولية SharedCandles.close
+        shm = shared_memory.SharedMemory(name=name)
+        _ATTACHED[name] = (shm, np.ndarray(shape, np.float64, buffer=shm.buf))
+    return _ATTACHED[name][1]
+
+
+def build_bot(exchange: SimulatedExchange, params: Dict):
+    """بناء TradingBot للاختبار الخلفي من مجموعة معاملات"""
+    from main import TradingBot
+    from core.risk_management.manager import RiskManager
+
+    return TradingBot(
+        data_fetcher=exchange,
+        trader=exchange,
+        risk_manager=RiskManager(**{k: params[k] for k in RISK_PARAMS if k in params}),
+        live_trading=True,
+        stop_loss_pct=params.get('stop_loss_pct', 2.0),
+        indicator_params={k: params[k] for k in INDICATOR_PARAMS if k in params}
+    )
+
+
+def _evaluate(handle, symbol: str, params: Dict, start: int, stop: int,
+              warmup: int, exchange_kwargs: Dict) -> Dict:
+    candles = _attach(handle)[start:stop]
+    exchange = SimulatedExchange(**exchange_kwargs)
+    result = Backtester(build_bot(exchange, params), exchange).run(symbol, candles, warmup)
+    return result.summary()
+
+
+def grid(space: Dict[str, Iterable]) -> List[Dict]:
+    """كل توليفات القيم في الفضاء"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_search(space: Dict, n_iter: int, seed: int = 0) -> List[Dict]:
+    """
+    عينات عشوائية من الفضاء
+
+    القائمة تُختار منها قيمة، والثنائي (أدنى، أعلى) يُسحب منه بانتظام
+    (عدد صحيح إذا كان الطرفان صحيحين).
+    """
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(n_iter):
+        params = {}
+        for key, values in space.items():
+            if isinstance(values, tuple) and len(values) == 2:
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = rng.randint(low, high)
+                else:
+                    params[key] = rng.uniform(low, high)
+            else:
+                params[key] = rng.choice(list(values))
+        samples.append(params)
+    return samples
+
+
+class Optimizer:
+    """
+    مسح معاملات متوازي (شبكي، عشوائي، Walk-forward) فوق ProcessPoolExecutor
+
+    الشموع تُشارك عبر الذاكرة المشتركة، وكل نتيجة تُلحق فوراً بملف JSONL
+    فيتخطى التشغيل التالي ما سبق حسابه.
+    """
+    def __init__(self,
+                 candles: np.ndarray,
+                 symbol: str,
+                 results_path: str = 'data/optimizer/results.jsonl',
+                 max_workers: Optional[int] = None,
+                 warmup: int = 50,
+                 metric: str = 'total_return',
+                 exchange_kwargs: Optional[Dict] = None):
+        """
+        :param candles: مصفوفة (n, 6)
+        :param symbol: زوج التداول
+        :param results_path: ملف النتائج القابل للاستئناف
+        :param max_workers: عدد العمليات (افتراضي: عدد الأنوية)
+        :param warmup: شموع تهيئة المؤشرات في كل نافذة
+        :param metric: مفتاح summary() الذي يُعظَّم
+        :param exchange_kwargs: معاملات SimulatedExchange
+        """
+        self.symbol = symbol
+        self.candles = candles
+        self.n_bars = len(candles)
+        self.results_path = Path(results_path)
+        self.max_workers = max_workers
+        self.warmup = warmup
+        self.metric = metric
+        self.exchange_kwargs = exchange_kwargs or {}
+        self.shared = SharedCandles(candles)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._fingerprints: Dict[Tuple[int, int], str] = {}
+        self.results: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        results = {}
+        if self.results_path.exists():
+            with open(self.results_path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        results[record['key']] = record
+        return results
+
+    def _fingerprint(self, start: int, stop: int) -> str:
+        """بصمة شموع النافذة، فالشموع المحدثة أو المصححة لا تعيد نتائج قديمة"""
+        fingerprint = self._fingerprints.get((start, stop))
+        if fingerprint is None:
+            window = np.ascontiguousarray(self.candles[start:stop], dtype=np.float64)
+            fingerprint = self._fingerprints[(start, stop)] = hashlib.sha1(window.tobytes()).hexdigest()
+        return fingerprint
+
+    def _key(self, params: Dict, start: int, stop: int) -> str:
+        payload = json.dumps({
+            'symbol': self.symbol, 'start': start, 'stop': stop, 'warmup': self.warmup,
+            'candles': self._fingerprint(start, stop),
+            'exchange': self.exchange_kwargs, 'params': params
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        self.shared.close()
+
+    def evaluate(self, param_sets: List[Dict], start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """
+        تقييم كل مجموعة معاملات على الشموع [start:stop]
+
+        :return: السجلات بترتيب param_sets
+        """
+        stop = self.n_bars if stop is None else stop
+        keys = [self._key(p, start, stop) for p in param_sets]
+        pending = {k: p for k, p in zip(keys, param_sets) if k not in self.results}
+
+        if pending:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            self.results_path.parent.mkdir(parents=True, exist_ok=True)
+            futures = {
+                self.pool.submit(_evaluate, self.shared.handle, self.symbol, params,
+                                 start, stop, self.warmup, self.exchange_kwargs): key
+                for key, params in pending.items()
+            }
+            with open(self.results_path, 'a') as f:
+                for future in as_completed(futures):
+                    key = futures[future]
+                    record = {'key': key, 'start': start, 'stop': stop,
+                              'params': pending[key], **future.result()}
+                    self.results[key] = record
+                    f.write(json.dumps(record) + '\n')
+                    f.flush()
+
+        return [self.results[k] for k in keys]
+
+    def best(self, records: List[Dict]) -> Dict:
+        return max(records, key=lambda r: r.get(self.metric) or float('-inf'))
+
+    def grid_search(self, space: Dict[str, Iterable]) -> List[Dict]:
+        return self.evaluate(grid(space))
+
+    def random_search(self, space: Dict, n_iter: int, seed: int = 0) -> List[Dict]:
+        return self.evaluate(random_search(space, n_iter, seed))
+
+    def walk_forward(self,
+                     space: Dict,
+                     train_size: int,
+                     test_size: int,
+                     n_iter: Optional[int] = None,
+                     seed: int = 0) -> List[Dict]:
+        """
+        تحسين على نافذة تدريب ثم تقييم الأفضل على النافذة التالية، مع انزلاق النوافذ
+
+        :param n_iter: عدد العينات العشوائية لكل نافذة، None للبحث الشبكي
+        :return: لكل نافذة: أفضل معاملات التدريب ونتيجتها خارج العينة
+        """
+        param_sets = grid(space) if n_iter is None else random_search(space, n_iter, seed)
+        folds = []
+        start = 0
+        while start + train_size + test_size <= self.n_bars:
+            train_stop = start + train_size
+            best = self.best(self.evaluate(param_sets, start, train_stop))
+            # نافذة الاختبار تبدأ بعد شموع التهيئة حتى لا تتداخل مع التدريب
+            test = self.evaluate([best['params']], max(train_stop - self.warmup, 0), train_stop + test_size)[0]
+            folds.append({'train': best, 'test': test})
+            logger.info(f"Walk-forward fold {len(folds)}: {best['params']} -> {test.get(self.metric)}")
+            start += test_size
+        return folds
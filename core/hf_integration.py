@@ -1,19 +1,38 @@
+import os
+import sys
+import time
 import logging
-from typing import Dict, Any, Optional
-from transformers import pipeline, AutoTokenizer, GenerationConfig
-from huggingface_hub import login, snapshot_download
+import threading
+from typing import Dict, Any, List, Optional
 from pathlib import Path
-import torch
+
+# torch و transformers يُستوردان عند أول تحميل للنموذج فقط،
+# حتى لا يدفع main.py كلفتهما عند التشغيل دون مسار النموذج اللغوي
 
 class HFIntegration:
     """
     وحدة متكاملة للتعامل مع نماذج Hugging Face
     """
+    DEFAULT_GENERATION_PARAMS = {
+        "max_new_tokens": 300,
+        "temperature": 0.7,
+        "top_p": 0.9,
+        "do_sample": True,
+        "num_return_sequences": 1
+    }
+    CPU_MODES = ("fp32", "bf16", "int8")
+
     def __init__(self, 
                 model_name: str, 
                 hf_token: str, 
                 cache_dir: str = "models",
-                device: Optional[str] = None):
+                device: Optional[str] = None,
+                lazy: bool = True,
+                warmup: bool = False,
+                offline: Optional[bool] = None,
+                cpu_mode: str = "fp32",
+                num_threads: Optional[int] = None,
+                system_prompt: Optional[str] = None):
         """
         تهيئة متقدمة للوحدة
         
@@ -21,20 +40,63 @@ class HFIntegration:
         :param hf_token: توكن الوصول من HF
         :param cache_dir: مسار تخزين النماذج (افتراضي: models/)
         :param device: جهاز التشغيل (cuda/cpu/auto)، None للكشف التلقائي
+        :param lazy: تأجيل تحميل النموذج حتى أول توليد
+        :param warmup: بدء التحميل فوراً في خيط خلفي
+        :param offline: منع أي اتصال بالـ Hub (افتراضي: متغير HF_HUB_OFFLINE)
+        :param cpu_mode: دقة الاستدلال على المعالج: fp32 أو bf16 أو int8 (تكميم ديناميكي)
+        :param num_threads: عدد خيوط torch على المعالج، None لترك الافتراضي
+        :param system_prompt: بادئة ثابتة لكل الـ prompts؛ ذاكرة KV الخاصة بها تُحسب مرة واحدة
+                              وتُستخدم في generate_text والدفعات ذات الـ prompt الواحد
         """
+        if cpu_mode not in self.CPU_MODES:
+            raise ValueError(f"cpu_mode يجب أن يكون أحد {self.CPU_MODES}")
         self.logger = logging.getLogger(__name__)
         self.model_name = model_name
         self.hf_token = hf_token
         self.cache_dir = Path(cache_dir)
-        self.device = self._determine_device(device)
+        self.requested_device = device
+        self.device = device
+        self.offline = offline if offline is not None else os.getenv("HF_HUB_OFFLINE", "0") == "1"
         self.model = None
         self.tokenizer = None
-        self._setup()
+        self.model_path: Optional[str] = None
+        self._load_lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.cpu_mode = cpu_mode
+        self.num_threads = num_threads
+        self.system_prompt = system_prompt
+        self._prefix_ids = None
+        self._prefix_cache = None
+        
+        if warmup:
+            self.warmup()
+        elif not lazy:
+            self._ensure_loaded()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def warmup(self) -> threading.Thread:
+        """تحميل النموذج في خيط خلفي؛ أول توليد ينتظره إن لم يكتمل"""
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(
+                target=self._ensure_loaded, name="hf-warmup", daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def _ensure_loaded(self):
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is None:
+                self._setup()
 
     def _determine_device(self, device: Optional[str]) -> str:
         """تحديد جهاز التشغيل الأمثل"""
         if device:
             return device
+        import torch
         return "cuda" if torch.cuda.is_available() else "cpu"
 
     def _setup(self):
@@ -42,10 +104,10 @@ class HFIntegration:
         try:
             # إنشاء مجلد النماذج بصلاحيات كاملة
             self.cache_dir.mkdir(exist_ok=True, parents=True)
+            self.device = self._determine_device(self.requested_device)
             
-            # تسجيل دخول آمن
-            login(token=self.hf_token, add_to_git_credential=True)
-            self.logger.info("✅ تم المصادقة مع Hugging Face Hub")
+            # تحديد مسار النموذج محلياً أولاً
+            self.model_path = self._resolve_model_path()
             
             # تحميل النموذج
             self._load_model()
@@ -54,46 +116,147 @@ class HFIntegration:
             self.logger.critical(f"فشل حرج في الإعداد: {e}", exc_info=True)
             raise RuntimeError("تعذر تهيئة وحدة HF") from e
 
+    def _resolve_model_path(self) -> str:
+        """
+        مسار اللقطة المحلية للنموذج دون أي طلب للـ Hub إن كانت موجودة،
+        وإلا تنزيلها مرة واحدة (إلا في وضع عدم الاتصال)
+        """
+        if Path(self.model_name).is_dir():
+            return self.model_name
+        
+        from huggingface_hub import snapshot_download
+        try:
+            path = snapshot_download(
+                self.model_name,
+                cache_dir=str(self.cache_dir),
+                local_files_only=True
+            )
+            self.logger.info(f"📦 النموذج موجود محلياً: {path}")
+            return path
+        except Exception:
+            if self.offline:
+                raise
+        
+        # تسجيل دخول آمن، فقط عند الحاجة إلى التنزيل
+        if self.hf_token:
+            from huggingface_hub import login
+            login(token=self.hf_token, add_to_git_credential=True)
+            self.logger.info("✅ تم المصادقة مع Hugging Face Hub")
+        
+        self.logger.info(f"⬇️ تنزيل النموذج {self.model_name}...")
+        return snapshot_download(
+            self.model_name,
+            cache_dir=str(self.cache_dir),
+            token=self.hf_token
+        )
+
     def _load_model(self):
-        """تحميل آمن للنموذج"""
+        """تحميل آمن للنموذج من اللقطة المحلية"""
+        import torch
+        from transformers import pipeline, AutoTokenizer, GenerationConfig
+        
         try:
             self.logger.info(f"⚙️ جاري تحميل النموذج {self.model_name}...")
             
             # تحميل Tokenizer مع معالجة الأخطاء
             self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model_name,
-                token=self.hf_token,
-                cache_dir=str(self.cache_dir),
+                self.model_path,
                 trust_remote_code=True
             )
             
-            # إعدادات توليد النص
-            generation_config = GenerationConfig.from_pretrained(
-                self.model_name,
-                token=self.hf_token
-            )
+            # إعدادات توليد النص (اختيارية في بعض النماذج)
+            try:
+                generation_config = GenerationConfig.from_pretrained(self.model_path)
+            except OSError:
+                generation_config = None
+            
+            # safetensors تُقرأ عبر mmap مع low_cpu_mem_usage فتنخفض الذروة في الذاكرة
+            has_safetensors = any(Path(self.model_path).glob("*.safetensors"))
+            torch_dtype = self._configure_cpu(torch)
             
             # تحميل النموذج مع إدارة الذاكرة
             self.model = pipeline(
                 task="text-generation",
-                model=self.model_name,
-                token=self.hf_token,
+                model=self.model_path,
+                tokenizer=self.tokenizer,
                 device=self.device,
-                torch_dtype=torch.float16 if "cuda" in self.device else None,
+                torch_dtype=torch_dtype,
                 model_kwargs={
-                    "cache_dir": str(self.cache_dir),
                     "trust_remote_code": True,
-                    "low_cpu_mem_usage": True
+                    "low_cpu_mem_usage": True,
+                    "use_safetensors": has_safetensors
                 },
                 generation_config=generation_config
             )
             
-            self.logger.info("🎉 تم تحميل النموذج بنجاح")
+            # التجميع في دفعات يحتاج رمز حشو، والحشو من اليسار لنماذج decoder-only
+            if self.model.tokenizer.pad_token_id is None:
+                self.model.tokenizer.pad_token_id = self.model.model.config.eos_token_id
+            self.model.tokenizer.padding_side = "left"
+            
+            if self.device == "cpu" and self.cpu_mode == "int8":
+                # تكميم ديناميكي لطبقات Linear: أوزان int8 وتنشيطات تُكمم أثناء التشغيل
+                self.model.model = torch.ao.quantization.quantize_dynamic(
+                    self.model.model, {torch.nn.Linear}, dtype=torch.qint8)
+            
+            if self.system_prompt:
+                self._build_prefix_cache(torch)
+            
+            self.logger.info(f"🎉 تم تحميل النموذج بنجاح ({self.device}/{self.cpu_mode})")
             
         except Exception as e:
             self.logger.error(f"🔥 خطأ في تحميل النموذج: {e}", exc_info=True)
             raise
 
+    def _configure_cpu(self, torch):
+        """إعداد خيوط المعالج واختيار dtype حسب الوضع"""
+        if "cuda" in self.device:
+            return torch.float16
+        if self.device != "cpu":
+            return None
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        if self.cpu_mode == "bf16":
+            # bf16 أسرع فقط مع تعليمات AVX512-BF16/AMX، وإلا فهو أبطأ من fp32
+            capability = torch.backends.cpu.get_cpu_capability()
+            if "AVX512" in capability or "AMX" in capability:
+                return torch.bfloat16
+            self.logger.warning(f"⚠️ المعالج ({capability}) لا يدعم bf16 بكفاءة، استخدام fp32")
+            self.cpu_mode = "fp32"
+        return torch.float32
+
+    def _build_prefix_cache(self, torch):
+        """حساب ذاكرة KV لبادئة النظام مرة واحدة لإعادة استخدامها في كل prompt"""
+        model = self.model.model
+        self._prefix_ids = self.tokenizer(self.system_prompt, return_tensors="pt").input_ids.to(model.device)
+        with torch.no_grad():
+            self._prefix_cache = model(self._prefix_ids, use_cache=True).past_key_values
+        self.logger.info(f"🧠 ذاكرة KV للبادئة: {self._prefix_ids.shape[1]} token")
+
+    def _generate_with_prefix(self, prompt: str, params: Dict) -> str:
+        """
+        توليد بعد بادئة النظام دون إعادة حساب انتباهها
+
+        البادئة والـ prompt يُرمَّزان منفصلين حتى تطابق رموز البادئة ذاكرتها المحفوظة.
+        """
+        import copy
+        import torch
+        
+        model = self.model.model
+        suffix_ids = self.tokenizer(prompt, return_tensors="pt", add_special_tokens=False).input_ids
+        input_ids = torch.cat([self._prefix_ids, suffix_ids.to(model.device)], dim=-1)
+        params = {k: v for k, v in params.items() if k != "num_return_sequences"}
+        with torch.no_grad():
+            output = model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                # generate يمدّ الذاكرة في مكانها، فنعطيه نسخة
+                past_key_values=copy.deepcopy(self._prefix_cache),
+                pad_token_id=self.tokenizer.pad_token_id,
+                **params
+            )
+        return self.tokenizer.decode(output[0], skip_special_tokens=True)
+
     def generate_text(self, 
                     prompt: str, 
                     generation_params: Optional[Dict] = None) -> Dict[str, Any]:
@@ -107,34 +270,20 @@ class HFIntegration:
             - status: success/error
             - metrics: إحصائيات الأداء
         """
-        default_params = {
-            "max_new_tokens": 300,
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "do_sample": True,
-            "num_return_sequences": 1
-        }
-        
-        params = {**default_params, **(generation_params or {})}
+        params = {**self.DEFAULT_GENERATION_PARAMS, **(generation_params or {})}
         
         try:
+            self._ensure_loaded()
             self.logger.debug(f"📝 معالجة Prompt (أول 100 حرف): {prompt[:100]}...")
             
             start_time = time.time()
-            outputs = self.model(prompt, **params)
+            if self._prefix_cache is not None:
+                text = self._generate_with_prefix(prompt, params)
+            else:
+                text = self.model(prompt, **params)[0]["generated_text"]
             latency = time.time() - start_time
             
-            result = {
-                "text": outputs[0]["generated_text"],
-                "status": "success",
-                "model": self.model_name,
-                "metrics": {
-                    "latency_seconds": round(latency, 2),
-                    "tokens_generated": len(outputs[0]["generated_text"].split()),
-                    "device": self.device
-                }
-            }
-            
+            result = self._build_result(text, latency)
             self.logger.info(f"✅ تم توليد {result['metrics']['tokens_generated']} token في {result['metrics']['latency_seconds']} ثانية")
             return result
             
@@ -147,6 +296,57 @@ class HFIntegration:
                 "model": self.model_name
             }
 
+    def generate_batch(self, 
+                       prompts: List[str], 
+                       generation_params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """
+        توليد دفعة prompts في تمريرة أمامية واحدة
+        
+        ذاكرة KV للبادئة لا تُستخدم في الدفعات الأكبر من prompt واحد: الحشو
+        من اليسار يقع بين البادئة والـ prompt فلا تطابق المواضع ذاكرتها، لذا
+        تُضاف البادئة نصاً وتُحسب مع كل دفعة.
+        
+        :return: قائمة بنفس ترتيب prompts وبنفس شكل نتيجة generate_text
+        """
+        params = {**self.DEFAULT_GENERATION_PARAMS, **(generation_params or {})}
+        
+        try:
+            self._ensure_loaded()
+            start_time = time.time()
+            if self._prefix_cache is not None and len(prompts) == 1:
+                texts = [self._generate_with_prefix(prompts[0], params)]
+            else:
+                if self.system_prompt:
+                    prompts = [self.system_prompt + p for p in prompts]
+                outputs = self.model(prompts, batch_size=len(prompts), **params)
+                texts = [output[0]["generated_text"] for output in outputs]
+            latency = time.time() - start_time
+            
+            self.logger.info(f"✅ دفعة من {len(prompts)} prompt في {latency:.2f} ثانية")
+            return [self._build_result(text, latency) for text in texts]
+            
+        except Exception as e:
+            error_msg = f"❌ فشل توليد الدفعة: {str(e)}"
+            self.logger.error(error_msg, exc_info=True)
+            return [{
+                "status": "error",
+                "message": error_msg,
+                "model": self.model_name
+            } for _ in prompts]
+
+    def _build_result(self, text: str, latency: float) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "status": "success",
+            "model": self.model_name,
+            "metrics": {
+                "latency_seconds": round(latency, 2),
+                "tokens_generated": len(text.split()),
+                "device": self.device,
+                "cpu_mode": self.cpu_mode
+            }
+        }
+
     def __del__(self):
         """تنظيف الذاكرة عند الإنهاء"""
         try:
@@ -154,12 +354,71 @@ class HFIntegration:
                 del self.model
             if hasattr(self, 'tokenizer'):
                 del self.tokenizer
-            if torch.cuda.is_available():
+            # لا نستورد torch هنا إن لم يُحمَّل نموذج أصلاً
+            torch = sys.modules.get("torch")
+            if torch is not None and torch.cuda.is_available():
                 torch.cuda.empty_cache()
             self.logger.info("🧹 تم تنظيف الموارد")
         except Exception as e:
             self.logger.warning(f"تحذير أثناء التنظيف: {e}")
 
+def _benchmark_mode(model_name: str, hf_token: str, prompts: List[str],
+                    mode: str, generation_params: Dict, kwargs: Dict) -> Dict[str, Any]:
+    import resource
+    
+    start = time.perf_counter()
+    hf = HFIntegration(model_name, hf_token, device="cpu", lazy=False, cpu_mode=mode, **kwargs)
+    load_seconds = time.perf_counter() - start
+    
+    tokens, elapsed = 0, 0.0
+    for prompt in prompts:
+        start = time.perf_counter()
+        result = hf.generate_text(prompt, generation_params)
+        elapsed += time.perf_counter() - start
+        if result["status"] != "success":
+            raise RuntimeError(result["message"])
+        # عدد الرموز الفعلي المولد بعد البادئة والـ prompt
+        full_prompt = (hf.system_prompt or "") + prompt
+        tokens += len(hf.tokenizer(result["text"]).input_ids) - len(hf.tokenizer(full_prompt).input_ids)
+    
+    return {
+        "mode": hf.cpu_mode,
+        "load_seconds": round(load_seconds, 2),
+        "tokens_per_second": round(tokens / elapsed, 2) if elapsed else 0.0,
+        # ru_maxrss بالكيلوبايت على Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def benchmark_cpu_modes(model_name: str,
+                        hf_token: Optional[str],
+                        prompts: List[str],
+                        modes=HFIntegration.CPU_MODES,
+                        generation_params: Optional[Dict] = None,
+                        **kwargs) -> List[Dict[str, Any]]:
+    """
+    قياس سرعة التوليد وذروة الذاكرة لكل وضع CPU
+
+    كل وضع يُقاس في عملية جديدة حتى لا تختلط ذروة الذاكرة بين الأوضاع.
+
+    :param prompts: الـ prompts المستخدمة في القياس
+    :param modes: الأوضاع المقاسة
+    :param kwargs: معاملات إضافية لـ HFIntegration مثل num_threads و system_prompt
+    :return: لكل وضع: tokens_per_second و peak_rss_mb و load_seconds
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    params = generation_params or {"max_new_tokens": 32, "do_sample": False}
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for mode in modes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(_benchmark_mode, model_name, hf_token, prompts,
+                                       mode, params, kwargs).result())
+        logging.info(f"⏱️ {results[-1]}")
+    return results
+
 # إضافة مفيدة للاستيراد الآمن
 def create_hf_integration(model_name: str, hf_token: str, **kwargs) -> Optional[HFIntegration]:
     """دالة مصنع لإنشاء مثيل آمن"""
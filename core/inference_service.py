@@ -0,0 +1,209 @@
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TTLCache:
+    """ذاكرة LRU مع مدة صلاحية، آمنة بين الخيوط"""
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if time.monotonic() - item[0] > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class InferenceService:
+    """
+    خدمة توليد مجمّعة فوق HFIntegration
+
+    الطلبات تدخل طابوراً ويجمعها خيط عامل واحد في دفعات (micro-batching)
+    لكل تمريرة أمامية، والنتائج الناجحة تُخزن مؤقتاً حسب بصمة الـ prompt،
+    والطلبات المتطابقة قيد التنفيذ تشترك في نفس الـ Future.
+    """
+    def __init__(self,
+                 backend,
+                 max_batch_size: int = 8,
+                 max_wait: float = 0.02,
+                 cache_size: int = 1024,
+                 cache_ttl: float = 300.0,
+                 max_queue: int = 1024):
+        """
+        :param backend: كائن يوفر generate_batch(prompts, generation_params) مثل HFIntegration
+        :param max_batch_size: أقصى عدد prompts في تمريرة واحدة
+        :param max_wait: أقصى انتظار (ثوانٍ) لاكتمال الدفعة بعد أول طلب
+        :param cache_size: عدد النتائج المحفوظة
+        :param cache_ttl: صلاحية النتيجة بالثواني
+        :param max_queue: حد الطابور؛ submit يحجب عند امتلائه
+        """
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache = TTLCache(cache_size, cache_ttl)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._deferred: "deque" = deque()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0,
+                       'batches': 0, 'generated': 0, 'busy_seconds': 0.0}
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._worker = threading.Thread(target=self._run, name='inference-worker', daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def _key(prompt: str, params: Optional[Dict]) -> Tuple[str, str]:
+        params_key = json.dumps(params or {}, sort_keys=True)
+        digest = hashlib.sha256(f"{params_key}\0{prompt}".encode()).hexdigest()
+        return digest, params_key
+
+    def submit(self, prompt: str, generation_params: Optional[Dict] = None) -> Future:
+        """إضافة طلب وإرجاع Future تُحل بقاموس نتيجة generate_text"""
+        if self._closed:
+            raise RuntimeError("InferenceService مغلقة")
+        key, params_key = self._key(prompt, generation_params)
+
+        with self._lock:
+            if self._error is not None:
+                raise RuntimeError(f"الخيط العامل توقف: {self._error!r}") from self._error
+            self._stats['requests'] += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._stats['cache_hits'] += 1
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future
+            future = self._inflight[key] = Future()
+
+        item = (key, params_key, prompt, generation_params, future)
+        while True:
+            try:
+                self._queue.put(item, timeout=1.0)
+                return future
+            except queue.Full:
+                if self._error is not None:
+                    return future  # _fail أنهاها بالخطأ
+
+    def generate(self, prompt: str, generation_params: Optional[Dict] = None,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+        """واجهة متزامنة بنفس شكل HFIntegration.generate_text"""
+        return self.submit(prompt, generation_params).result(timeout)
+
+    def _next(self, timeout: Optional[float] = None):
+        """الطلب التالي: المؤجل من دفعة سابقة أولاً ثم الطابور"""
+        if self._deferred:
+            return self._deferred.popleft()
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self, first) -> List:
+        """جمع طلبات بنفس معاملات التوليد حتى يمتلئ الحجم أو تنتهي المهلة"""
+        batch, other = [first], []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._next(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                other.append(item)
+                break
+            (batch if item[1] == first[1] else other).append(item)
+        # الطلبات بمعاملات مختلفة تنتظر دفعتها دون إعادتها إلى طابور محدود
+        self._deferred.extend(other)
+        return batch
+
+    def _run(self):
+        try:
+            while True:
+                first = self._next()
+                if first is None:
+                    return
+                self._process(self._collect(first))
+        except BaseException as e:
+            self.logger.error(f"توقف الخيط العامل: {e}", exc_info=True)
+            self._fail(e)
+
+    def _process(self, batch: List):
+        prompts = [item[2] for item in batch]
+        start = time.perf_counter()
+        try:
+            results = self.backend.generate_batch(prompts, batch[0][3])
+        except Exception as e:
+            self.logger.error(f"فشل توليد الدفعة: {e}", exc_info=True)
+            results = [{"status": "error", "message": str(e)} for _ in batch]
+        elapsed = time.perf_counter() - start
+
+        if len(results) != len(batch):
+            message = f"الـ backend أعاد {len(results)} نتيجة لـ {len(batch)} طلب"
+            self.logger.error(message)
+            results = [{"status": "error", "message": message} for _ in batch]
+
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['generated'] += len(batch)
+            self._stats['busy_seconds'] += elapsed
+            for (key, _, _, _, future), result in zip(batch, results):
+                if isinstance(result, dict) and result.get("status") == "success":
+                    self.cache.put(key, result)
+                self._inflight.pop(key, None)
+                future.set_result(result)
+
+    def _fail(self, error: BaseException):
+        """إنهاء كل الطلبات المعلقة بالخطأ بدل انتظارها للأبد"""
+        with self._lock:
+            self._error = error
+            pending, self._inflight = list(self._inflight.values()), {}
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError(f"الخيط العامل توقف: {error!r}"))
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات الأداء، منها عدد التوصيات في الثانية من وقت التوليد الفعلي"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_batch_size'] = stats['generated'] / stats['batches'] if stats['batches'] else 0.0
+        stats['recommendations_per_second'] = (
+            stats['generated'] / stats['busy_seconds'] if stats['busy_seconds'] else 0.0)
+        return stats
+
+    def close(self, timeout: Optional[float] = None):
+        """إيقاف الخيط العامل بعد إنهاء الطلبات المعلقة"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join(timeout)
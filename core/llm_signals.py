@@ -0,0 +1,219 @@
+import re
+import json
+import logging
+import threading
+import numpy as np
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+from modules.models import CandleBlock, Signal
+from .inference_service import TTLCache
+
+# التعليمات والصيغة ثابتة لكل الرموز فتصلح system_prompt في HFIntegration.
+# الإنجليزية أقل رموزاً من العربية في أغلب الـ tokenizers.
+SYSTEM_PROMPT = (
+    "You are a crypto trading assistant. Given a market summary, answer with one JSON object "
+    'and nothing else: {"action": "buy" | "sell" | "hold", "confidence": 0.0-1.0, '
+    '"reason": "at most 8 words"}.\n'
+)
+# الإجابة تبدأ داخل الـ prompt، فلا يصرف النموذج رموزاً على المقدمات
+ANSWER_PREFIX = '{"action": "'
+# hold تعني عدم التصرف: لا دخول ولا خروج، وليست اتجاه flat الذي يغلق المركز
+ACTIONS = {'buy': 'up', 'sell': 'down', 'hold': None}
+
+# الإجابة الكاملة نحو 25 رمزاً، بدل 300 في DEFAULT_GENERATION_PARAMS
+GENERATION_PARAMS = {"max_new_tokens": 32, "do_sample": False}
+
+_FIELDS = {
+    'action': re.compile(r'"action"\s*:\s*"(\w+)'),
+    'confidence': re.compile(r'"confidence"\s*:\s*"?([0-9]*\.?[0-9]+)'),
+    'reason': re.compile(r'"reason"\s*:\s*"([^"]*)'),
+}
+
+
+def summarize(signal: Signal, candles: CandleBlock, window: int = 24) -> Dict[str, Any]:
+    """
+    ملخص السوق الذي يُبنى منه الـ prompt
+
+    :param signal: نتيجة analyze_market (السعر والمؤشرات والاتجاه)
+    :param candles: آخر الشموع، ومنها الدعم والمقاومة والتغير خلال window شمعة
+    """
+    recent = candles[-window:]
+    price = signal.price
+    first_open = float(recent.open[0])
+    return {
+        'symbol': signal.symbol,
+        'price': price,
+        'change_pct': (price / first_open - 1) * 100 if first_open else 0.0,
+        'rsi': signal.rsi,
+        'macd_hist': signal.macd_hist,
+        'atr_pct': signal.atr / price * 100 if price else 0.0,
+        'support': float(np.min(recent.low)),
+        'resistance': float(np.max(recent.high)),
+        'trend': signal.trend,
+        'bars': len(recent),
+    }
+
+
+def _number(value: float, digits: int = 4) -> str:
+    return 'n/a' if value is None or value != value else f"{value:.{digits}g}"
+
+
+def build_prompt(summary: Dict[str, Any]) -> str:
+    """prompt قصير بأرقام مقربة: أقل رموز إدخال لكل رمز"""
+    return (
+        f"Pair: {summary['symbol']}\n"
+        f"Price: {_number(summary['price'], 6)} ({summary['change_pct']:+.2f}% over {summary['bars']} bars)\n"
+        f"RSI(14): {_number(summary['rsi'], 3)}\n"
+        f"MACD histogram: {_number(summary['macd_hist'])}\n"
+        f"ATR: {_number(summary['atr_pct'], 3)}% of price\n"
+        f"Support: {_number(summary['support'], 6)}, resistance: {_number(summary['resistance'], 6)}\n"
+        f"Indicator trend: {summary['trend']}\n"
+        f"Answer: {ANSWER_PREFIX}"
+    )
+
+
+def parse_answer(text: str) -> Optional[Dict[str, Any]]:
+    """
+    استخراج {action, confidence, reason} من نص النموذج
+
+    النص قد يحتوي الـ prompt كاملاً (text-generation يعيده افتراضياً) أو
+    الإكمال فقط، وقد يُقطع عند max_new_tokens قبل إغلاق JSON، فتُستخرج
+    الحقول المكتملة حينها.
+
+    :return: None إذا لم يوجد فعل صالح
+    """
+    start = text.rfind('{"action"')
+    fragment = text[start:] if start >= 0 else ANSWER_PREFIX + text.lstrip()
+    try:
+        answer, _ = json.JSONDecoder().raw_decode(fragment)
+        if not isinstance(answer, dict):
+            return None
+    except ValueError:
+        answer = {}
+        for field, pattern in _FIELDS.items():
+            match = pattern.search(fragment)
+            if match:
+                answer[field] = match.group(1)
+
+    action = str(answer.get('action', '')).strip().lower()
+    if action not in ACTIONS:
+        return None
+    try:
+        confidence = float(answer.get('confidence', 0.0))
+    except (TypeError, ValueError):
+        confidence = 0.0
+    if 1.0 < confidence <= 100.0:
+        confidence /= 100.0  # نسبة مئوية
+    return {
+        'action': action,
+        'confidence': min(max(confidence, 0.0), 1.0),
+        'reason': str(answer.get('reason', '')).strip()[:200],
+    }
+
+
+class LLMSignalPipeline:
+    """
+    مراجعة إشارات المؤشرات بنموذج لغوي بإجابة JSON قصيرة
+
+    الـ prompts تُبنى من المؤشرات المحسوبة، والإجابات تُخزن لكل
+    (رمز، آخر شمعة مغلقة، اتجاه المؤشرات)، فتحديثات الشمعة المتكونة لا
+    تُرسل إلى النموذج مرة أخرى، وكل الرموز غير المخزنة تُولد في دفعة واحدة.
+    النموذج يراجع إشارات الدخول فقط: إشارة flat لا تصبح صفقة، لأن flat
+    قد تعني الخروج من المركز، وإجابة hold تعلّم الإشارة بـ hold فلا يفتح
+    execute_trade مركزاً ولا يغلقه.
+    """
+    def __init__(self,
+                 backend,
+                 min_confidence: float = 0.6,
+                 window: int = 24,
+                 generation_params: Optional[Dict] = None,
+                 cache_size: int = 4096,
+                 cache_ttl: float = 86400.0):
+        """
+        :param backend: كائن يوفر generate_batch(prompts, generation_params) مثل HFIntegration
+        :param min_confidence: أقل ثقة يُتبع عندها فعل النموذج، وإلا تبقى إشارة المؤشرات
+        :param window: شموع الدعم والمقاومة والتغير
+        :param generation_params: تُدمج فوق GENERATION_PARAMS
+        :param cache_size: عدد الإجابات المحفوظة
+        :param cache_ttl: صلاحية الإجابة بالثواني
+        """
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.min_confidence = min_confidence
+        self.window = window
+        self.generation_params = {**GENERATION_PARAMS, **(generation_params or {})}
+        self.cache = TTLCache(cache_size, cache_ttl)
+        # التعليمات تُضاف لكل prompt إلا إذا حملها الـ backend كبادئة محسوبة مسبقاً
+        self.prefix = '' if getattr(backend, 'system_prompt', None) else SYSTEM_PROMPT
+        self._lock = threading.Lock()
+        self._stats = {'reviews': 0, 'cache_hits': 0, 'generated': 0, 'errors': 0}
+
+    @staticmethod
+    def _key(signal: Signal, candles: CandleBlock) -> str:
+        # آخر صف هو الشمعة المتكونة، وإغلاقه يتغير مع كل تحديث
+        closed = -2 if len(candles) > 1 else -1
+        return f"{signal.symbol}|{signal.trend}|{int(candles.timestamp[closed])}|{float(candles.close[closed])!r}"
+
+    def _apply(self, signal: Signal, answer: Dict[str, Any]) -> Signal:
+        confidence = answer['confidence']
+        if confidence < self.min_confidence:
+            return replace(signal, confidence=confidence, reason=answer['reason'])
+        trend = ACTIONS[answer['action']]
+        if trend is None:
+            return replace(signal, hold=True, confidence=confidence, reason=answer['reason'])
+        return replace(signal, trend=trend, confidence=confidence, reason=answer['reason'])
+
+    def review(self, signals: Dict[str, Signal], candles: Dict[str, CandleBlock]) -> Dict[str, Signal]:
+        """
+        إشارات معدلة بإجابة النموذج
+
+        :param signals: {symbol: Signal} من analyze_market
+        :param candles: {symbol: CandleBlock} نفس الشموع التي حُللت
+        :return: {symbol: Signal}؛ إشارات flat والرمز الذي فشل توليده أو تحليل إجابته تبقى بإشارة المؤشرات
+        """
+        reviewed: Dict[str, Signal] = {}
+        pending: List = []
+        skipped = 0
+        for symbol, signal in signals.items():
+            if signal.side is None:
+                reviewed[symbol] = signal
+                skipped += 1
+                continue
+            block = CandleBlock.from_rows(candles[symbol])
+            key = self._key(signal, block)
+            answer = self.cache.get(key)
+            if answer is not None:
+                reviewed[symbol] = self._apply(signal, answer)
+            else:
+                pending.append((symbol, signal, key, self.prefix + build_prompt(summarize(signal, block, self.window))))
+
+        results = []
+        if pending:
+            try:
+                results = self.backend.generate_batch([p[3] for p in pending], self.generation_params)
+            except Exception as e:
+                self.logger.error(f"فشل توليد المراجعة: {e}", exc_info=True)
+                results = [{'status': 'error', 'message': str(e)} for _ in pending]
+
+        errors = 0
+        for (symbol, signal, key, _), result in zip(pending, results):
+            answer = parse_answer(result['text']) if result.get('status') == 'success' else None
+            if answer is None:
+                errors += 1
+                output = str(result.get('text', result.get('message')))[-200:]
+                self.logger.warning(f"لا إجابة صالحة من النموذج لـ {symbol}: {output!r}")
+                reviewed[symbol] = signal
+                continue
+            self.cache.put(key, answer)
+            reviewed[symbol] = self._apply(signal, answer)
+
+        with self._lock:
+            self._stats['reviews'] += len(signals) - skipped
+            self._stats['cache_hits'] += len(signals) - len(pending) - skipped
+            self._stats['generated'] += len(pending)
+            self._stats['errors'] += errors
+        return {symbol: reviewed[symbol] for symbol in signals}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,229 @@
+import time
+import logging
+import threading
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# دقة الـ bucket: 32 قيمة خطية لكل مضاعف للاثنين (خطأ نسبي أقل من 3%)
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_BITS = 48  # حتى ~3 أيام بالنانوثانية
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class Histogram:
+    """
+    مدرج تكراري بأسلوب HDR: buckets لوغاريتمية-خطية بحجم ثابت
+
+    التسجيل O(1) دون تخصيص ذاكرة، والمئينات تُحسب عند القراءة فقط.
+    """
+    def __init__(self):
+        self.counts = [0] * (SUB_BUCKETS * (MAX_BITS - SUB_BUCKET_BITS + 1))
+        self._size = len(self.counts)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < SUB_BUCKETS:
+            return max(value, 0)
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return SUB_BUCKETS * (shift + 1) + (value >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def _value(index: int) -> float:
+        """منتصف الـ bucket بالنانوثانية"""
+        if index < SUB_BUCKETS:
+            return float(index)
+        shift = index // SUB_BUCKETS - 1
+        low = (SUB_BUCKETS + index % SUB_BUCKETS) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, value_ns: int):
+        # نسخة مضمنة من _index لأنها في المسار الساخن
+        if value_ns < SUB_BUCKETS:
+            index = value_ns if value_ns > 0 else 0
+        else:
+            shift = value_ns.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift << SUB_BUCKET_BITS) + (value_ns >> shift)
+            if index >= self._size:
+                index = self._size - 1
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ns += value_ns
+            if value_ns > self.max_ns:
+                self.max_ns = value_ns
+
+    def percentiles(self, quantiles: Sequence[float] = QUANTILES) -> List[float]:
+        """المئينات بالثواني"""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return [0.0] * len(quantiles)
+        targets = [max(1, int(q * count + 0.5)) for q in quantiles]
+        results, seen, t = [0.0] * len(quantiles), 0, 0
+        order = sorted(range(len(targets)), key=targets.__getitem__)
+        for index, c in enumerate(counts):
+            seen += c
+            while t < len(order) and seen >= targets[order[t]]:
+                results[order[t]] = self._value(index) / 1e9
+                t += 1
+            if t == len(order):
+                break
+        return results
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    سجل مقاييس زمن المسار الساخن
+
+    عند التعطيل تكلف الـ span فحص متغير واحد فقط، فيمكن ترك التغليف في الكود دائماً.
+    """
+    def __init__(self, enabled: bool = False, prefix: str = 'trading_bot'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._reporter: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def span(self, name: str):
+        """مدير سياق يقيس زمن الكتلة"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self.histogram(name))
+
+    def timed(self, name: str) -> Callable:
+        """مُزخرف يقيس زمن كل استدعاء للدالة"""
+        def decorator(func):
+            histogram = self.histogram(name)
+            record, clock = histogram.record, time.perf_counter_ns
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = clock()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(clock() - start)
+            return wrapper
+        return decorator
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """لكل span: العدد والمتوسط والمئينات بالمللي ثانية"""
+        result = {}
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            p50, p90, p99, p999 = histogram.percentiles()
+            result[name] = {
+                'count': histogram.count,
+                'mean_ms': histogram.total_ns / histogram.count / 1e6,
+                'p50_ms': p50 * 1e3, 'p90_ms': p90 * 1e3, 'p99_ms': p99 * 1e3, 'p999_ms': p999 * 1e3,
+                'max_ms': histogram.max_ns / 1e6,
+            }
+        return result
+
+    def prometheus(self) -> str:
+        """المقاييس بصيغة نص Prometheus (نوع summary)"""
+        metric = f"{self.prefix}_latency_seconds"
+        lines = [f"# HELP {metric} Hot-path latency per span", f"# TYPE {metric} summary"]
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            for q, value in zip(QUANTILES, histogram.percentiles()):
+                lines.append(f'{metric}{{span="{name}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {histogram.total_ns / 1e9:.9f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """نقطة /metrics محلية في خيط خلفي"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        logger.info(f"📈 المقاييس على http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+    def start_reporter(self, interval: float = 60.0) -> threading.Thread:
+        """تسجيل ملخص المئينات دورياً"""
+        def run():
+            while not self._stop.wait(interval):
+                for name, stats in self.summary().items():
+                    logger.info(f"⏱️ {name}: n={stats['count']} p50={stats['p50_ms']:.2f}ms "
+                                f"p99={stats['p99_ms']:.2f}ms max={stats['max_ms']:.2f}ms")
+
+        self._reporter = threading.Thread(target=run, name='metrics-reporter', daemon=True)
+        self._reporter.start()
+        return self._reporter
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# السجل المشترك للعملية
+metrics = Metrics()
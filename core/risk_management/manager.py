@@ -1,34 +1,198 @@
+import numpy as np
 from decimal import Decimal
-from typing import Dict
+from typing import Dict, Optional, Sequence, Union
+from core.metrics import metrics
 
 class RiskManager:
-    def __init__(self, max_drawdown: float = 0.05, risk_per_trade: float = 0.01):
+    def __init__(self,
+                 max_drawdown: float = 0.05,
+                 risk_per_trade: float = 0.01,
+                 max_gross_exposure: float = 1.0,
+                 max_symbol_exposure: float = 1.0,
+                 max_correlation: float = 1.0):
         """
         :param max_drawdown: الحد الأقصى المسموح به للخسارة (5%)
         :param risk_per_trade: نسبة المخاطرة لكل صفقة (1%)
+        :param max_gross_exposure: أقصى مجموع تعرض المراكز كنسبة من رأس المال
+        :param max_symbol_exposure: أقصى تعرض لرمز واحد كنسبة من رأس المال
+        :param max_correlation: أقصى ارتباط مسموح بين مركز جديد ومركز قائم
         """
         self.max_drawdown = Decimal(str(max_drawdown))
         self.risk_per_trade = Decimal(str(risk_per_trade))
+        self.max_gross_exposure = max_gross_exposure
+        self.max_symbol_exposure = max_symbol_exposure
+        self.max_correlation = max_correlation
 
-    def calculate_position_size(self, 
-                             portfolio_value: float, 
+        # حالة المحفظة المبنية من التعبئات
+        self.cash: Optional[float] = None
+        self.quantities: Dict[str, float] = {}
+        # كميات أوامر مُحجّمة لم تُسجل تعبئتها بعد، تُحسب في التعرض
+        self.reserved: Dict[str, float] = {}
+        self.prices: Dict[str, float] = {}
+        self.high_water_mark = 0.0
+        self.drawdown = 0.0
+
+    @metrics.timed('risk.calculate_position_size')
+    def calculate_position_size(self,
+                             portfolio_value: float,
                              stop_loss_pct: float) -> Decimal:
         """
         حساب حجم المركز الآمن
-        
+
         :param portfolio_value: القيمة الإجمالية للمحفظة
         :param stop_loss_pct: نسبة وقف الخسارة (بالنسبة المئوية)
         :return: حجم المركز المقترح
         """
         if stop_loss_pct <= 0:
             raise ValueError("يجب أن تكون نسبة وقف الخسارة موجبة")
-            
+
         portfolio_dec = Decimal(str(portfolio_value))
         stop_loss_dec = Decimal(str(stop_loss_pct/100))
-        
+
         risk_amount = portfolio_dec * self.risk_per_trade
         return (risk_amount / stop_loss_dec).quantize(Decimal('0.000001'))
 
-    def validate_trade(self, current_drawdown: float) -> bool:
-        """التحقق من عدم تجاوز الحد الأقصى للخسارة"""
-        return current_drawdown < float(self.max_drawdown)
\ No newline at end of file
+    def validate_trade(self, current_drawdown: Optional[float] = None) -> bool:
+        """
+        التحقق من عدم تجاوز الحد الأقصى للخسارة
+
+        :param current_drawdown: السحب الحالي، وإلا يُستخدم السحب المتتبع من التعبئات
+        """
+        if current_drawdown is None:
+            current_drawdown = self.drawdown
+        return current_drawdown < float(self.max_drawdown)
+
+    # --- تتبع المحفظة ---
+
+    def reset(self, cash: float, quantities: Optional[Dict[str, float]] = None,
+              prices: Optional[Dict[str, float]] = None):
+        """بدء التتبع من رصيد نقدي ومراكز معروفة"""
+        self.cash = float(cash)
+        self.quantities = dict(quantities or {})
+        self.prices = dict(prices or {})
+        self.high_water_mark = 0.0
+        self._update_drawdown()
+
+    def sync(self, cash: float, quantities: Dict[str, float]):
+        """
+        استبدال النقد والمراكز بحالة الحساب المؤكدة مع الإبقاء على قمة رأس المال
+
+        :param quantities: كل المراكز المعروفة؛ الرمز الغائب عنها يُحذف من المحفظة
+        """
+        self.cash = float(cash)
+        self.quantities.clear()
+        self.quantities.update({symbol: float(qty) for symbol, qty in quantities.items()})
+        self._update_drawdown()
+
+    @property
+    def equity(self) -> Optional[float]:
+        if self.cash is None:
+            return None
+        return self.cash + sum(qty * self.prices.get(symbol, 0.0)
+                               for symbol, qty in self.quantities.items() if qty)
+
+    def exposure(self, symbol: str) -> float:
+        """التعرض الموقّع للرمز بعملة التسعير، شاملاً الأوامر المحجوزة"""
+        quantity = self.quantities.get(symbol, 0.0) + self.reserved.get(symbol, 0.0)
+        return quantity * self.prices.get(symbol, 0.0)
+
+    def gross_exposure(self) -> float:
+        return sum(abs(self.exposure(symbol)) for symbol in set(self.quantities) | set(self.reserved))
+
+    def reserve(self, symbol: str, side: str, amount: float):
+        """
+        حجز كمية أمر مُحجّم حتى تُسجل تعبئته
+
+        الأوامر المتوازية تُحجَّم مقابل التعرض المحجوز، فلا تتجاوز معاً حدود
+        التعرض أثناء انتظار ردود البورصة.
+        """
+        direction = 1.0 if side == 'buy' else -1.0
+        self.reserved[symbol] = self.reserved.get(symbol, 0.0) + direction * amount
+
+    def release(self, symbol: str, side: str, amount: float):
+        """إلغاء حجز reserve بعد تسجيل التعبئة أو فشل الأمر"""
+        direction = 1.0 if side == 'buy' else -1.0
+        remaining = self.reserved.get(symbol, 0.0) - direction * amount
+        if abs(remaining) > 1e-12:
+            self.reserved[symbol] = remaining
+        else:
+            self.reserved.pop(symbol, None)
+
+    def mark(self, prices: Dict[str, float]) -> float:
+        """تحديث الأسعار وإعادة حساب السحب"""
+        self.prices.update(prices)
+        return self._update_drawdown()
+
+    def record_fill(self, symbol: str, side: str, amount: float, price: float, fee: float = 0.0) -> float:
+        """
+        تطبيق تعبئة على المحفظة المتتبعة
+
+        :return: السحب الحالي بعد التعبئة
+        """
+        if self.cash is None:
+            raise RuntimeError("يجب استدعاء reset قبل تسجيل التعبئات")
+        direction = 1.0 if side == 'buy' else -1.0
+        self.quantities[symbol] = self.quantities.get(symbol, 0.0) + direction * amount
+        self.cash -= direction * amount * price + fee
+        self.prices[symbol] = price
+        return self._update_drawdown()
+
+    def _update_drawdown(self) -> float:
+        equity = self.equity
+        if equity is None:
+            return self.drawdown
+        self.high_water_mark = max(self.high_water_mark, equity)
+        self.drawdown = 1.0 - equity / self.high_water_mark if self.high_water_mark > 0 else 0.0
+        return self.drawdown
+
+    # --- التحجيم الجماعي ---
+
+    @metrics.timed('risk.size_positions')
+    def size_positions(self,
+                       symbols: Sequence[str],
+                       sides: Union[Sequence[str], np.ndarray],
+                       stop_loss_pct: Union[float, np.ndarray],
+                       returns: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        حساب أحجام دفعة كاملة من الإشارات المرشحة بعملة التسعير
+
+        المرشحون مرتبون حسب الأولوية: حد التعرض الإجمالي يُستهلك بالترتيب،
+        والمرشح المرتبط بمرشح قبله أو بمركز قائم (ضمن الدفعة) يُرفض.
+
+        :param symbols: رموز المرشحين
+        :param sides: 'buy' أو 'sell' لكل مرشح
+        :param stop_loss_pct: نسبة وقف الخسارة (عدد أو مصفوفة بالنسبة المئوية)
+        :param returns: عوائد المرشحين (n, bars) لفحص الارتباط، None لتخطيه
+        :return: مصفوفة الأحجام (n,)، الصفر يعني الرفض
+        """
+        n = len(symbols)
+        equity = self.equity
+        if not n or not equity or equity <= 0 or not self.validate_trade():
+            return np.zeros(n)
+
+        stop = np.asarray(stop_loss_pct, dtype=np.float64) / 100.0
+        if np.any(stop <= 0):
+            raise ValueError("يجب أن تكون نسبة وقف الخسارة موجبة")
+        direction = np.where(np.asarray(sides) == 'buy', 1.0, -1.0)
+        held = np.fromiter((self.exposure(s) for s in symbols), np.float64, n)
+
+        sizes = np.broadcast_to(equity * float(self.risk_per_trade) / stop, (n,)).copy()
+
+        # حد الرمز: التعرض بعد الصفقة لا يتجاوز الحد في أي اتجاه
+        sizes = np.minimum(sizes, np.maximum(self.max_symbol_exposure * equity - direction * held, 0.0))
+
+        # حد التعرض الإجمالي يخص الصفقات التي تزيد التعرض فقط
+        increasing = direction * held >= 0
+        added = np.where(increasing, sizes, 0.0)
+        room = self.max_gross_exposure * equity - self.gross_exposure()
+        before = np.cumsum(added) - added
+        sizes = np.where(increasing, np.clip(room - before, 0.0, sizes), sizes)
+
+        if returns is not None and self.max_correlation < 1.0 and n > 1:
+            corr = np.corrcoef(returns)
+            high = np.nan_to_num(corr) > self.max_correlation
+            np.fill_diagonal(high, False)
+            blocked = np.triu(high, 1).any(axis=0) | high[held != 0].any(axis=0)
+            sizes[blocked & increasing] = 0.0
+
+        return sizes
@@ -0,0 +1,359 @@
+import os
+import time
+import zlib
+import pickle
+import socket
+import struct
+import logging
+import tempfile
+import threading
+import multiprocessing
+import numpy as np
+from typing import Callable, Dict, List, Optional
+from modules.models import CandleBlock, Signal
+
+try:
+    import msgpack
+except ImportError:  # pickle بين عمليات محلية موثوقة فقط
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# إطار الرسالة: طول الحمولة ثم الحمولة
+FRAME_HEADER = struct.Struct('<I')
+
+
+def pack(message) -> bytes:
+    """ترميز رسالة بـ msgpack إن وُجد، وإلا pickle"""
+    if msgpack is not None:
+        return msgpack.packb(message, use_bin_type=True, default=str)
+    return pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def unpack(data: bytes):
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    return pickle.loads(data)
+
+
+class Channel:
+    """رسائل بأطوال مسبقة فوق مقبس Unix"""
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._reader = sock.makefile('rb')
+
+    def send(self, message):
+        payload = pack(message)
+        self.sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+    def recv(self):
+        """:return: الرسالة التالية، أو None عند إغلاق الطرف الآخر"""
+        header = self._reader.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return None
+        size, = FRAME_HEADER.unpack(header)
+        payload = self._reader.read(size)
+        if len(payload) < size:
+            return None
+        return unpack(payload)
+
+    def close(self):
+        self._reader.close()
+        self.sock.close()
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    """تقسيم ثابت بين التشغيلات (بخلاف hash() العشوائي لكل عملية)"""
+    return zlib.crc32(symbol.encode()) % shards
+
+
+def shard_symbols(symbols: List[str], shards: int) -> List[List[str]]:
+    groups: List[List[str]] = [[] for _ in range(shards)]
+    for symbol in symbols:
+        groups[shard_of(symbol, shards)].append(symbol)
+    return groups
+
+
+class OrderRouter:
+    """
+    عملية المخاطر والأوامر الوحيدة التي تتحدث إليها العمليات العاملة
+
+    كل العمال يرسلون التحليلات إلى نفس TradingBot، فحالة المحفظة وحدود
+    السحب والتعرض واحدة. آخر حالة مؤشرات لكل رمز تُحفظ هنا أيضاً، فالعامل
+    الذي يُعاد تشغيله يستأنف من حيث توقف. إذا حمل bot نموذجاً لغوياً تُراجع
+    الإشارات هنا بآخر شموع يرسلها العامل، فالنموذج يُحمّل في عملية واحدة.
+    """
+    def __init__(self, bot, address: str):
+        """
+        :param bot: TradingBot الذي ينفذ الصفقات (مدير المخاطر والمنفذ)
+        :param address: مسار مقبس Unix
+        """
+        self.bot = bot
+        self.address = address
+        self.states: Dict[str, Dict] = {}
+        self.trades = 0
+        self.restored: Dict[int, int] = {}
+        # شموع المراجعة التي يرسلها العامل مع كل صفقة: نافذة الملخص والشمعة المتكونة
+        self.review_bars = bot.llm.window + 1 if getattr(bot, 'llm', None) is not None else 0
+        self._lock = threading.Lock()
+        self._server: Optional[socket.socket] = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.address)
+        os.chmod(self.address, 0o600)
+        self._server.listen()
+        thread = threading.Thread(target=self._accept, name='order-router', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return  # المقبس أُغلق
+            thread = threading.Thread(target=self._serve, args=(Channel(sock),), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _serve(self, channel: Channel):
+        try:
+            while True:
+                message = channel.recv()
+                if message is None:
+                    return
+                try:
+                    reply = self.handle(message)
+                except Exception as e:
+                    logger.error(f"فشل طلب {message.get('type')}: {e}", exc_info=True)
+                    reply = {'error': str(e)}
+                channel.send(reply)
+        except OSError:
+            pass  # العامل انهار أثناء الطلب
+        finally:
+            channel.close()
+
+    def handle(self, message: Dict) -> Dict:
+        kind = message['type']
+        if kind == 'trade':
+            symbol, analysis = message['symbol'], Signal.from_dict(message['analysis'])
+            if self.review_bars and message.get('candles'):
+                candles = {symbol: CandleBlock.from_rows(message['candles'])}
+                analysis = self.bot.llm.review({symbol: analysis}, candles)[symbol]
+            result = self.bot.execute_trade(symbol, analysis)
+            with self._lock:
+                self.trades += 1
+            return {'result': result}
+        if kind == 'state':
+            with self._lock:
+                self.states.update(message['states'])
+            return {}
+        if kind == 'restore':
+            with self._lock:
+                states = {s: self.states[s] for s in message['symbols'] if s in self.states}
+                shard = message.get('shard')
+                self.restored[shard] = self.restored.get(shard, 0) + len(states)
+            return {'states': states, 'review_bars': self.review_bars}
+        raise ValueError(f"نوع رسالة غير معروف: {kind}")
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+
+
+class RouterClient:
+    """طرف العامل: ينفذ الصفقات عبر عملية التوجيه ويحمل نفس اسم الدالة في المنفذ"""
+    def __init__(self, address: str, timeout: float = 10.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(address)
+                break
+            except OSError:
+                sock.close()
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        self.channel = Channel(sock)
+        self.exchange_id = 'router'
+
+    def call(self, message: Dict) -> Dict:
+        self.channel.send(message)
+        reply = self.channel.recv()
+        if reply is None:
+            raise ConnectionError("انقطع الاتصال بعملية التوجيه")
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+
+    def trade(self, symbol: str, analysis: Signal, candles: Optional[List] = None):
+        """:param candles: آخر الشموع التي حُللت، لمراجعة الموجه بالنموذج اللغوي"""
+        message = {'type': 'trade', 'symbol': symbol, 'analysis': analysis.to_dict()}
+        if candles is not None:
+            message['candles'] = candles
+        return self.call(message)['result']
+
+    def close(self):
+        self.channel.close()
+
+
+def export_state(bot, symbols: List[str]) -> Dict[str, Dict]:
+    """حالة المؤشرات ونافذة الاستراتيجية لكل رمز بصيغة قابلة للترميز"""
+    states = {}
+    for symbol in symbols:
+        indicators = bot.indicators.get(symbol)
+        if indicators is None:
+            continue
+        window = bot._windows.get(symbol)
+        strategy = bot._strategy_states.get(symbol)
+        states[symbol] = {
+            'indicators': indicators.snapshot(),
+            'window': None if window is None else window.tolist(),
+            'strategy': None if strategy is None else strategy.tolist()
+        }
+    return states
+
+
+def import_state(bot, states: Dict[str, Dict]):
+    from modules.indicators import IndicatorSet
+
+    for symbol, state in states.items():
+        bot.indicators[symbol] = IndicatorSet.restore(state['indicators'])
+        if state.get('window') is not None:
+            bot._windows[symbol] = np.asarray(state['window'], dtype=np.float64)
+        if state.get('strategy') is not None:
+            bot._strategy_states[symbol] = np.asarray(state['strategy'], dtype=np.float64)
+
+
+def default_worker_bot(symbols: List[str], router: RouterClient):
+    """TradingBot العامل: جلب وتحليل فقط، والأوامر تمر عبر عملية التوجيه"""
+    from main import TradingBot
+
+    return TradingBot(trader=router)
+
+
+def _worker_main(shard: int, symbols: List[str], address: str, factory: Callable,
+                 cycles: Optional[int], interval: float):
+    router = RouterClient(address)
+    bot = factory(symbols, router)
+    restored = router.call({'type': 'restore', 'shard': shard, 'symbols': symbols})
+    import_state(bot, restored['states'])
+    review_bars = restored.get('review_bars', 0)
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        started = time.monotonic()
+        for symbol in symbols:
+            try:
+                if review_bars:
+                    # الموجه يراجع الإشارة بالنموذج، فتُرسل معها آخر الشموع
+                    data = CandleBlock.from_rows(bot.fetch_candles(symbol))
+                    analysis = bot.analyze_market(symbol, data)
+                    router.trade(symbol, analysis, data[-review_bars:].tolist())
+                else:
+                    router.trade(symbol, bot.analyze_market(symbol))
+            except OSError:
+                raise  # الموجه غير متاح: الانهيار يعيد تشغيل العامل
+            except Exception as e:
+                logger.error(f"فشل معالجة {symbol} في الجزء {shard}: {e}", exc_info=True)
+        # الحالة تُرسل بعد كل دورة، فالانهيار لا يفقد إلا الدورة الجارية
+        router.call({'type': 'state', 'states': export_state(bot, symbols)})
+        cycle += 1
+        if cycles is None or cycle < cycles:
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    router.close()
+
+
+class ShardedRunner:
+    """
+    مشرف يوزع الرموز على عمليات عاملة، لكل منها GIL خاص بها
+
+    كل عامل يجلب ويحلل رموز جزئه فقط، والصفقات تمر إلى OrderRouter في
+    عملية المشرف عبر مقبس Unix. العامل الذي ينتهي برمز خطأ يُعاد تشغيله
+    مع حالة مؤشراته المحفوظة لدى الموجه.
+    """
+    def __init__(self,
+                 bot,
+                 symbols: List[str],
+                 workers: Optional[int] = None,
+                 address: Optional[str] = None,
+                 worker_factory: Callable = default_worker_bot,
+                 cycles: Optional[int] = None,
+                 interval: float = 60.0,
+                 max_restarts: int = 5,
+                 restart_delay: float = 1.0,
+                 start_method: str = 'spawn'):
+        """
+        :param bot: TradingBot عملية التوجيه (المخاطر والتنفيذ)
+        :param symbols: كل الرموز
+        :param workers: عدد العمليات العاملة (افتراضي: عدد الأنوية)
+        :param address: مسار مقبس Unix (افتراضي: في المجلد المؤقت)
+        :param worker_factory: دالة على مستوى الوحدة (symbols, router) -> TradingBot داخل العامل
+        :param cycles: دورات كل عامل، None للتشغيل المستمر
+        :param interval: الزمن بين بدايات الدورات بالثواني
+        :param max_restarts: حد إعادة تشغيل العامل الواحد
+        :param restart_delay: انتظار أولي قبل إعادة التشغيل، يتضاعف مع كل انهيار
+        :param start_method: طريقة multiprocessing، spawn آمنة مع خيوط الموجه
+        """
+        workers = min(workers or os.cpu_count() or 1, len(symbols)) or 1
+        self.shards = [s for s in shard_symbols(symbols, workers) if s]
+        self.address = address or os.path.join(tempfile.gettempdir(), f'trading_bot-{os.getpid()}.sock')
+        self.router = OrderRouter(bot, self.address)
+        self.worker_factory = worker_factory
+        self.cycles = cycles
+        self.interval = interval
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        self.restarts: Dict[int, int] = {}
+        self._context = multiprocessing.get_context(start_method)
+        self._processes: Dict[int, multiprocessing.Process] = {}
+
+    def _start(self, shard: int):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(shard, self.shards[shard], self.address, self.worker_factory, self.cycles, self.interval),
+            name=f'shard-{shard}',
+            daemon=True
+        )
+        process.start()
+        self._processes[shard] = process
+
+    def run(self, poll_interval: float = 0.2):
+        """تشغيل العمال ومراقبتهم حتى ينتهوا جميعاً"""
+        self.router.start()
+        try:
+            for shard in range(len(self.shards)):
+                self._start(shard)
+            while self._processes:
+                for shard, process in list(self._processes.items()):
+                    if process.is_alive():
+                        continue
+                    del self._processes[shard]
+                    if process.exitcode == 0:
+                        continue
+                    restarts = self.restarts.get(shard, 0)
+                    if restarts >= self.max_restarts:
+                        logger.error(f"الجزء {shard} انهار {restarts + 1} مرات، إيقافه: {self.shards[shard]}")
+                        continue
+                    logger.warning(f"الجزء {shard} انتهى برمز {process.exitcode}، إعادة التشغيل")
+                    self.restarts[shard] = restarts + 1
+                    time.sleep(min(self.restart_delay * 2 ** restarts, 60.0))
+                    self._start(shard)
+                time.sleep(poll_interval)
+        finally:
+            self.stop()
+
+    def stop(self):
+        for process in self._processes.values():
+            process.terminate()
+        for process in self._processes.values():
+            process.join()
+        self._processes.clear()
+        self.router.close()
@@ -1,8 +1,23 @@
 from config import Settings
 from modules import DataFetcher, AdvancedTrader
+from modules.indicators import IndicatorSet
+from modules.store import CandleStore
+from modules.markets import MarketCache
+from modules.scanner import MarketScanner
+from modules.market_feed import MarketDataFeed
+from modules.venues import VenueAggregator
+from modules.journal import TradeJournal
+from modules.recorder import Recorder
+from modules.strategy import Strategy, TRENDS, stack_windows
+from modules.models import CandleBlock, Signal, OrderRequest, Fill
 from core.risk_management.manager import RiskManager
+from core.llm_signals import LLMSignalPipeline, SYSTEM_PROMPT
+from core.metrics import metrics
+import asyncio
+import numpy as np
 import logging
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional, Tuple
 
 # إعداد التسجيل
 logging.basicConfig(
@@ -12,85 +27,491 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class TradingBot:
-    def __init__(self):
-        """تهيئة مكونات البوت"""
-        self.data_fetcher = DataFetcher()
-        self.trader = AdvancedTrader(
-            Settings.BINANCE_API_KEY,
-            Settings.BINANCE_SECRET
+    def __init__(self,
+                 data_fetcher: Optional[DataFetcher] = None,
+                 trader: Optional[AdvancedTrader] = None,
+                 risk_manager: Optional[RiskManager] = None,
+                 live_trading: Optional[bool] = None,
+                 stop_loss_pct: float = 2.0,
+                 indicator_params: Optional[Dict] = None,
+                 venues: Optional[Dict[str, AdvancedTrader]] = None,
+                 aggregator: Optional[VenueAggregator] = None,
+                 journal: Optional[TradeJournal] = None,
+                 strategy: Optional[Strategy] = None,
+                 recorder: Optional[Recorder] = None,
+                 llm: Optional[LLMSignalPipeline] = None):
+        """
+        تهيئة مكونات البوت
+
+        :param data_fetcher: مصدر الشموع (افتراضي: DataFetcher مع المخزن المحلي)
+        :param trader: منفذ الأوامر (افتراضي: AdvancedTrader، أو بورصة محاكاة في الاختبار الخلفي)
+        :param risk_manager: مدير المخاطر
+        :param live_trading: إرسال الأوامر فعلياً إلى المنفذ (افتراضي: Settings.LIVE_TRADING)
+        :param stop_loss_pct: نسبة وقف الخسارة المستخدمة في حساب حجم المركز
+        :param indicator_params: معاملات IndicatorSet (نوافذ المؤشرات)
+        :param venues: منفذ لكل بورصة {exchange_id: trader} (افتراضي: من Settings.EXCHANGES)
+        :param aggregator: دفتر الأسعار الموحد لتوجيه الأوامر (افتراضي: عند وجود أكثر من بورصة)
+        :param journal: سجل الأوامر والتعبئات والإشارات (افتراضي: Settings.TRADE_JOURNAL مع المنفذ الحقيقي)
+        :param strategy: استراتيجية تحدد الاتجاه بدل قاعدة IndicatorSet.trend
+        :param recorder: مسجل بيانات السوق الواردة لإعادة تشغيلها لاحقاً (افتراضي: Settings.RECORD_DIR)
+        :param llm: مراجعة الإشارات بنموذج لغوي قبل التنفيذ (افتراضي: Settings.LLM_SIGNALS)
+        """
+        # تسجيل كل ما يصل من البورصة (شموع REST والبث والأسعار) لإعادة إنتاج السلوك
+        if recorder is None and trader is None and Settings.RECORD_DIR:
+            recorder = Recorder(Settings.RECORD_DIR, codec=Settings.RECORD_CODEC)
+        self.recorder = recorder
+        # نسخة واحدة من بيانات الأسواق لكل العملاء بدل load_markets لكل عميل
+        markets = MarketCache.shared('binance', Settings.MARKETS_CACHE_DIR, ttl=Settings.MARKETS_TTL)
+        self.data_fetcher = data_fetcher or DataFetcher(
+            store=CandleStore(Settings.CANDLE_STORE_DIR),
+            refresh_interval=Settings.CANDLE_REFRESH_SECONDS,
+            markets=markets,
+            recorder=recorder
+        )
+        # الأسعار من البث المباشر بدل طلب REST لكل فحص سعر
+        self.feed = None
+        if trader is None and Settings.MARKET_FEED:
+            self.feed = MarketDataFeed(
+                Settings.SYMBOLS,
+                url=Settings.MARKET_FEED_URL,
+                kline_interval=Settings.TIMEFRAME,
+                store=self.data_fetcher.store,
+                recorder=recorder
+            )
+            self.feed.start()
+        # السجل يُكتب في خيط خلفي، فلا يضيف إلى مسار الأمر إلا إضافة إلى طابور
+        if journal is None and trader is None and Settings.TRADE_JOURNAL:
+            journal = TradeJournal(Settings.TRADE_JOURNAL, flush_interval=Settings.JOURNAL_FLUSH_SECONDS)
+        self.journal = journal
+        primary = Settings.EXCHANGES[0]
+        self.trader = trader or AdvancedTrader(
+            *Settings.credentials(primary),
+            feed=self.feed,
+            markets=MarketCache.shared(primary, Settings.MARKETS_CACHE_DIR, ttl=Settings.MARKETS_TTL),
+            exchange_id=primary,
+            journal=journal,
+            recorder=recorder
         )
-        self.risk_manager = RiskManager(
+        # منفذ لكل بورصة إضافية، والأمر يُرسل إلى صاحبة أفضل سعر
+        if venues is None:
+            venues = {getattr(self.trader, 'exchange_id', primary): self.trader}
+            if trader is None:
+                for exchange_id in Settings.EXCHANGES[1:]:
+                    venues[exchange_id] = AdvancedTrader(
+                        *Settings.credentials(exchange_id),
+                        markets=MarketCache.shared(exchange_id, Settings.MARKETS_CACHE_DIR, ttl=Settings.MARKETS_TTL),
+                        exchange_id=exchange_id,
+                        journal=journal,
+                        recorder=recorder
+                    )
+        self.venues = venues
+        if aggregator is None and len(venues) > 1:
+            aggregator = VenueAggregator.connect(
+                list(venues), Settings.MARKETS_CACHE_DIR, Settings.MARKETS_TTL,
+                max_age=Settings.VENUE_QUOTE_MAX_AGE
+            )
+        self.aggregator = aggregator
+        self.live_trading = Settings.LIVE_TRADING if live_trading is None else live_trading
+        self.risk_manager = risk_manager or RiskManager(
             max_drawdown=0.05,  # 5% سحب أقصى
             risk_per_trade=0.01  # 1% مخاطرة لكل صفقة
         )
+        self.stop_loss_pct = stop_loss_pct
+        # حالة المؤشرات المتزايدة لكل رمز
+        self.indicator_params = indicator_params or {}
+        self.indicators: Dict[str, IndicatorSet] = {}
+        # الاستراتيجية تعمل على آخر lookback شمعة لكل رمز، نفس الكائن المستخدم في التقييم الجماعي
+        self.strategy = strategy
+        self._windows: Dict[str, np.ndarray] = {}
+        # حالة الاستراتيجيات التي تعتمد على ما قبل النافذة (وقف متحرك مثلاً)
+        self._strategy_states: Dict[str, np.ndarray] = {}
+        # آخر اتجاه نُفذ لكل رمز، حتى لا تتكرر الصفقة نفسها في كل دورة
+        self.positions: Dict[str, str] = {}
+        # النموذج يُحمّل في خيط خلفي. ذاكرة KV لبادئة التعليمات تُحسب مرة واحدة وتخدم
+        # طلبات الرمز الواحد (مراجعة الموجه في التشغيل الموزع)، ودفعات عدة رموز تُضاف لها البادئة نصاً
+        if llm is None and trader is None and Settings.LLM_SIGNALS:
+            from core.hf_integration import HFIntegration
+            llm = LLMSignalPipeline(
+                HFIntegration(
+                    Settings.HF_MODEL_NAME,
+                    Settings.HF_API_TOKEN,
+                    warmup=True,
+                    cpu_mode=Settings.HF_CPU_MODE,
+                    num_threads=Settings.HF_NUM_THREADS,
+                    system_prompt=SYSTEM_PROMPT
+                ),
+                min_confidence=Settings.LLM_MIN_CONFIDENCE,
+                generation_params={"max_new_tokens": Settings.LLM_MAX_NEW_TOKENS}
+            )
+        self.llm = llm
+        # الرموز تُنفذ بالتوازي، وقرارات المخاطر تُحسب على حالة محفظة واحدة
+        self._risk_lock = threading.Lock()
+
+    @metrics.timed('bot.analyze_market')
+    def analyze_market(self, symbol: str, data=None, signal: Optional[str] = None) -> Signal:
+        """
+        تحليل بيانات السوق
 
-    def analyze_market(self, symbol: str) -> Dict:
-        """تحليل بيانات السوق"""
-        data = self.data_fetcher.get_ohlcv(symbol)
-        if not data:
+        :param data: شموع جاهزة (CandleBlock من الماسح، أو صفوف ccxt)، وإلا تُجلب من DataFetcher
+        :param signal: اتجاه محسوب مسبقاً لكل الرموز دفعة واحدة (انظر signals)
+        """
+        if data is None:
+            data = self.fetch_candles(symbol)
+        # صفوف ccxt تتحول مرة واحدة هنا، والكتل تمر دون نسخ
+        candles = CandleBlock.from_rows(data if data is not None else [])
+        if not len(candles):
             raise ValueError(f"فشل جلب بيانات {symbol}")
         
-        # هنا يمكنك إضافة منطق التحليل الخاص بك
-        return {
-            'symbol': symbol,
-            'price': data[-1][4],  # آخر سعر إغلاق
-            'trend': 'up' if data[-1][4] > data[-2][4] else 'down'
-        }
-
-    def execute_trade(self, symbol: str, analysis: Dict):
+        # تحديث المؤشرات بالشموع الجديدة فقط بدل إعادة الحساب على كل النافذة
+        state = self.indicators.get(symbol)
+        if state is None:
+            state = self.indicators[symbol] = IndicatorSet(**self.indicator_params)
+        values = state.update(candles.data)
+        if signal is None:
+            signal = state.trend() if self.strategy is None else self._strategy_signal(symbol, candles.data)
+        return Signal(
+            symbol=symbol,
+            trend=signal,
+            price=float(candles.data[-1, 4]),  # آخر سعر إغلاق
+            rsi=values['rsi'],
+            macd_hist=values['macd_hist'],
+            atr=values['atr']
+        )
+
+    def fetch_candles(self, symbol: str):
+        """شموع التحليل من DataFetcher، بطول يكفي نافذة الاستراتيجية"""
+        limit = max(100, self.strategy.lookback) if self.strategy is not None else 100
+        return self.data_fetcher.get_ohlcv(symbol, limit=limit)
+
+    def _strategy_signal(self, symbol: str, data: np.ndarray) -> str:
+        """إشارة الاستراتيجية على آخر شمعة، مع نافذة متجددة تقبل شمعة واحدة في كل استدعاء"""
+        rows = np.asarray(data, dtype=np.float64)
+        window = self._windows.get(symbol)
+        if window is not None:
+            # الشمعة المتكونة بنفس وقت الفتح تستبدل المخزنة
+            rows = rows[rows[:, 0] >= window[-1, 0]]
+            if len(rows):
+                window = np.concatenate((window[window[:, 0] < rows[0, 0]], rows))
+        else:
+            window = rows
+        window = self._windows[symbol] = window[-self.strategy.lookback:]
+        return TRENDS[int(self.strategy.latest(window, self._strategy_state(symbol)))]
+
+    def _strategy_state(self, symbol: str) -> Optional[np.ndarray]:
+        state = self._strategy_states.get(symbol)
+        if state is None:
+            state = self.strategy.new_state()
+            if state is not None:
+                self._strategy_states[symbol] = state
+        return state
+
+    def signals(self, market_data: Dict[str, CandleBlock]) -> Dict[str, str]:
+        """
+        اتجاه كل الرموز في استدعاء واحد للاستراتيجية على كتلة (رموز × شموع)
+
+        :param market_data: {symbol: CandleBlock أو صفوف ccxt}
+        """
+        symbols = [s for s, rows in market_data.items() if len(rows)]
+        if self.strategy is None or not symbols:
+            return {}
+        block = stack_windows([market_data[s] for s in symbols], self.strategy.lookback)
+        states = [self._strategy_state(s) for s in symbols]
+        if states[0] is None:
+            return {s: TRENDS[int(v)] for s, v in zip(symbols, self.strategy.latest(block))}
+        rows = np.stack(states)
+        signals = self.strategy.latest(block, rows)
+        for state, row in zip(states, rows):
+            state[:] = row
+        return {s: TRENDS[int(v)] for s, v in zip(symbols, signals)}
+
+    @metrics.timed('bot.execute_trade')
+    def execute_trade(self, symbol: str, analysis: Signal):
         """تنفيذ صفقة مع إدارة المخاطر"""
         try:
-            # حساب حجم المركز الآمن
-            balance = self.trader.get_balance('USDT')
-            position_size = self.risk_manager.calculate_position_size(
-                portfolio_value=balance,
-                stop_loss_pct=2  # وقف خسارة 2%
-            )
-            
-            if self.risk_manager.validate_trade(0.03):  # 3% drawdown حالى
-                side = 'buy' if analysis['trend'] == 'up' else 'sell'
-                
-                logger.info(f"تنفيذ صفقة: {side} {symbol} بحجم {position_size:.6f}")
-                
-                # تنفيذ الصفقة الفعلية (إلغاء التعليق للاستخدام الحقيقي)
-                # order = self.trader.execute_order(
-                #     symbol=symbol,
-                #     side=side,
-                #     amount=float(position_size),
-                #     order_type='market'
-                # )
-                # return order
-                
-                # للإغراض التوضيحية فقط:
-                return {
-                    'status': 'simulated',
-                    'symbol': symbol,
-                    'side': side,
-                    'amount': float(position_size)
-                }
-            else:
-                logger.warning("تم تجاوز حد السحب الأقصى، لا توجد صفقات جديدة")
+            if self.journal is not None:
+                self.journal.record_signal(symbol, analysis.to_dict())
+            if analysis.hold:
+                # توصية النموذج بالانتظار لا تفتح مركزاً ولا تغلقه
+                logger.info(f"النموذج يوصي بالانتظار على {symbol}: {analysis.reason}")
+                return None
+            side = analysis.side
+            if side is None:
+                # إشارة الاستراتيجية مركز مستهدف: flat (بعد وقف متحرك مثلاً) تعني الخروج
+                if self.strategy is not None and symbol in self.positions:
+                    return self._close_position(symbol, analysis)
+                logger.info(f"لا يوجد اتجاه واضح على {symbol}")
                 return None
+
+            if self.positions.get(symbol) == side:
+                return None
+
+            with self._risk_lock:
+                # السحب يُتتبع من التعبئات الفعلية بدءاً من أول رصيد معروف
+                risk = self.risk_manager
+                self._sync_account(symbol)
+                risk.mark({symbol: analysis.price})
+
+                if not risk.validate_trade():
+                    logger.warning(f"تم تجاوز حد السحب الأقصى ({risk.drawdown:.2%})، لا توجد صفقات جديدة")
+                    return None
+
+                # حجم المركز بعملة التسعير بعد حدود التعرض، والأمر بالعملة الأساسية
+                position_size = risk.size_positions([symbol], [side], self.stop_loss_pct)[0]
+                if position_size <= 0:
+                    logger.info(f"حدود التعرض تمنع صفقة جديدة على {symbol}")
+                    return None
+                amount = float(position_size) / analysis.price
+                if self.live_trading:
+                    # الصفقات المتوازية تُحجَّم مقابل هذا الحجز حتى تُسجل التعبئة
+                    risk.reserve(symbol, side, amount)
+            logger.info(f"تنفيذ صفقة: {side} {symbol} بحجم {amount:.6f}")
+
+            if self.live_trading:
+                order = None
+                reference_price = analysis.price
+                reserved = amount
+                try:
+                    route = self._route(symbol, side, analysis.price, amount)
+                    if route is None:
+                        logger.warning(f"لا رصيد على أي بورصة لتنفيذ {side} {symbol}")
+                        return None
+                    trader, reference_price, amount = route
+                    request = OrderRequest(symbol, side, amount, 'market', reference_price=reference_price)
+                    # القاموس الخام من البورصة يبقى عند حدود الإدخال/الإخراج
+                    order = trader.execute_order(**request.params())
+                finally:
+                    self._record_fill(order, reference_price, reservation=(symbol, side, reserved))
+                # أمر ملغى أو مرفوض (filled=0) لا يفتح مركزاً
+                if order and (order.get('filled') or 0) > 0:
+                    self.positions[symbol] = side
+                return order
+
+            # للإغراض التوضيحية فقط:
+            self.positions[symbol] = side
+            return {
+                'status': 'simulated',
+                'symbol': symbol,
+                'side': side,
+                'amount': amount
+            }
                 
         except Exception as e:
             logger.error(f"خطأ في تنفيذ الصفقة: {e}", exc_info=True)
             raise
 
-def main():
+    def _close_position(self, symbol: str, analysis: Signal):
+        """إغلاق المركز المفتوح على الرمز بأمر معاكس بكميته المتتبعة"""
+        side = 'sell' if self.positions[symbol] == 'buy' else 'buy'
+        with self._risk_lock:
+            self._sync_account(symbol)
+            self.risk_manager.mark({symbol: analysis.price})
+            amount = abs(self.risk_manager.quantities.get(symbol, 0.0))
+        logger.info(f"إغلاق مركز {symbol}: {side} بحجم {amount:.6f}")
+
+        if not self.live_trading:
+            del self.positions[symbol]
+            return {'status': 'simulated', 'symbol': symbol, 'side': side, 'amount': amount}
+        if amount <= 0:
+            # لا كمية متتبعة (أُغلق المركز خارج البوت)
+            del self.positions[symbol]
+            return None
+
+        order = None
+        reference_price = analysis.price
+        try:
+            route = self._route(symbol, side, analysis.price, amount)
+            if route is None:
+                logger.warning(f"لا رصيد على أي بورصة لإغلاق {symbol}")
+                return None
+            trader, reference_price, amount = route
+            request = OrderRequest(symbol, side, amount, 'market', reference_price=reference_price)
+            order = trader.execute_order(**request.params())
+        finally:
+            self._record_fill(order, reference_price)
+        # تعبئة جزئية تبقي المركز، فتُغلق البقية مع إشارة flat التالية
+        if order and (order.get('filled') or 0) > 0 and not (order.get('remaining') or 0) > 0:
+            del self.positions[symbol]
+        return order
+
+    @staticmethod
+    def _available(trader, symbol: str, side: str, price: float) -> float:
+        """الكمية بالعملة الأساسية التي يغطيها رصيد حساب المنفذ الحر"""
+        account = getattr(trader, 'account', None)
+        if account is None:
+            return float('inf')  # منفذ بلا ذاكرة حساب (البورصة المحاكاة مثلاً)
+        base, quote = symbol.split('/')
+        if side == 'buy':
+            return account.get_balance(quote.split(':')[0], 'free') / price
+        return account.get_balance(base, 'free')
+
+    def _route(self, symbol: str, side: str, price: float, amount: float) -> Optional[Tuple]:
+        """
+        اختيار البورصة ذات أفضل سعر من بين البورصات التي يغطي رصيدها الأمر
+
+        الشراء يحتاج عملة التسعير والبيع يحتاج العملة الأساسية في حساب البورصة
+        نفسها، فإن لم تغطِ أي بورصة الكمية كاملة تُقلص إلى رصيد المختارة.
+
+        :return: (المنفذ، السعر المتوقع للتعبئة، الكمية)، أو None إن لم تملك أي بورصة رصيداً
+        """
+        available = {venue: self._available(trader, symbol, side, price) for venue, trader in self.venues.items()}
+        funded = [v for v, a in available.items() if a >= amount] or [v for v, a in available.items() if a > 0]
+        if not funded:
+            return None
+        venue = None
+        if self.aggregator is not None:
+            quote = self.aggregator.best_venue(symbol, side, funded)
+            if quote is not None:
+                venue, price, _ = quote
+                logger.info(f"توجيه {side} {symbol} إلى {venue} بسعر {price}")
+            else:
+                logger.warning(f"لا يوجد سعر حي لـ {symbol} على أي بورصة ممولة، التنفيذ بسعر الإشارة")
+        if venue is None:
+            primary = getattr(self.trader, 'exchange_id', None)
+            venue = primary if primary in funded else max(funded, key=available.get)
+        if available[venue] < amount:
+            logger.info(f"تقليص {side} {symbol} من {amount:.6f} إلى رصيد {venue} {available[venue]:.6f}")
+            amount = available[venue]
+        return self.venues[venue], price, amount
+
+    def _sync_account(self, symbol: str):
+        """
+        مزامنة مدير المخاطر مع ذاكرة الحساب بدل طلب رصيد لكل صفقة
+
+        الأرصدة تُجمع من حسابات كل البورصات لحدود المخاطر على مستوى المحفظة،
+        وكمية الأمر تُقلص بعدها إلى رصيد البورصة المنفذة في _route. ذاكرة
+        الحساب ترفع StaleAccountError إذا تجاوز عمرها الحد المسموح.
+        """
+        accounts = [a for a in (getattr(t, 'account', None) for t in self.venues.values()) if a is not None]
+        risk = self.risk_manager
+        if not accounts:
+            # منفذ بلا ذاكرة حساب (البورصة المحاكاة مثلاً): الرصيد الأول فقط ثم التعبئات
+            if risk.equity is None:
+                risk.reset(self.trader.get_balance('USDT'))
+            return
+        totals: Dict[str, float] = {}
+        for account in accounts:
+            for currency, total in account.totals().items():
+                totals[currency] = totals.get(currency, 0.0) + total
+        symbols = set(risk.quantities) | {symbol}
+        risk.sync(totals.get(accounts[0].quote_currency, 0.0),
+                  {s: totals.get(s.split('/')[0], 0.0) for s in symbols})
+
+    def _record_fill(self, order: Optional[Dict], price: float, reservation: Optional[Tuple] = None):
+        """
+        تمرير تعبئة الأمر إلى مدير المخاطر
+
+        :param reservation: (symbol, side, amount) المحجوز للأمر، يُحرر مع تسجيل
+                            التعبئة تحت نفس القفل فلا يغيب التعرض بينهما
+        """
+        # رسوم ccxt بعملة التسعير فقط تُخصم من النقد
+        fill = Fill.from_order(order, price, quote_currency='USDT') if order else None
+        with self._risk_lock:
+            if reservation is not None:
+                self.risk_manager.release(*reservation)
+            if fill is not None:
+                self.risk_manager.record_fill(fill.symbol, fill.side, fill.amount, fill.price, fill.fee)
+
+async def scan_and_trade(bot: TradingBot, scanner: MarketScanner, symbols: List[str]) -> Dict:
+    """مسح كل الرموز بالتوازي ثم التحليل والتنفيذ لكل رمز"""
+    scan = await scanner.scan(symbols, timeframe=Settings.TIMEFRAME)
+    if bot.aggregator is not None:
+        # طلب tickers واحد لكل بورصة لكل الرموز، والبورصات بالتوازي
+        await asyncio.to_thread(bot.aggregator.refresh, list(scan))
+
+    # الاستراتيجية تُقيَّم على كل الرموز دفعة واحدة
+    signals = bot.signals({symbol: market['ohlcv'] for symbol, market in scan.items()})
+
+    analyses = {}
+    for symbol, market in scan.items():
+        try:
+            analyses[symbol] = bot.analyze_market(symbol, market['ohlcv'], signal=signals.get(symbol))
+            logger.info(f"تحليل السوق: {analyses[symbol]}")
+        except Exception as e:
+            logger.error(f"فشل تحليل {symbol}: {e}", exc_info=True)
+
+    if bot.llm is not None and analyses:
+        # كل الرموز في دفعة توليد واحدة، والشموع المراجعة سابقاً من الذاكرة
+        analyses = await asyncio.to_thread(
+            bot.llm.review, analyses, {symbol: scan[symbol]['ohlcv'] for symbol in analyses})
+
+    async def trade(symbol: str, analysis: Signal):
+        try:
+            # execute_trade يستخدم عميل ccxt متزامن، فلا نحجز حلقة الأحداث، وإعادة محاولات رمز لا تؤخر البقية
+            return await asyncio.to_thread(bot.execute_trade, symbol, analysis)
+        except Exception as e:
+            logger.error(f"فشل معالجة {symbol}: {e}", exc_info=True)
+            return None
+
+    results = await asyncio.gather(*(trade(symbol, analysis) for symbol, analysis in analyses.items()))
+    trades = dict(zip(analyses, results))
+    return {symbol: trades.get(symbol) for symbol in scan}
+
+async def run(symbols: List[str]):
+    if Settings.METRICS_ENABLED:
+        metrics.enabled = True
+        metrics.start_http_server(Settings.METRICS_PORT)
+        metrics.start_reporter(Settings.METRICS_LOG_INTERVAL)
     bot = TradingBot()
-    
+    # محدد الطلبات وبيانات الأسواق مشتركة مع عملاء ExchangePool
+    scanner = MarketScanner(
+        store=bot.data_fetcher.store,
+        markets=bot.data_fetcher.markets
+    )
     try:
-        # تحليل السوق
-        analysis = bot.analyze_market('BTC/USDT')
-        logger.info(f"تحليل السوق: {analysis}")
-        
-        # تنفيذ الصفقة
-        trade_result = bot.execute_trade('BTC/USDT', analysis)
-        if trade_result:
-            logger.info(f"نتيجة الصفقة: {trade_result}")
+        results = await scan_and_trade(bot, scanner, symbols)
+        for symbol, trade_result in results.items():
+            if trade_result:
+                logger.info(f"نتيجة الصفقة: {trade_result}")
+            else:
+                logger.info(f"لم يتم تنفيذ أي صفقة على {symbol}")
+    finally:
+        await scanner.close()
+        if bot.feed is not None:
+            bot.feed.stop()
+        for trader in bot.venues.values():
+            executor = getattr(trader, 'executor', None)
+            if executor is not None:
+                executor.stop()
+        if bot.aggregator is not None:
+            bot.aggregator.close()
+        if bot.journal is not None:
+            bot.journal.close()
+        if bot.recorder is not None:
+            bot.recorder.close()
+        metrics.stop()
+
+def run_sharded(symbols: List[str]):
+    """الرموز موزعة على Settings.SHARD_WORKERS عملية، والأوامر من هذه العملية"""
+    from core.sharding import ShardedRunner
+
+    bot = TradingBot()
+    runner = ShardedRunner(
+        bot,
+        symbols,
+        workers=Settings.SHARD_WORKERS,
+        address=Settings.ROUTER_SOCKET,
+        interval=Settings.CANDLE_REFRESH_SECONDS
+    )
+    try:
+        runner.run()
+    finally:
+        for trader in bot.venues.values():
+            executor = getattr(trader, 'executor', None)
+            if executor is not None:
+                executor.stop()
+        if bot.aggregator is not None:
+            bot.aggregator.close()
+        if bot.journal is not None:
+            bot.journal.close()
+        if bot.recorder is not None:
+            bot.recorder.close()
+
+def main():
+    try:
+        if Settings.SHARD_WORKERS > 0:
+            run_sharded(Settings.SYMBOLS)
         else:
-            logger.info("لم يتم تنفيذ أي صفقة")
-            
+            asyncio.run(run(Settings.SYMBOLS))
     except Exception as e:
         logger.critical(f"فشل تشغيل البوت: {e}", exc_info=True)
 
@@ -1,5 +1,5 @@
 from .data import DataFetcher
-from .trade import AdvancedTrader
+from .advanced_trader import AdvancedTrader
 from .analysis import TechnicalAnalyzer
 
 __all__ = ['DataFetcher', 'AdvancedTrader', 'TechnicalAnalyzer']
\ No newline at end of file
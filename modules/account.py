@@ -0,0 +1,135 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StaleAccountError(RuntimeError):
+    """Account state is older than the allowed bound and could not be refreshed"""
+
+
+class AccountState:
+    def __init__(self,
+                 exchange,
+                 reconcile_interval: float = 60.0,
+                 max_staleness: float = 300.0,
+                 quote_currency: str = 'USDT'):
+        """
+        In-memory balances kept current from our own fills, the user-data
+        stream and periodic fetch_balance reconciliation
+
+        :param exchange: ccxt client used for reconciliation
+        :param reconcile_interval: Seconds after which a read triggers fetch_balance
+        :param max_staleness: Reads fail when the last exchange-confirmed state is older than this
+        :param quote_currency: Currency orders are paid in
+        """
+        self.exchange = exchange
+        self.reconcile_interval = reconcile_interval
+        self.max_staleness = max_staleness
+        self.quote_currency = quote_currency
+
+        self.balances: Dict[str, Dict[str, float]] = {}
+        self.synced_at: Optional[float] = None
+        self.version = 0
+        # Cumulative (filled, cost, fee) already applied per recent order
+        self._applied: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._max_orders = 10000
+        self._lock = threading.RLock()
+
+    @property
+    def age(self) -> float:
+        return float('inf') if self.synced_at is None else time.monotonic() - self.synced_at
+
+    def reconcile(self):
+        """Replace the local balances with the exchange's"""
+        balance = self.exchange.fetch_balance()
+        with self._lock:
+            self.balances = {
+                currency: {'free': float(balance['free'].get(currency) or 0),
+                           'used': float(balance['used'].get(currency) or 0),
+                           'total': float(total or 0)}
+                for currency, total in balance['total'].items()
+            }
+            self.synced_at = time.monotonic()
+            self.version += 1
+
+    def ensure_fresh(self):
+        """
+        Reconcile if the state is older than reconcile_interval
+
+        :raises StaleAccountError: If reconciliation failed and the state is older than max_staleness
+        """
+        with self._lock:
+            if self.age < self.reconcile_interval:
+                return
+            try:
+                self.reconcile()
+            except Exception as e:
+                if self.age > self.max_staleness:
+                    raise StaleAccountError(f"Account state is {self.age:.0f}s old: {e}") from e
+                logger.warning(f"Balance reconciliation failed, using {self.age:.0f}s old state: {e}")
+
+    def get_balance(self, currency: str = 'USDT', field: str = 'total') -> float:
+        """Balance from memory, reconciled first when due"""
+        self.ensure_fresh()
+        with self._lock:
+            return self.balances.get(currency, {}).get(field, 0.0)
+
+    def totals(self) -> Dict[str, float]:
+        """Total per currency, reconciled first when due"""
+        self.ensure_fresh()
+        with self._lock:
+            return {currency: b['total'] for currency, b in self.balances.items() if b['total']}
+
+    def positions(self) -> Dict[str, float]:
+        """Non-zero spot holdings other than the quote currency"""
+        return {c: total for c, total in self.totals().items() if c != self.quote_currency}
+
+    def _adjust(self, currency: str, delta: float):
+        entry = self.balances.setdefault(currency, {'free': 0.0, 'used': 0.0, 'total': 0.0})
+        entry['free'] += delta
+        entry['total'] += delta
+
+    def on_order_update(self, order: Dict):
+        """
+        Apply the fill progress of one of our orders (OrderExecutor fill callback)
+
+        Orders report cumulative fills, so only the part not yet applied is booked.
+        """
+        key = order.get('clientOrderId') or order.get('id')
+        filled = float(order.get('filled') or 0)
+        cost = float(order.get('cost') or filled * float(order.get('average') or order.get('price') or 0))
+        base, quote = order['symbol'].split('/')
+        fee = order.get('fee') if isinstance(order.get('fee'), dict) else {}
+        fee_cost = float(fee.get('cost') or 0)
+        with self._lock:
+            prev_filled, prev_cost, prev_fee = self._applied.get(key, (0.0, 0.0, 0.0))
+            if filled <= prev_filled:
+                return
+            direction = 1.0 if order['side'] == 'buy' else -1.0
+            self._adjust(base, direction * (filled - prev_filled))
+            self._adjust(quote, -direction * (cost - prev_cost))
+            if fee_cost > prev_fee and fee.get('currency'):
+                self._adjust(fee['currency'], -(fee_cost - prev_fee))
+            self._applied[key] = (filled, cost, fee_cost)
+            self._applied.move_to_end(key)
+            while len(self._applied) > self._max_orders:
+                self._applied.popitem(last=False)
+            self.version += 1
+
+    def handle_account_update(self, event: Dict):
+        """Apply a Binance user-data `outboundAccountPosition` or `balanceUpdate` event"""
+        with self._lock:
+            if event.get('e') == 'outboundAccountPosition':
+                for asset in event.get('B', []):
+                    free, locked = float(asset['f']), float(asset['l'])
+                    self.balances[asset['a']] = {'free': free, 'used': locked, 'total': free + locked}
+                # The stream is authoritative, so it counts as a reconciliation
+                self.synced_at = time.monotonic()
+                self.version += 1
+            elif event.get('e') == 'balanceUpdate':
+                self._adjust(event['a'], float(event['d']))
+                self.version += 1
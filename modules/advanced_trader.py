@@ -1,30 +1,58 @@
-from ccxt import binance
-import time
 import logging
-from typing import Optional, Dict, Union
+from concurrent.futures import Future
+from typing import Optional, Dict, List, Union
+from .market_feed import MarketDataFeed
+from .markets import MarketCache
+from .exchange_pool import ExchangePool
+from .execution import OrderExecutor
+from .account import AccountState, StaleAccountError
+from .journal import TradeJournal
+from .recorder import Recorder
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 class AdvancedTrader:
-    def __init__(self, api_key: str, secret: str):
+    def __init__(self,
+                 api_key: str,
+                 secret: str,
+                 feed: Optional[MarketDataFeed] = None,
+                 markets: Optional[MarketCache] = None,
+                 account: Optional[AccountState] = None,
+                 exchange_id: str = 'binance',
+                 journal: Optional[TradeJournal] = None,
+                 recorder: Optional[Recorder] = None):
         """
         Initialize trading bot with API credentials
         
-        :param api_key: Binance API key
-        :param secret: Binance API secret
-        """
-        self.exchange = binance({
-            'apiKey': api_key,
-            'secret': secret,
-            'enableRateLimit': True,
-            'options': {
-                'adjustForTimeDifference': True
-            }
-        })
-        logging.basicConfig(
-            filename='trading_log.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
+        :param api_key: Exchange API key
+        :param secret: Exchange API secret
+        :param feed: Optional streaming feed used for prices before REST
+        :param markets: Market metadata cache used to validate orders locally
+        :param account: Balance cache, updated from this trader's fills
+        :param exchange_id: ccxt exchange id of the venue (e.g. 'binance', 'bybit')
+        :param journal: Trade journal receiving this trader's orders and fills
+        :param recorder: Records the REST tickers behind get_current_price
+        """
+        self.exchange_id = exchange_id
+        self.feed = feed
+        self.exchange = ExchangePool.shared().get(
+            exchange_id, api_key, secret,
+            options={'adjustForTimeDifference': True}
         )
+        self.markets = markets if markets is not None else MarketCache.shared(exchange_id)
+        self.markets.attach(self.exchange, fetch=False)
+        # Retries back off on the executor loop, not in the caller's thread
+        self.executor = OrderExecutor(self.exchange)
+        self.account = account if account is not None else AccountState(self.exchange)
+        self.executor.fill_callbacks.append(self.account.on_order_update)
+        # Logging is configured by the application; orders and fills go to the journal
+        self.journal = journal
+        self.recorder = recorder
+        if journal is not None:
+            self.executor.order_callbacks.append(lambda order: journal.on_order_update(order, exchange_id))
 
+    @metrics.timed('trader.execute_order')
     def execute_order(self, 
                     symbol: str, 
                     side: str, 
@@ -32,7 +60,8 @@ class AdvancedTrader:
                     order_type: str = 'market',
                     price: Optional[float] = None,
                     max_retries: int = 3,
-                    max_amount: float = 1000) -> Optional[Dict]:
+                    max_amount: float = 1000,
+                    reference_price: Optional[float] = None) -> Optional[Dict]:
         """
         Execute trading order with advanced error handling
         
@@ -43,46 +72,52 @@ class AdvancedTrader:
         :param price: Required for limit orders
         :param max_retries: Maximum retry attempts
         :param max_amount: Maximum allowed order amount
+        :param reference_price: Expected price for the min notional check of market orders
         :return: Order details or None if failed
         """
         # Validate inputs
         if amount > max_amount:
-            logging.error(f"Amount {amount} exceeds maximum allowed {max_amount}")
+            logger.error(f"Amount {amount} exceeds maximum allowed {max_amount}")
             raise ValueError("Order amount exceeds limit")
 
         if order_type == 'limit' and price is None:
             raise ValueError("Price must be specified for limit orders")
 
-        for attempt in range(max_retries):
-            try:
-                order_params = {
-                    'symbol': symbol,
-                    'type': order_type,
-                    'side': side,
-                    'amount': amount
-                }
-                
-                if order_type == 'limit':
-                    order_params['price'] = price
-                
-                order = self.exchange.create_order(**order_params)
-                logging.info(f"Order executed: {order}")
-                return order
-
-            except ccxt.NetworkError as e:
-                wait_time = 2 ** (attempt + 1)  # Exponential backoff
-                logging.warning(f"Network error (attempt {attempt + 1}): {e} - Retrying in {wait_time}s")
-                time.sleep(wait_time)
-                
-            except ccxt.ExchangeError as e:
-                logging.error(f"Exchange error: {e}")
-                break
-                
-            except Exception as e:
-                logging.error(f"Unexpected error: {e}")
-                break
-                
-        return None
+        # Round to the market precision and reject what the exchange would reject
+        if reference_price is None and order_type == 'market' and self.feed is not None:
+            reference_price = self.feed.get_price(symbol)
+        amount, price = self.markets.prepare_order(self.exchange, symbol, amount, price, reference_price)
+
+        # Blocks this caller only; other symbols keep submitting while this one backs off
+        return self.executor.execute(symbol, side, amount, order_type, price, max_retries=max_retries)
+
+    def submit_order(self,
+                     symbol: str,
+                     side: str,
+                     amount: float,
+                     order_type: str = 'market',
+                     price: Optional[float] = None,
+                     client_order_id: Optional[str] = None) -> Future:
+        """
+        Validate and queue an order without waiting for it
+
+        :param client_order_id: Idempotency key, resubmitting it returns the first order
+        :return: Future resolved with the order details or None if failed
+        """
+        if order_type == 'limit' and price is None:
+            raise ValueError("Price must be specified for limit orders")
+        reference_price = self.feed.get_price(symbol) if self.feed is not None else None
+        amount, price = self.markets.prepare_order(self.exchange, symbol, amount, price, reference_price)
+        return self.executor.submit(symbol, side, amount, order_type, price, client_order_id)
+
+    def cancel_all_orders(self, symbols: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Cancel open orders of several symbols concurrently
+
+        :param symbols: Trading pairs, all symbols with tracked open orders by default
+        :return: {symbol: True if canceled}
+        """
+        return self.executor.cancel_all(symbols).result()
 
     def get_balance(self, currency: str = 'USDT') -> float:
         """
@@ -90,12 +125,16 @@ class AdvancedTrader:
         
         :param currency: Currency symbol (e.g. 'BTC')
         :return: Available balance
+        :raises StaleAccountError: If the cached state is too old and could not be reconciled
         """
         try:
-            balance = self.exchange.fetch_balance()
-            return float(balance['total'].get(currency, 0))
+            # From memory; fetch_balance only when the cached state is due for reconciliation
+            return self.account.get_balance(currency)
+        except StaleAccountError:
+            # A zero balance would size trades as if the account were empty
+            raise
         except Exception as e:
-            logging.error(f"Balance check failed: {e}")
+            logger.error(f"Balance check failed: {e}")
             return 0.0
 
     def get_current_price(self, symbol: str) -> Optional[float]:
@@ -105,11 +144,20 @@ class AdvancedTrader:
         :param symbol: Trading pair
         :return: Current price or None if failed
         """
+        if self.feed is not None:
+            price = self.feed.get_price(symbol)
+            if price is not None:
+                return price
+
         try:
             ticker = self.exchange.fetch_ticker(symbol)
+            if self.recorder is not None:
+                self.recorder.record('ticker', {'symbol': symbol, 'last': ticker.get('last'),
+                                                'bid': ticker.get('bid'), 'ask': ticker.get('ask'),
+                                                'timestamp': ticker.get('timestamp')})
             return float(ticker['last'])
         except Exception as e:
-            logging.error(f"Price check failed: {e}")
+            logger.error(f"Price check failed: {e}")
             return None
 
     def cancel_order(self, order_id: str, symbol: str) -> bool:
@@ -122,10 +170,10 @@ class AdvancedTrader:
         """
         try:
             result = self.exchange.cancel_order(order_id, symbol)
-            logging.info(f"Order canceled: {order_id}")
+            logger.info(f"Order canceled: {order_id}")
             return True
         except Exception as e:
-            logging.error(f"Cancel order failed: {e}")
+            logger.error(f"Cancel order failed: {e}")
             return False
 
     def get_order_status(self, order_id: str, symbol: str) -> Optional[Dict]:
@@ -139,7 +187,7 @@ class AdvancedTrader:
         try:
             return self.exchange.fetch_order(order_id, symbol)
         except Exception as e:
-            logging.error(f"Order status check failed: {e}")
+            logger.error(f"Order status check failed: {e}")
             return None
 
     def calculate_risk_amount(self, 
@@ -1,12 +1,212 @@
+import numpy as np
 import pandas as pd
+from typing import Dict
 
 def calculate_rsi(prices, window=14):
     delta = prices.diff()
     gain = delta.where(delta > 0, 0)
     loss = -delta.where(delta < 0, 0)
-    
+
     avg_gain = gain.rolling(window).mean()
     avg_loss = loss.rolling(window).mean()
-    
+
     rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
\ No newline at end of file
+    return 100 - (100 / (1 + rs))
+
+
+# All kernels below take (symbols, bars) arrays and work along the last axis.
+# Recursive filters run block-wise over bars with one matmul across all symbols.
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average, NaN for the first window - 1 bars"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < window:
+        return out
+    csum = np.cumsum(x, axis=-1)
+    out[..., window - 1] = csum[..., window - 1]
+    out[..., window:] = csum[..., window:] - csum[..., :-window]
+    out[..., window - 1:] /= window
+    return out
+
+def _recursive(x: np.ndarray, alpha: float, start: int, seed: np.ndarray, block: int = 64) -> np.ndarray:
+    """
+    y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded with `seed` at bar `start`
+
+    The recursion is unrolled over blocks of bars: inside a block every
+    output is a decayed sum of the block inputs plus the decayed carry,
+    i.e. one (block x block) @ (block x symbols) matrix product.
+    """
+    n = x.shape[-1]
+    lead = x.shape[:-1]
+    if int(np.prod(lead)) < SCAN_MAX_SERIES:
+        return _recursive_scan(x, alpha, start, seed)
+    out = np.full((n, int(np.prod(lead))), np.nan)
+    if start < n:
+        xt = np.moveaxis(x, -1, 0).reshape(n, -1)
+        decay = 1.0 - alpha
+        steps = np.arange(block)
+        lag = np.clip(steps[:, None] - steps[None, :], 0, None)
+        kernel = np.tril(alpha * decay ** lag)
+        carry = decay ** (steps + 1)
+
+        prev = np.broadcast_to(np.asarray(seed, dtype=np.float64), lead).reshape(-1)
+        out[start] = prev
+        for b0 in range(start + 1, n, block):
+            m = min(block, n - b0)
+            out[b0:b0 + m] = kernel[:m, :m] @ xt[b0:b0 + m] + carry[:m, None] * prev
+            prev = out[b0 + m - 1]
+    return np.moveaxis(out.reshape((n,) + lead), 0, -1)
+
+# Below this many series the matmul is mostly overhead and a prefix sum is faster
+SCAN_MAX_SERIES = 64
+
+def _recursive_scan(x: np.ndarray, alpha: float, start: int, seed: np.ndarray,
+                    max_scale: float = 1e12) -> np.ndarray:
+    """
+    Same recursion as _recursive via cumulative sums
+
+    Inside a chunk y[t] = decay**t * (carry + alpha * cumsum(x[k] / decay**k)).
+    Chunks are cut where decay**-k would exceed max_scale, which keeps the
+    rounding error at the float64 level.
+    """
+    n = x.shape[-1]
+    lead = x.shape[:-1]
+    out = np.full(x.shape, np.nan)
+    if start < n:
+        decay = 1.0 - alpha
+        chunk = int(np.log(max_scale) / -np.log(decay)) if 0 < decay < 1 else n
+        chunk = max(1, min(chunk, n))
+        steps = np.arange(1, chunk + 1)
+        grow = decay ** -steps
+        shrink = decay ** steps
+        prev = np.broadcast_to(np.asarray(seed, dtype=np.float64), lead)
+        out[..., start] = prev
+        for b0 in range(start + 1, n, chunk):
+            m = min(chunk, n - b0)
+            acc = np.cumsum(x[..., b0:b0 + m] * grow[:m], axis=-1)
+            out[..., b0:b0 + m] = shrink[:m] * (prev[..., None] + alpha * acc)
+            prev = out[..., b0 + m - 1]
+    return out
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average (pandas ewm(span, adjust=False))"""
+    return _recursive(x, 2.0 / (span + 1), 0, x[..., 0])
+
+def wilder(x: np.ndarray, window: int) -> np.ndarray:
+    """Wilder smoothing seeded with the SMA of the first `window` values"""
+    if x.shape[-1] < window:
+        return np.full(x.shape, np.nan)
+    return _recursive(x, 1.0 / window, window - 1, x[..., :window].mean(axis=-1))
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """RSI with Wilder smoothing"""
+    delta = np.diff(close, axis=-1)
+    gain = np.maximum(delta, 0)
+    # Gains and losses share one blocked recursion: half the per-block matmuls
+    avg_gain, avg_loss = wilder(np.stack((gain, gain - delta)), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, values)
+    out = np.full(close.shape, np.nan)
+    out[..., 1:] = values
+    return out
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Population rolling standard deviation from running sums"""
+    # Centering on the row mean keeps the squared running sums small
+    centered = x - x.mean(axis=-1, keepdims=True)
+    variance = sma(centered * centered, window) - sma(centered, window) ** 2
+    return np.sqrt(np.clip(variance, 0, None))
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.empty_like(close)
+    prev_close[..., 0] = close[..., 0]
+    prev_close[..., 1:] = close[..., :-1]
+    return np.maximum(high, prev_close) - np.minimum(low, prev_close)
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, window: int) -> np.ndarray:
+    """Rolling VWAP of the typical price over `window` bars"""
+    typical = (high + low + close) / 3.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return sma(typical * volume, window) / sma(volume, window)
+
+
+class TechnicalAnalyzer:
+    def __init__(self,
+                 rsi_window: int = 14,
+                 ema_fast: int = 12,
+                 ema_slow: int = 26,
+                 macd_signal: int = 9,
+                 sma_window: int = 20,
+                 bb_window: int = 20,
+                 bb_std: float = 2.0,
+                 atr_window: int = 14,
+                 vwap_window: int = 24):
+        """
+        Batch indicator engine over (symbols, bars) NumPy arrays
+
+        :param rsi_window: RSI period
+        :param ema_fast: Fast EMA span (also the MACD fast leg)
+        :param ema_slow: Slow EMA span (also the MACD slow leg)
+        :param macd_signal: MACD signal line span
+        :param sma_window: SMA period
+        :param bb_window: Bollinger band period
+        :param bb_std: Bollinger band width in standard deviations
+        :param atr_window: ATR period
+        :param vwap_window: Rolling VWAP period
+        """
+        self.rsi_window = rsi_window
+        self.ema_fast = ema_fast
+        self.ema_slow = ema_slow
+        self.macd_signal = macd_signal
+        self.sma_window = sma_window
+        self.bb_window = bb_window
+        self.bb_std = bb_std
+        self.atr_window = atr_window
+        self.vwap_window = vwap_window
+
+    def compute(self, ohlcv: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Compute all indicators in one pass
+
+        :param ohlcv: (bars, 6) or (symbols, bars, 6) array with columns
+            timestamp, open, high, low, close, volume
+        :return: Indicator name -> array shaped like ohlcv without its last axis
+        """
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        high, low, close, volume = (ohlcv[..., i] for i in (2, 3, 4, 5))
+
+        fast = ema(close, self.ema_fast)
+        slow = ema(close, self.ema_slow)
+        macd = fast - slow
+        macd_signal = ema(macd, self.macd_signal)
+
+        bb_mid = sma(close, self.bb_window)
+        bb_width = self.bb_std * rolling_std(close, self.bb_window)
+
+        return {
+            'rsi': rsi(close, self.rsi_window),
+            'sma': bb_mid if self.sma_window == self.bb_window else sma(close, self.sma_window),
+            'ema_fast': fast,
+            'ema_slow': slow,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd - macd_signal,
+            'bb_upper': bb_mid + bb_width,
+            'bb_middle': bb_mid,
+            'bb_lower': bb_mid - bb_width,
+            'atr': wilder(true_range(high, low, close), self.atr_window),
+            'vwap': vwap(high, low, close, volume, self.vwap_window),
+        }
+
+    @staticmethod
+    def trend(indicators: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Trend on the last bar: 'up' when the fast EMA is above the slow EMA
+        and MACD momentum agrees, 'down' when both point down, else 'flat'
+        """
+        up = (indicators['ema_fast'][..., -1] > indicators['ema_slow'][..., -1]) & \
+             (indicators['macd_hist'][..., -1] > 0)
+        down = (indicators['ema_fast'][..., -1] < indicators['ema_slow'][..., -1]) & \
+               (indicators['macd_hist'][..., -1] < 0)
+        return np.where(up, 'up', np.where(down, 'down', 'flat'))
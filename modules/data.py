@@ -1,17 +1,93 @@
+import time
 import ccxt
-from typing import List, Dict
+import numpy as np
+from typing import List, Optional
+from .store import CandleStore
+from .markets import MarketCache
+from .exchange_pool import ExchangePool
+from .recorder import Recorder
+from .models import CandleBlock
+from core.metrics import metrics
 
 class DataFetcher:
-    def __init__(self, exchange_id='binance'):
-        self.exchange = getattr(ccxt, exchange_id)({
-            'rateLimit': 1200,
-            'enableRateLimit': True
-        })
-
-    def get_ohlcv(self, symbol: str, timeframe='1h', limit=100) -> List[Dict]:
-        """Fetch OHLCV data with error handling"""
-        try:
-            return self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        except ccxt.BaseError as e:
-            print(f"Data fetch error: {e}")
-            return []
\ No newline at end of file
+    def __init__(self,
+                 exchange_id='binance',
+                 store: Optional[CandleStore] = None,
+                 refresh_interval: float = 60,
+                 markets: Optional[MarketCache] = None,
+                 recorder: Optional[Recorder] = None):
+        """
+        :param exchange_id: ccxt exchange id
+        :param store: Local candle store, read before hitting the exchange
+        :param refresh_interval: Seconds a stored series stays fresh before
+            its missing tail is fetched again
+        :param markets: Market metadata cache shared with the trading clients
+        :param recorder: Records every candle page received from the exchange
+        """
+        self.exchange_id = exchange_id
+        # Pooled client: one HTTP session and rate limiter shared with the traders
+        self.exchange = ExchangePool.shared().get(exchange_id)
+        self.store = store if store is not None else CandleStore()
+        self.refresh_interval = refresh_interval
+        # Markets from disk when fresh, so ccxt skips its own load_markets round-trip
+        self.markets = markets if markets is not None else MarketCache.shared(exchange_id)
+        self.markets.attach(self.exchange, fetch=False)
+        self.recorder = recorder
+
+    def _fetch_ohlcv(self, symbol: str, timeframe: str, **kwargs) -> List[List[float]]:
+        rows = self.exchange.fetch_ohlcv(symbol, timeframe, **kwargs)
+        if self.recorder is not None:
+            self.recorder.record('candle', {'symbol': symbol, 'timeframe': timeframe, 'rows': rows})
+        return rows
+
+    def sync(self, symbol: str, timeframe='1h', limit=100) -> int:
+        """
+        Fetch only the candles missing since the last stored timestamp
+
+        :return: Number of new candles stored
+        """
+        stored = self.store.read(self.exchange_id, symbol, timeframe)
+        if len(stored) < limit:
+            rows = self._fetch_ohlcv(symbol, timeframe, limit=limit)
+            return self.store.backfill(self.exchange_id, symbol, timeframe, rows)
+
+        added = 0
+        since = int(stored[-1, 0])
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        while True:
+            rows = self._fetch_ohlcv(symbol, timeframe, since=since)
+            added += self.store.write(self.exchange_id, symbol, timeframe, rows)
+            # The exchange caps each page; keep paging while it moves forward
+            if not rows or rows[-1][0] <= since or rows[-1][0] + tf_ms > self.exchange.milliseconds():
+                return added
+            since = rows[-1][0]
+
+    def is_fresh(self, symbol: str, timeframe='1h') -> bool:
+        """True if the stored series was synced within refresh_interval"""
+        synced_at = self.store.last_modified(self.exchange_id, symbol, timeframe)
+        return synced_at is not None and time.time() - synced_at < self.refresh_interval
+
+    def get_ohlcv_array(self, symbol: str, timeframe='1h', since: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the stored candles, synced first if stale"""
+        if not self.is_fresh(symbol, timeframe):
+            try:
+                self.sync(symbol, timeframe)
+            except ccxt.BaseError as e:
+                print(f"Data fetch error: {e}")
+        return self.store.read(self.exchange_id, symbol, timeframe, since=since)
+
+    @metrics.timed('data.get_ohlcv')
+    def get_ohlcv(self, symbol: str, timeframe='1h', limit=100) -> CandleBlock:
+        """
+        Last `limit` candles, synced first if stale
+
+        The tail is copied out of the memory map (limit rows, a few KB):
+        CandleStore.write rewrites the forming candle in place, which would
+        otherwise change a block the caller is still analysing.
+        """
+        if not self.is_fresh(symbol, timeframe):
+            try:
+                self.sync(symbol, timeframe, limit=limit)
+            except ccxt.BaseError as e:
+                print(f"Data fetch error: {e}")
+        return CandleBlock(np.array(self.store.read(self.exchange_id, symbol, timeframe)[-limit:]))
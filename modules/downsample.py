@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line series
+
+    Keeps the first and last points and, from each of n_out - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    point kept before it and the mean of the next bucket. Peaks and
+    troughs survive, unlike with plain striding.
+
+    :param x: Increasing x values (e.g. timestamps)
+    :param y: Values, same length as x
+    :param n_out: Number of points to keep
+    :return: Sorted indices of the kept points
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket b covers [edges[b], edges[b + 1]); the first and last points sit outside
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # Mean of every bucket from prefix sums; the last bucket's "next" is the final point
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.diff(edges)
+    next_x = np.append((cx[edges[2:]] - cx[edges[1:-1]]) / counts[1:], x[-1])
+    next_y = np.append((cy[edges[2:]] - cy[edges[1:-1]]) / counts[1:], y[-1])
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area, the constant factor does not change the argmax
+        area = np.abs((ax - next_x[b]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[b] - ay))
+        a = lo + int(area.argmax())
+        kept[b + 1] = a
+    return kept
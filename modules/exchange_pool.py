@@ -0,0 +1,188 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+import ccxt
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Thread-safe token bucket shared by every client of one exchange
+
+        :param rate: ccxt request cost refilled per second
+        :param capacity: Maximum burst, defaults to one second of rate
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens now without waiting
+
+        :return: Seconds the caller must wait before sending the request
+        """
+        cost = 1.0 if cost is None else cost
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Take the tokens now and sleep off the debt outside the lock
+            self.tokens -= cost
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += delay
+        return delay
+
+    def acquire(self, cost: float = 1.0) -> float:
+        """
+        Block until `cost` tokens are available and take them
+
+        :return: Seconds spent waiting
+        """
+        delay = self.reserve(cost)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class SharedExchange:
+    # Read-only calls whose concurrent duplicates share one request
+    COALESCED_PREFIXES = ('fetch_',)
+
+    def __init__(self, exchange, limiter: RateLimiter, max_samples: int = 10000):
+        """
+        Proxy around one ccxt client with a shared limiter, call coalescing and request stats
+
+        :param exchange: Sync ccxt client, its HTTP session is reused for every call
+        :param limiter: Rate limiter of the exchange, fed with ccxt endpoint costs
+        :param max_samples: Latency samples kept for percentiles
+        """
+        self.exchange = exchange
+        self.limiter = limiter
+        self.requests = 0
+        self.coalesced = 0
+        self.latencies: deque = deque(maxlen=max_samples)
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+        # ccxt passes each endpoint's weight to throttle(); route it to the shared bucket
+        exchange.enableRateLimit = True
+        exchange.throttle = limiter.acquire
+        self._fetch = exchange.fetch
+        exchange.fetch = self._timed_fetch
+
+    def _timed_fetch(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._fetch(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - start)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.exchange, name)
+        if callable(attr) and name.startswith(self.COALESCED_PREFIXES):
+            return lambda *args, **kwargs: self._coalesce(name, attr, args, kwargs)
+        return attr
+
+    def _coalesce(self, name: str, method, args, kwargs):
+        try:
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return method(*args, **kwargs)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = method(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Request count, coalesced calls, rate-limit waiting and latency percentiles"""
+        with self._lock:
+            latencies = np.fromiter(self.latencies, np.float64)
+            stats = {'requests': self.requests, 'coalesced': self.coalesced}
+        stats['throttled_seconds'] = round(self.limiter.waited, 3)
+        if latencies.size:
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            stats.update(p50_ms=round(float(p50), 2), p99_ms=round(float(p99), 2))
+        return stats
+
+
+class ExchangePool:
+    _shared: Optional['ExchangePool'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        """Registry of one client per exchange/account and one limiter per exchange"""
+        self.clients: Dict[Tuple[str, Optional[str]], SharedExchange] = {}
+        self.limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'ExchangePool':
+        """The process-wide pool"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def get(self,
+            exchange_id: str = 'binance',
+            api_key: Optional[str] = None,
+            secret: Optional[str] = None,
+            options: Optional[Dict] = None) -> SharedExchange:
+        """
+        Client for an exchange/account, created on first use
+
+        :param exchange_id: ccxt exchange id
+        :param api_key: Account key, None for public data
+        :param secret: Account secret
+        :param options: ccxt options applied when the client is created
+        """
+        key = (exchange_id, api_key or None)
+        with self._lock:
+            client = self.clients.get(key)
+            if client is None:
+                config = {'enableRateLimit': True, 'options': dict(options or {})}
+                if api_key:
+                    config.update(apiKey=api_key, secret=secret)
+                exchange = getattr(ccxt, exchange_id)(config)
+                # Weight limits are per IP, so all accounts of an exchange share one bucket
+                limiter = self.limiters.get(exchange_id)
+                if limiter is None:
+                    limiter = self.limiters[exchange_id] = RateLimiter(1000.0 / exchange.rateLimit)
+                client = self.clients[key] = SharedExchange(exchange, limiter)
+            elif options:
+                client.exchange.options.update(options)
+            return client
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {f"{exchange_id}:{'account' if api_key else 'public'}": client.stats()
+                for (exchange_id, api_key), client in self.clients.items()}
@@ -0,0 +1,296 @@
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+import ccxt
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('closed', 'canceled', 'expired', 'rejected')
+
+# Binance executionReport status -> ccxt unified status
+BINANCE_STATUSES = {
+    'NEW': 'open', 'PARTIALLY_FILLED': 'open', 'FILLED': 'closed', 'CANCELED': 'canceled',
+    'PENDING_CANCEL': 'open', 'REJECTED': 'rejected', 'EXPIRED': 'expired',
+}
+
+
+class OrderExecutor:
+    def __init__(self,
+                 exchange,
+                 max_retries: int = 3,
+                 backoff: float = 0.5,
+                 max_backoff: float = 8.0,
+                 poll_interval: float = 2.0,
+                 max_workers: int = 8,
+                 id_prefix: str = 'tb'):
+        """
+        Order pipeline on its own event loop: per-symbol queues, idempotent
+        client order ids, non-blocking retries and fill tracking
+
+        :param exchange: Sync ccxt client (calls run in a worker pool)
+        :param max_retries: Retries on network errors per order
+        :param backoff: First retry delay in seconds, doubled per attempt
+        :param max_backoff: Upper bound of the retry delay
+        :param poll_interval: Seconds between get_order_status polls of open orders
+        :param max_workers: Exchange calls in flight across all symbols
+        :param id_prefix: Prefix of generated client order ids
+        """
+        self.exchange = exchange
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.id_prefix = id_prefix
+
+        self.orders: Dict[str, Dict] = {}
+        self.fill_callbacks: List[Callable[[Dict], None]] = []
+        # Also called for new orders without fills, e.g. to journal every order state
+        self.order_callbacks: List[Callable[[Dict], None]] = []
+        self._pending: Dict[str, Future] = {}
+        self._symbol_locks: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- lifecycle ---
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> threading.Thread:
+        """Run the executor loop in a daemon thread"""
+        if self.running:
+            return self._thread
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='order')
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='order-executor', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0):
+        """Stop fill tracking and the loop; orders already sent stay on the exchange"""
+        if self.running:
+            asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self._loop).result(timeout)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._loop.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    @staticmethod
+    async def _cancel_tasks():
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _call(self, method: str, *args):
+        return self._loop.run_in_executor(self._pool, getattr(self.exchange, method), *args)
+
+    # --- submission ---
+
+    def new_client_order_id(self) -> str:
+        # Binance accepts up to 36 characters of [.A-Z:/a-z0-9_-]
+        return f"{self.id_prefix}-{uuid.uuid4().hex[:24]}"
+
+    def submit(self,
+               symbol: str,
+               side: str,
+               amount: float,
+               order_type: str = 'market',
+               price: Optional[float] = None,
+               client_order_id: Optional[str] = None,
+               params: Optional[Dict] = None,
+               max_retries: Optional[int] = None) -> Future:
+        """
+        Queue an order without blocking
+
+        Submitting the same client_order_id again returns the first submission.
+
+        :param max_retries: Overrides the executor's retry count for this order
+        :return: Future resolved with the ccxt order, or None if it failed
+        """
+        if not self.running:
+            self.start()
+        client_order_id = client_order_id or self.new_client_order_id()
+        with self._lock:
+            future = self._pending.get(client_order_id)
+            if future is None and client_order_id in self.orders:
+                future = Future()
+                future.set_result(self.orders[client_order_id])
+            elif future is None:
+                future = asyncio.run_coroutine_threadsafe(
+                    self._place(symbol, side, amount, order_type, price, client_order_id, params or {},
+                                max_retries if max_retries is not None else self.max_retries),
+                    self._loop)
+                self._pending[client_order_id] = future
+                future.add_done_callback(lambda _: self._forget(client_order_id))
+        return future
+
+    def _forget(self, client_order_id: str):
+        with self._lock:
+            self._pending.pop(client_order_id, None)
+
+    def execute(self, *args, timeout: Optional[float] = None, **kwargs) -> Optional[Dict]:
+        """Blocking submit(); waits for this order only"""
+        return self.submit(*args, **kwargs).result(timeout)
+
+    async def _place(self, symbol, side, amount, order_type, price, client_order_id, params,
+                     max_retries) -> Optional[Dict]:
+        lock = self._symbol_locks.setdefault(symbol, asyncio.Lock())
+        # Orders of one symbol keep their order; other symbols are not held up by its retries
+        async with lock:
+            order = await self._create_with_retry(symbol, side, amount, order_type, price,
+                                                 client_order_id, params, max_retries)
+        if order is not None:
+            order.setdefault('clientOrderId', client_order_id)
+            self._update(order)
+            if order.get('status') not in TERMINAL_STATUSES and order.get('id'):
+                asyncio.ensure_future(self._track(order['id'], symbol, client_order_id))
+        return order
+
+    async def _create_with_retry(self, symbol, side, amount, order_type, price, client_order_id, params,
+                                 max_retries):
+        request_params = {**params, 'clientOrderId': client_order_id}
+        for attempt in range(max_retries + 1):
+            try:
+                if attempt:
+                    # The timed-out request may have reached the exchange
+                    existing = await self._lookup(symbol, client_order_id)
+                    if existing is not None:
+                        return existing
+                order = await self._call('create_order', symbol, order_type, side, amount, price, request_params)
+                logger.info(f"Order executed: {order}")
+                return order
+
+            except ccxt.DuplicateOrderId:
+                return await self._lookup(symbol, client_order_id)
+
+            except ccxt.NetworkError as e:
+                if attempt == max_retries:
+                    logger.error(f"Order {client_order_id} failed after {attempt + 1} attempts: {e}")
+                    return None
+                delay = min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.8, 1.2)
+                logger.warning(f"Network error (attempt {attempt + 1}): {e} - Retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+            except ccxt.ExchangeError as e:
+                logger.error(f"Exchange error: {e}")
+                return None
+        return None
+
+    async def _lookup(self, symbol: str, client_order_id: str) -> Optional[Dict]:
+        try:
+            return await self._call('fetch_order', None, symbol, {'clientOrderId': client_order_id})
+        except ccxt.OrderNotFound:
+            return None
+
+    # --- fill tracking ---
+
+    def _update(self, order: Dict):
+        """Store the latest state of an order and notify on fill progress"""
+        key = order.get('clientOrderId') or order['id']
+        with self._lock:
+            previous = self.orders.get(key)
+            self.orders[key] = order
+        changed = (order.get('filled') or 0) > ((previous or {}).get('filled') or 0) or (
+            previous is not None and order.get('status') != previous.get('status'))
+        callbacks = self.fill_callbacks if changed else []
+        if changed or previous is None:
+            callbacks = callbacks + self.order_callbacks
+        for callback in callbacks:
+            try:
+                callback(order)
+            except Exception as e:
+                logger.error(f"Order callback failed: {e}", exc_info=True)
+
+    async def _track(self, order_id: str, symbol: str, client_order_id: str):
+        """Poll get_order_status until the order is done"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self.orders.get(client_order_id)
+            if current is not None and current.get('status') in TERMINAL_STATUSES:
+                return  # finished through the user-data stream
+            try:
+                order = await self._call('fetch_order', order_id, symbol)
+            except ccxt.NetworkError as e:
+                logger.warning(f"Order status poll failed for {order_id}: {e}")
+                continue
+            except ccxt.BaseError as e:
+                logger.error(f"Stopped tracking order {order_id}: {e}")
+                return
+            order.setdefault('clientOrderId', client_order_id)
+            self._update(order)
+            if order.get('status') in TERMINAL_STATUSES:
+                return
+
+    def handle_execution_report(self, event: Dict):
+        """Apply a Binance user-data `executionReport` event to the tracked orders"""
+        if event.get('e') != 'executionReport':
+            return
+        client_order_id = event.get('c')
+        # A cancel reports the canceled order's id in 'C'
+        if event.get('X') == 'CANCELED' and event.get('C'):
+            client_order_id = event['C']
+        with self._lock:
+            known = self.orders.get(client_order_id)
+        if known is None:
+            return
+        filled = float(event.get('z', 0))
+        cost = float(event.get('Z', 0))
+        self._update({
+            **known,
+            'status': BINANCE_STATUSES.get(event.get('X'), known.get('status')),
+            'filled': filled,
+            'remaining': max(float(event.get('q', known.get('amount') or 0)) - filled, 0.0),
+            'cost': cost,
+            'average': cost / filled if filled else known.get('average'),
+            'lastTradeTimestamp': event.get('T', int(time.time() * 1000)),
+        })
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            return [o for o in self.orders.values()
+                    if o.get('status') not in TERMINAL_STATUSES and (symbol is None or o['symbol'] == symbol)]
+
+    # --- cancellation ---
+
+    def cancel_all(self, symbols: Optional[Iterable[str]] = None) -> Future:
+        """
+        Cancel the tracked open orders of the given symbols (all by default) concurrently
+
+        :return: Future resolved with {symbol: True/False}
+        """
+        if not self.running:
+            self.start()
+        if symbols is None:
+            symbols = {o['symbol'] for o in self.open_orders()}
+        return asyncio.run_coroutine_threadsafe(self._cancel_all(list(symbols)), self._loop)
+
+    async def _cancel_symbol(self, symbol: str) -> bool:
+        try:
+            if self.exchange.has.get('cancelAllOrders'):
+                # One request per symbol instead of one per order
+                await self._call('cancel_all_orders', symbol)
+            else:
+                await asyncio.gather(*(self._call('cancel_order', o['id'], symbol)
+                                       for o in self.open_orders(symbol)))
+        except ccxt.BaseError as e:
+            logger.error(f"Cancel failed for {symbol}: {e}")
+            return False
+        for order in self.open_orders(symbol):
+            self._update({**order, 'status': 'canceled'})
+        return True
+
+    async def _cancel_all(self, symbols: List[str]) -> Dict[str, bool]:
+        results = await asyncio.gather(*(self._cancel_symbol(s) for s in symbols))
+        return dict(zip(symbols, results))
@@ -0,0 +1,347 @@
+import math
+from typing import Dict, Sequence, Tuple
+
+NAN = float('nan')
+
+
+class StreamingIndicator:
+    """
+    Base for O(1) per-candle indicators
+
+    update() consumes a new bar, revise() replaces the last consumed bar
+    (a candle that was still forming). State lives in __slots__ so
+    snapshot()/restore() are plain dict round-trips.
+    """
+    __slots__ = ('_saved',)
+
+    def _get_state(self) -> Tuple:
+        raise NotImplementedError
+
+    def _set_state(self, state: Tuple):
+        raise NotImplementedError
+
+    def _step(self, *values):
+        raise NotImplementedError
+
+    def update(self, *values):
+        """Consume a new bar and return the indicator value"""
+        self._saved = self._get_state()
+        return self._step(*values)
+
+    def revise(self, *values):
+        """Replace the last consumed bar and return the corrected value"""
+        if getattr(self, '_saved', None) is None:
+            return self.update(*values)
+        self._set_state(self._saved)
+        return self._step(*values)
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly copy of the full state"""
+        state = {'type': type(self).__name__}
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                value = getattr(self, slot, None)
+                if isinstance(value, StreamingIndicator):
+                    value = value.snapshot()
+                elif isinstance(value, list):
+                    value = list(value)
+                state[slot] = value
+        return state
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> 'StreamingIndicator':
+        """Rebuild an indicator from snapshot()"""
+        obj = cls.__new__(cls)
+        for key, value in snapshot.items():
+            if key == 'type':
+                continue
+            if isinstance(value, dict) and 'type' in value:
+                value = _TYPES[value['type']].restore(value)
+            elif isinstance(value, list) and key == '_saved':
+                value = tuple(value)
+            setattr(obj, key, value)
+        return obj
+
+
+class EMA(StreamingIndicator):
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, span: int):
+        """EMA seeded with the first value (pandas ewm(span, adjust=False))"""
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+        self._saved = None
+
+    def _get_state(self):
+        return (self.value,)
+
+    def _set_state(self, state):
+        self.value, = state
+
+    def _step(self, x: float) -> float:
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class Wilder(StreamingIndicator):
+    __slots__ = ('window', 'count', 'value')
+
+    def __init__(self, window: int):
+        """Wilder smoothing seeded with the mean of the first `window` values"""
+        self.window = window
+        self.count = 0
+        self.value = 0.0
+        self._saved = None
+
+    def _get_state(self):
+        return (self.count, self.value)
+
+    def _set_state(self, state):
+        self.count, self.value = state
+
+    def _step(self, x: float) -> float:
+        self.count += 1
+        if self.count <= self.window:
+            # Running mean until the seed window is full
+            self.value += (x - self.value) / self.count
+            return self.value if self.count == self.window else NAN
+        self.value += (x - self.value) / self.window
+        return self.value
+
+
+class RSI(StreamingIndicator):
+    __slots__ = ('prev_close', 'gain', 'loss', 'last_close')
+
+    def __init__(self, window: int = 14):
+        self.prev_close = None
+        self.last_close = None
+        self.gain = Wilder(window)
+        self.loss = Wilder(window)
+        self._saved = None
+
+    def _get_state(self):
+        return (self.prev_close, self.last_close, self.gain._get_state(), self.loss._get_state())
+
+    def _set_state(self, state):
+        self.prev_close, self.last_close, gain, loss = state
+        self.gain._set_state(tuple(gain))
+        self.loss._set_state(tuple(loss))
+
+    def _step(self, close: float) -> float:
+        self.prev_close, self.last_close = self.last_close, close
+        if self.prev_close is None:
+            return NAN
+        delta = close - self.prev_close
+        avg_gain = self.gain._step(max(delta, 0.0))
+        avg_loss = self.loss._step(max(-delta, 0.0))
+        if math.isnan(avg_gain):
+            return NAN
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else NAN
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class MACD(StreamingIndicator):
+    __slots__ = ('fast', 'slow', 'signal')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self._saved = None
+
+    def _get_state(self):
+        return (self.fast.value, self.slow.value, self.signal.value)
+
+    def _set_state(self, state):
+        self.fast.value, self.slow.value, self.signal.value = state
+
+    def _step(self, close: float) -> Tuple[float, float, float]:
+        """:return: (macd, signal, histogram)"""
+        macd = self.fast._step(close) - self.slow._step(close)
+        signal = self.signal._step(macd)
+        return macd, signal, macd - signal
+
+
+class ATR(StreamingIndicator):
+    __slots__ = ('prev_close', 'last_close', 'smoother')
+
+    def __init__(self, window: int = 14):
+        self.prev_close = None
+        self.last_close = None
+        self.smoother = Wilder(window)
+        self._saved = None
+
+    def _get_state(self):
+        return (self.prev_close, self.last_close, self.smoother._get_state())
+
+    def _set_state(self, state):
+        self.prev_close, self.last_close, smoother = state
+        self.smoother._set_state(tuple(smoother))
+
+    def _step(self, high: float, low: float, close: float) -> float:
+        self.prev_close = self.last_close
+        prev = close if self.prev_close is None else self.prev_close
+        self.last_close = close
+        return self.smoother._step(max(high, prev) - min(low, prev))
+
+
+class RollingStats(StreamingIndicator):
+    __slots__ = ('window', 'buffer', 'index', 'count', 'total', 'total_sq', 'since_resum')
+
+    def __init__(self, window: int = 20):
+        """Rolling mean and population std over a fixed ring buffer"""
+        self.window = window
+        self.buffer = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.since_resum = 0
+        self._saved = None
+
+    def _get_state(self):
+        # Only the slot about to be overwritten needs saving
+        return (self.index, self.count, self.total, self.total_sq,
+                self.since_resum, self.buffer[self.index])
+
+    def _set_state(self, state):
+        self.index, self.count, self.total, self.total_sq, self.since_resum, old = state
+        self.buffer[self.index] = old
+
+    def _step(self, x: float) -> Tuple[float, float]:
+        """:return: (mean, std), NaN until the window is full"""
+        old = self.buffer[self.index]
+        self.buffer[self.index] = x
+        self.index = (self.index + 1) % self.window
+        if self.count < self.window:
+            self.count += 1
+            old = 0.0
+        self.total += x - old
+        self.total_sq += x * x - old * old
+
+        # Re-sum once per window to stop floating point drift
+        self.since_resum += 1
+        if self.since_resum >= self.window:
+            self.since_resum = 0
+            values = self.buffer[:self.count]
+            self.total = math.fsum(values)
+            self.total_sq = math.fsum(v * v for v in values)
+
+        if self.count < self.window:
+            return NAN, NAN
+        mean = self.total / self.window
+        variance = max(self.total_sq / self.window - mean * mean, 0.0)
+        return mean, math.sqrt(variance)
+
+
+_TYPES = {cls.__name__: cls for cls in (EMA, Wilder, RSI, MACD, ATR, RollingStats)}
+
+
+class IndicatorSet:
+    __slots__ = ('rsi', 'macd', 'atr', 'bands', 'bb_std', 'last_timestamp', 'values')
+
+    def __init__(self,
+                 rsi_window: int = 14,
+                 ema_fast: int = 12,
+                 ema_slow: int = 26,
+                 macd_signal: int = 9,
+                 bb_window: int = 20,
+                 bb_std: float = 2.0,
+                 atr_window: int = 14):
+        """
+        Per-symbol streaming counterpart of TechnicalAnalyzer
+
+        Feed candles with update(); only bars newer than last_timestamp do
+        any work, and a repeated open time revises the forming candle.
+        """
+        self.rsi = RSI(rsi_window)
+        self.macd = MACD(ema_fast, ema_slow, macd_signal)
+        self.atr = ATR(atr_window)
+        self.bands = RollingStats(bb_window)
+        self.bb_std = bb_std
+        self.last_timestamp = None
+        self.values: Dict[str, float] = {}
+
+    def _apply(self, candle: Sequence[float], revise: bool):
+        _, _, high, low, close, _ = candle[:6]
+        method = 'revise' if revise else 'update'
+        rsi = getattr(self.rsi, method)(close)
+        macd, signal, hist = getattr(self.macd, method)(close)
+        atr = getattr(self.atr, method)(high, low, close)
+        mean, std = getattr(self.bands, method)(close)
+        self.values = {
+            'rsi': rsi,
+            'ema_fast': self.macd.fast.value,
+            'ema_slow': self.macd.slow.value,
+            'macd': macd,
+            'macd_signal': signal,
+            'macd_hist': hist,
+            'bb_upper': mean + self.bb_std * std,
+            'bb_middle': mean,
+            'bb_lower': mean - self.bb_std * std,
+            'atr': atr,
+        }
+
+    def update(self, candles: Sequence[Sequence[float]]) -> Dict[str, float]:
+        """
+        Consume the candles not seen yet
+
+        :param candles: ccxt style rows, (n, 6) array or CandleBlock in time order; older rows are skipped
+        :return: Indicator values on the latest bar
+        """
+        # Walk back only as far as the last consumed bar
+        start = len(candles)
+        if self.last_timestamp is not None:
+            while start > 0 and candles[start - 1][0] >= self.last_timestamp:
+                start -= 1
+        else:
+            start = 0
+
+        new = candles[start:]
+        if hasattr(new, 'tolist'):
+            # Python floats: the per-bar scalar math is much slower on NumPy scalars
+            new = new.tolist()
+        for candle in new:
+            timestamp = candle[0]
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self._apply(candle, revise=False)
+                self.last_timestamp = timestamp
+            else:
+                self._apply(candle, revise=True)
+        return self.values
+
+    def trend(self) -> str:
+        """Same rule as TechnicalAnalyzer.trend on the latest bar"""
+        fast, slow = self.values.get('ema_fast'), self.values.get('ema_slow')
+        hist = self.values.get('macd_hist', NAN)
+        if fast is None or slow is None:
+            return 'flat'
+        if fast > slow and hist > 0:
+            return 'up'
+        if fast < slow and hist < 0:
+            return 'down'
+        return 'flat'
+
+    def snapshot(self) -> Dict:
+        return {
+            'rsi': self.rsi.snapshot(),
+            'macd': self.macd.snapshot(),
+            'atr': self.atr.snapshot(),
+            'bands': self.bands.snapshot(),
+            'bb_std': self.bb_std,
+            'last_timestamp': self.last_timestamp,
+            'values': dict(self.values),
+        }
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> 'IndicatorSet':
+        obj = cls.__new__(cls)
+        obj.rsi = RSI.restore(snapshot['rsi'])
+        obj.macd = MACD.restore(snapshot['macd'])
+        obj.atr = ATR.restore(snapshot['atr'])
+        obj.bands = RollingStats.restore(snapshot['bands'])
+        obj.bb_std = snapshot['bb_std']
+        obj.last_timestamp = snapshot['last_timestamp']
+        obj.values = dict(snapshot['values'])
+        return obj
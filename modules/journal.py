@@ -0,0 +1,290 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    ts INTEGER NOT NULL, venue TEXT, symbol TEXT NOT NULL, side TEXT, type TEXT,
+    amount REAL, price REAL, filled REAL, status TEXT, order_id TEXT, client_order_id TEXT
+);
+CREATE TABLE IF NOT EXISTS fills (
+    ts INTEGER NOT NULL, venue TEXT, symbol TEXT NOT NULL, side TEXT NOT NULL,
+    amount REAL NOT NULL, price REAL NOT NULL, cost REAL NOT NULL,
+    fee REAL NOT NULL DEFAULT 0, fee_currency TEXT, order_id TEXT
+);
+CREATE TABLE IF NOT EXISTS signals (
+    ts INTEGER NOT NULL, symbol TEXT NOT NULL, action TEXT, price REAL, payload TEXT
+);
+CREATE INDEX IF NOT EXISTS orders_symbol_ts ON orders (symbol, ts);
+CREATE INDEX IF NOT EXISTS orders_ts ON orders (ts);
+CREATE INDEX IF NOT EXISTS orders_client_id ON orders (client_order_id);
+CREATE INDEX IF NOT EXISTS fills_symbol_ts ON fills (symbol, ts);
+CREATE INDEX IF NOT EXISTS fills_ts ON fills (ts);
+CREATE INDEX IF NOT EXISTS signals_symbol_ts ON signals (symbol, ts);
+"""
+
+INSERTS = {
+    'orders': "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'fills': "INSERT INTO fills VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'signals': "INSERT INTO signals VALUES (?, ?, ?, ?, ?)",
+}
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class TradeJournal:
+    def __init__(self,
+                 path: str = 'data/journal.db',
+                 flush_interval: float = 0.5,
+                 batch_size: int = 1000):
+        """
+        Append-only journal of orders, fills and signals in SQLite (WAL)
+
+        Callers only append a tuple to an in-memory queue; a writer thread
+        commits the queue in one transaction per batch, so the disk sync
+        cost is paid once per batch and never on the order path.
+
+        :param path: Database file
+        :param flush_interval: Seconds between batch commits
+        :param batch_size: Queued records that trigger an early commit
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.written = 0
+
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        # Cumulative (filled, cost, fee) already journaled per recent order
+        self._applied: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._max_orders = 10000
+        self._fill_lock = threading.Lock()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._reader = self._connect(check_same_thread=False)
+        self._reader.row_factory = sqlite3.Row
+        self._read_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='trade-journal', daemon=True)
+        self._thread.start()
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Under WAL a NORMAL commit is durable against crashes of the process, and fsyncs only at checkpoints
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- writes (order path) ---
+
+    def _append(self, record: tuple):
+        if self._closed:
+            raise RuntimeError("Journal is closed")
+        self._queue.append(record)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def record_order(self, order: Dict, venue: Optional[str] = None):
+        """Append an order state (submission, update or cancel)"""
+        self._append(('orders', (venue, dict(order))))
+
+    def record_fill(self,
+                    symbol: str,
+                    side: str,
+                    amount: float,
+                    price: float,
+                    fee: float = 0.0,
+                    fee_currency: Optional[str] = None,
+                    order_id: Optional[str] = None,
+                    venue: Optional[str] = None,
+                    ts: Optional[int] = None):
+        """Append one execution"""
+        self._append(('fills', (ts or _now_ms(), venue, symbol, side, amount, price, amount * price,
+                                fee, fee_currency, order_id)))
+
+    def record_signal(self, symbol: str, analysis: Dict, ts: Optional[int] = None):
+        """Append a strategy decision; the full analysis dict is kept as JSON"""
+        self._append(('signals', (ts or _now_ms(), symbol, analysis)))
+
+    def on_order_update(self, order: Dict, venue: Optional[str] = None):
+        """
+        OrderExecutor fill callback: journal the order state and the newly filled part
+
+        Orders report cumulative fills, so only the delta since the last update becomes a fill row.
+        """
+        self.record_order(order, venue)
+        key = order.get('clientOrderId') or order.get('id')
+        filled = float(order.get('filled') or 0)
+        cost = float(order.get('cost') or filled * float(order.get('average') or order.get('price') or 0))
+        fee = order.get('fee') if isinstance(order.get('fee'), dict) else {}
+        fee_cost = float(fee.get('cost') or 0)
+        with self._fill_lock:
+            prev_filled, prev_cost, prev_fee = self._applied.get(key, (0.0, 0.0, 0.0))
+            if filled <= prev_filled:
+                return
+            self._applied[key] = (filled, cost, fee_cost)
+            self._applied.move_to_end(key)
+            while len(self._applied) > self._max_orders:
+                self._applied.popitem(last=False)
+        amount = filled - prev_filled
+        self.record_fill(order['symbol'], order['side'], amount, (cost - prev_cost) / amount,
+                         max(fee_cost - prev_fee, 0.0), fee.get('currency'), order.get('id'), venue,
+                         order.get('lastTradeTimestamp') or order.get('timestamp'))
+
+    # --- writer thread ---
+
+    @staticmethod
+    def _row(table: str, payload):
+        if table == 'orders':
+            venue, order = payload
+            return (order.get('timestamp') or _now_ms(), venue, order.get('symbol'), order.get('side'),
+                    order.get('type'), order.get('amount'), order.get('average') or order.get('price'),
+                    order.get('filled'), order.get('status'), order.get('id'), order.get('clientOrderId'))
+        if table == 'signals':
+            ts, symbol, analysis = payload
+            return (ts, symbol, analysis.get('action', analysis.get('trend')), analysis.get('price'),
+                    json.dumps(analysis, default=str))
+        return payload
+
+    def _drain(self, conn: sqlite3.Connection):
+        rows = {table: [] for table in INSERTS}
+        markers = []
+        while self._queue:
+            record = self._queue.popleft()
+            if record[0] == 'flush':
+                markers.append(record[1])
+                continue
+            table = record[0]
+            rows[table].append(self._row(table, record[1]))
+        count = sum(len(r) for r in rows.values())
+        if count:
+            try:
+                with conn:
+                    for table, batch in rows.items():
+                        if batch:
+                            conn.executemany(INSERTS[table], batch)
+                self.written += count
+            except sqlite3.Error as e:
+                logger.error(f"Journal write of {count} records failed: {e}")
+        for marker in markers:
+            marker.set()
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._closed:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._drain(conn)
+            self._drain(conn)
+        finally:
+            conn.close()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything queued so far is committed"""
+        done = threading.Event()
+        self._queue.append(('flush', done))
+        self._wake.set()
+        return done.wait(timeout)
+
+    def close(self):
+        """Commit what is queued and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._reader.close()
+
+    # --- queries ---
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _where(symbol: Optional[str], since: Optional[int], until: Optional[int]):
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _select(self, table: str, symbol, since, until, limit) -> List[Dict]:
+        where, params = self._where(symbol, since, until)
+        sql = f"SELECT * FROM {table}{where} ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._query(sql, params)]
+
+    def orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+               until: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Order states by symbol and time range (ms), oldest first"""
+        return self._select('orders', symbol, since, until, limit)
+
+    def fills(self, symbol: Optional[str] = None, since: Optional[int] = None,
+              until: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Executions by symbol and time range (ms), oldest first"""
+        return self._select('fills', symbol, since, until, limit)
+
+    def signals(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                until: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Signals by symbol and time range (ms), payload decoded"""
+        rows = self._select('signals', symbol, since, until, limit)
+        for row in rows:
+            row['payload'] = json.loads(row['payload']) if row['payload'] else None
+        return rows
+
+    def pnl(self, symbol: Optional[str] = None, since: Optional[int] = None,
+            until: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Realized PnL per symbol, aggregated in one indexed SQL pass
+
+        The matched quantity min(bought, sold) is valued at the average buy
+        and sell prices (average-cost accounting); fees paid in the quote
+        currency are subtracted, fees in other currencies (e.g. BNB) are not.
+
+        :return: {symbol: {bought, sold, net, avg_buy, avg_sell, fees, realized}}
+        """
+        where, params = self._where(symbol, since, until)
+        sql = f"""
+            SELECT symbol,
+                   SUM(CASE WHEN side = 'buy' THEN amount ELSE 0 END) AS bought,
+                   SUM(CASE WHEN side = 'sell' THEN amount ELSE 0 END) AS sold,
+                   SUM(CASE WHEN side = 'buy' THEN cost ELSE 0 END) AS buy_cost,
+                   SUM(CASE WHEN side = 'sell' THEN cost ELSE 0 END) AS sell_cost,
+                   SUM(CASE WHEN fee_currency IS NULL
+                            OR fee_currency = substr(symbol, instr(symbol, '/') + 1) THEN fee ELSE 0 END) AS fees
+            FROM fills{where} GROUP BY symbol
+        """
+        result = {}
+        for row in self._query(sql, params):
+            bought, sold = row['bought'], row['sold']
+            avg_buy = row['buy_cost'] / bought if bought else 0.0
+            avg_sell = row['sell_cost'] / sold if sold else 0.0
+            matched = min(bought, sold)
+            result[row['symbol']] = {
+                'bought': bought, 'sold': sold, 'net': bought - sold,
+                'avg_buy': avg_buy, 'avg_sell': avg_sell, 'fees': row['fees'],
+                'realized': matched * (avg_sell - avg_buy) - row['fees'],
+            }
+        return result
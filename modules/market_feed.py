@@ -0,0 +1,407 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+import ccxt
+import websockets
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .store import CandleStore
+from .recorder import Recorder
+
+logger = logging.getLogger(__name__)
+
+BINANCE_STREAM_URL = 'wss://stream.binance.com:9443/stream'
+
+
+class OrderBook:
+    def __init__(self, max_pending: int = 1000):
+        """
+        Local price -> quantity book with lazily tracked best levels
+
+        :param max_pending: Diff events buffered while waiting for a snapshot
+        """
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.last_update_id = 0
+        self.synced = False
+        self.pending: deque = deque(maxlen=max_pending)
+        self._best_bid: Optional[float] = None
+        self._best_ask: Optional[float] = None
+        self._dirty = False
+
+    def reset(self):
+        """Forget the sync state, e.g. after a reconnect, so the next event asks for a snapshot"""
+        self.synced = False
+        self.pending.clear()
+
+    def apply_event(self, first_id: int, last_id: int, bids: Iterable, asks: Iterable) -> bool:
+        """
+        Apply a diff event (Binance U/u ids) only if it continues the book
+
+        Events are buffered until sync() has applied a snapshot. A gap
+        between the book and the event unsyncs the book.
+
+        :return: False if the book needs a new snapshot
+        """
+        if not self.synced:
+            self.pending.append((first_id, last_id, bids, asks))
+            return False
+        if last_id <= self.last_update_id:
+            return True  # Already in the snapshot
+        if first_id > self.last_update_id + 1:
+            logger.warning(f"Order book gap: {self.last_update_id} -> {first_id}, resyncing")
+            self.reset()
+            self.pending.append((first_id, last_id, bids, asks))
+            return False
+        self.apply_delta(bids, asks, last_id)
+        return True
+
+    def sync(self, bids: Iterable, asks: Iterable, update_id: int) -> bool:
+        """
+        Apply a REST snapshot and the buffered events that follow it
+
+        Buffered events up to update_id are dropped. If the first remaining
+        event does not connect to the snapshot (it is older than the
+        buffered stream) the book is left unsynced.
+
+        :param update_id: lastUpdateId of the snapshot
+        :return: True if the book is in sync
+        """
+        events = [e for e in self.pending if e[1] > update_id]
+        if events and events[0][0] > update_id + 1:
+            return False
+        self.apply_snapshot(bids, asks, update_id)
+        self.synced = True
+        self.pending.clear()
+        for i, event in enumerate(events):
+            if not self.apply_event(*event):
+                self.pending.extend(events[i + 1:])
+                return False
+        return True
+
+    def apply_snapshot(self, bids: Iterable, asks: Iterable, update_id: int = 0):
+        """Replace the whole book"""
+        self.bids = {float(p): float(q) for p, q in bids if float(q) > 0}
+        self.asks = {float(p): float(q) for p, q in asks if float(q) > 0}
+        self.last_update_id = update_id
+        self._dirty = True
+
+    def apply_delta(self, bids: Iterable, asks: Iterable, update_id: int = 0) -> bool:
+        """
+        Apply level updates, a zero quantity removes the level
+
+        :return: False if the update is older than the book and was dropped
+        """
+        if update_id and update_id <= self.last_update_id:
+            return False
+        for p, q in bids:
+            price, qty = float(p), float(q)
+            if qty > 0:
+                self.bids[price] = qty
+                if not self._dirty and (self._best_bid is None or price > self._best_bid):
+                    self._best_bid = price
+            elif self.bids.pop(price, None) is not None and price == self._best_bid:
+                self._dirty = True
+        for p, q in asks:
+            price, qty = float(p), float(q)
+            if qty > 0:
+                self.asks[price] = qty
+                if not self._dirty and (self._best_ask is None or price < self._best_ask):
+                    self._best_ask = price
+            elif self.asks.pop(price, None) is not None and price == self._best_ask:
+                self._dirty = True
+        if update_id:
+            self.last_update_id = update_id
+        return True
+
+    def _refresh(self):
+        # Only needed after the best level itself was removed
+        self._best_bid = max(self.bids) if self.bids else None
+        self._best_ask = min(self.asks) if self.asks else None
+        self._dirty = False
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        if self._dirty:
+            self._refresh()
+        return (self._best_bid, self.bids[self._best_bid]) if self._best_bid is not None else None
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        if self._dirty:
+            self._refresh()
+        return (self._best_ask, self.asks[self._best_ask]) if self._best_ask is not None else None
+
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+
+class MarketDataFeed:
+    def __init__(self,
+                 symbols: Iterable[str],
+                 url: str = BINANCE_STREAM_URL,
+                 kline_interval: str = '1m',
+                 depth: bool = True,
+                 store: Optional[CandleStore] = None,
+                 exchange_id: str = 'binance',
+                 max_age: float = 5.0,
+                 recorder: Optional[Recorder] = None,
+                 snapshot_fetcher: Optional[Callable[[str], Dict]] = None,
+                 snapshot_depth: int = 1000,
+                 candle_fetcher: Optional[Callable[[str, str, int], List]] = None):
+        """
+        Streaming trade/kline/depth feed with in-memory caches
+
+        :param symbols: Unified symbols, e.g. ['BTC/USDT']
+        :param url: Combined stream endpoint (Binance format)
+        :param kline_interval: Kline stream interval
+        :param depth: Subscribe to the depth stream and keep an order book
+        :param store: Optional candle store that receives kline updates; a kline is
+                      only appended where it continues the stored series
+        :param exchange_id: Exchange id used for store keys
+        :param max_age: Seconds after which a cached price is considered stale
+        :param recorder: Records every raw stream message before it is parsed
+        :param snapshot_fetcher: symbol -> ccxt order book ({'bids', 'asks', 'nonce'}),
+                                 used to (re)sync the depth diff stream; defaults to
+                                 fetch_order_book on the pooled exchange client
+        :param snapshot_depth: Levels requested per snapshot
+        :param candle_fetcher: (symbol, timeframe, since) -> ccxt candles, used to fill
+                               the store between its last candle and the stream;
+                               defaults to fetch_ohlcv on the pooled exchange client
+        """
+        self.symbols = list(symbols)
+        self.url = url
+        self.kline_interval = kline_interval
+        self.depth = depth
+        self.store = store
+        self.exchange_id = exchange_id
+        self.max_age = max_age
+        self.recorder = recorder
+        self.snapshot_fetcher = snapshot_fetcher or self._fetch_snapshot
+        self.snapshot_depth = snapshot_depth
+        self.candle_fetcher = candle_fetcher or self._fetch_candles
+
+        self._by_stream = {s.replace('/', '').lower(): s for s in self.symbols}
+        self.prices: Dict[str, Tuple[float, float]] = {}
+        self.candles: Dict[str, List[float]] = {}
+        self.books: Dict[str, OrderBook] = {s: OrderBook() for s in self.symbols}
+        self.candle_callbacks: List[Callable[[str, List[float], bool], None]] = []
+
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws = None
+        self._syncing: set = set()
+        self._filling: set = set()
+        self.connected = threading.Event()
+
+    def stream_names(self) -> List[str]:
+        names = []
+        for stream_symbol in self._by_stream:
+            names.append(f"{stream_symbol}@trade")
+            names.append(f"{stream_symbol}@kline_{self.kline_interval}")
+            if self.depth:
+                names.append(f"{stream_symbol}@depth@100ms")
+        return names
+
+    def stream_url(self) -> str:
+        return f"{self.url}?streams={'/'.join(self.stream_names())}"
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Last traded price if it is fresher than max_age"""
+        cached = self.prices.get(symbol)
+        if cached is None or time.time() - cached[1] > self.max_age:
+            return None
+        return cached[0]
+
+    def get_candle(self, symbol: str) -> Optional[List[float]]:
+        """Latest [timestamp, open, high, low, close, volume] kline"""
+        return self.candles.get(symbol)
+
+    def get_order_book(self, symbol: str) -> Optional[OrderBook]:
+        return self.books.get(symbol)
+
+    def _fetch_snapshot(self, symbol: str) -> Dict:
+        from .exchange_pool import ExchangePool
+
+        return ExchangePool.shared().get(self.exchange_id).fetch_order_book(symbol, self.snapshot_depth)
+
+    def _fetch_candles(self, symbol: str, timeframe: str, since: int) -> List:
+        from .exchange_pool import ExchangePool
+
+        return ExchangePool.shared().get(self.exchange_id).fetch_ohlcv(symbol, timeframe, since=since)
+
+    def _fill_gap(self, symbol: str, timeframe: str, since: int, until: int) -> int:
+        """Page REST candles from the last stored one up to the streamed one into the store"""
+        added = 0
+        while True:
+            rows = self.candle_fetcher(symbol, timeframe, since)
+            added += self.store.write(self.exchange_id, symbol, timeframe, rows)
+            if not rows or rows[-1][0] <= since or rows[-1][0] >= until:
+                return added
+            since = rows[-1][0]
+
+    async def _backfill(self, symbol: str, timeframe: str, since: int, until: int):
+        try:
+            await asyncio.to_thread(self._fill_gap, symbol, timeframe, since, until)
+        except Exception as e:
+            logger.warning(f"Candle backfill for {symbol} {timeframe} failed: {e}")
+        finally:
+            self._filling.discard((symbol, timeframe))
+
+    def _request_backfill(self, symbol: str, timeframe: str, since: int, until: int):
+        key = (symbol, timeframe)
+        if key in self._filling:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                self._fill_gap(symbol, timeframe, since, until)
+            except Exception as e:
+                logger.warning(f"Candle backfill for {symbol} {timeframe} failed: {e}")
+            return
+        self._filling.add(key)
+        loop.create_task(self._backfill(symbol, timeframe, since, until))
+
+    def _store_candle(self, symbol: str, timeframe: str, candle: List[float]):
+        """
+        Write a streamed kline only where it continues the stored series
+
+        An empty series is left to the REST history (DataFetcher.sync). A
+        kline more than one interval after the last stored candle would leave
+        a hole that the fresh file time hides from DataFetcher, so the gap is
+        fetched first and later klines append as usual.
+        """
+        if (symbol, timeframe) in self._filling:
+            return
+        last = self.store.last_timestamp(self.exchange_id, symbol, timeframe)
+        if last is None:
+            return
+        if candle[0] <= last + ccxt.Exchange.parse_timeframe(timeframe) * 1000:
+            self.store.write(self.exchange_id, symbol, timeframe, [candle])
+        else:
+            self._request_backfill(symbol, timeframe, last, candle[0])
+
+    def _sync_book(self, symbol: str, snapshot: Dict) -> bool:
+        book = self.books[symbol]
+        update_id = snapshot.get('nonce', snapshot.get('lastUpdateId'))
+        if update_id is None:
+            raise ValueError(f"Order book snapshot for {symbol} has no update id")
+        return book.sync(snapshot['bids'], snapshot['asks'], int(update_id))
+
+    async def _resync(self, symbol: str, attempts: int = 5, delay: float = 0.5):
+        """Fetch snapshots until one connects to the buffered diff events"""
+        try:
+            for attempt in range(attempts):
+                try:
+                    snapshot = await asyncio.to_thread(self.snapshot_fetcher, symbol)
+                    # Back on the loop thread, so no event is handled in between
+                    if self._sync_book(symbol, snapshot):
+                        return
+                except Exception as e:
+                    logger.warning(f"Order book snapshot for {symbol} failed: {e}")
+                await asyncio.sleep(delay * (attempt + 1))
+            logger.error(f"Could not sync the {symbol} order book after {attempts} snapshots")
+        finally:
+            self._syncing.discard(symbol)
+
+    def _request_snapshot(self, symbol: str):
+        if symbol in self._syncing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Replays outside an event loop sync inline
+            try:
+                self._sync_book(symbol, self.snapshot_fetcher(symbol))
+            except Exception as e:
+                logger.warning(f"Order book snapshot for {symbol} failed: {e}")
+            return
+        self._syncing.add(symbol)
+        loop.create_task(self._resync(symbol))
+
+    def handle_message(self, message):
+        """Route one raw stream message into the caches"""
+        if self.recorder is not None and isinstance(message, (str, bytes)):
+            self.recorder.record('raw', message)
+        payload = json.loads(message) if isinstance(message, (str, bytes)) else message
+        data = payload.get('data', payload)
+        event = data.get('e')
+
+        if event == 'trade':
+            symbol = self._by_stream.get(data['s'].lower())
+            if symbol:
+                self.prices[symbol] = (float(data['p']), time.time())
+
+        elif event == 'kline':
+            symbol = self._by_stream.get(data['s'].lower())
+            k = data['k']
+            if symbol:
+                candle = [k['t'], float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])]
+                self.candles[symbol] = candle
+                self.prices[symbol] = (candle[4], time.time())
+                if self.store is not None:
+                    self._store_candle(symbol, k['i'], candle)
+                for callback in self.candle_callbacks:
+                    callback(symbol, candle, bool(k['x']))
+
+        elif event == 'depthUpdate':
+            # Diff stream: the book is only valid on top of a REST snapshot
+            symbol = self._by_stream.get(data['s'].lower())
+            book = self.books.get(symbol)
+            if book is not None and not book.apply_event(data['U'], data['u'], data['b'], data['a']):
+                self._request_snapshot(symbol)
+
+    async def run(self, reconnect_delay: float = 1.0, max_delay: float = 30.0):
+        """Consume the stream until stop(), reconnecting with backoff"""
+        self._running = True
+        delay = reconnect_delay
+        while self._running:
+            try:
+                async with websockets.connect(self.stream_url(), max_size=None) as ws:
+                    self._ws = ws
+                    # Events missed while disconnected: every book needs a new snapshot
+                    for book in self.books.values():
+                        book.reset()
+                    self.connected.set()
+                    delay = reconnect_delay
+                    async for message in ws:
+                        self.handle_message(message)
+            except (OSError, websockets.WebSocketException) as e:
+                logger.warning(f"Market feed disconnected: {e} - reconnecting in {delay}s")
+            finally:
+                self._ws = None
+                self.connected.clear()
+            if self._running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_delay)
+
+    def start(self) -> threading.Thread:
+        """Run the feed on its own event loop in a daemon thread"""
+        self._loop = asyncio.new_event_loop()
+
+        def target():
+            self._loop.run_until_complete(self.run())
+
+        self._thread = threading.Thread(target=target, name='market-feed', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    async def close(self):
+        """Stop the feed from inside its event loop"""
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop a feed started with start()"""
+        if self._loop is None:
+            self._running = False
+            return
+        asyncio.run_coroutine_threadsafe(self.close(), self._loop).result(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
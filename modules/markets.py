@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+import weakref
+import ccxt
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MarketCache:
+    _shared: Dict[Tuple[str, str], 'MarketCache'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, exchange_id: str = 'binance', root: str = 'data/markets', ttl: float = 6 * 3600):
+        """
+        Market metadata (precision, lot/tick size, limits) kept in memory and on disk
+
+        :param exchange_id: ccxt exchange id
+        :param root: Directory of the JSON cache files
+        :param ttl: Seconds before markets are reloaded from the exchange
+        """
+        self.exchange_id = exchange_id
+        self.path = Path(root) / f"{exchange_id}.json"
+        self.ttl = ttl
+        self.markets: Optional[Dict] = None
+        self.currencies: Optional[Dict] = None
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+        # Client -> loaded_at of the markets it was given
+        self._attached: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def shared(cls, exchange_id: str = 'binance', root: str = 'data/markets', **kwargs) -> 'MarketCache':
+        """One cache per exchange and directory for the whole process"""
+        key = (exchange_id, str(root))
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(exchange_id, root, **kwargs)
+            return cls._shared[key]
+
+    def is_fresh(self) -> bool:
+        return self.markets is not None and time.time() - self.loaded_at < self.ttl
+
+    def _read_disk(self) -> bool:
+        try:
+            loaded_at = self.path.stat().st_mtime
+            if time.time() - loaded_at >= self.ttl:
+                return False
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.markets, self.currencies, self.loaded_at = data['markets'], data.get('currencies'), loaded_at
+        return True
+
+    def _write_disk(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'markets': self.markets, 'currencies': self.currencies}, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def attach(self, exchange, fetch: bool = True) -> bool:
+        """
+        Give a ccxt client the cached markets so it never calls load_markets itself
+
+        :param exchange: Sync ccxt client of this cache's exchange
+        :param fetch: Reload from the exchange when neither memory nor disk is fresh
+        :return: True if the client now has markets
+        """
+        with self._lock:
+            if not self.is_fresh() and not self._read_disk():
+                if not fetch:
+                    return False
+                exchange.load_markets(reload=True)
+                self.markets, self.currencies = exchange.markets, exchange.currencies
+                self.loaded_at = time.time()
+                self._write_disk()
+                logger.info(f"Loaded {len(self.markets)} {self.exchange_id} markets from the exchange")
+            elif self._attached.get(exchange) != self.loaded_at:
+                exchange.set_markets(self.markets, self.currencies)
+            self._attached[exchange] = self.loaded_at
+            return True
+
+    def prepare_order(self,
+                      exchange,
+                      symbol: str,
+                      amount: float,
+                      price: Optional[float] = None,
+                      reference_price: Optional[float] = None) -> Tuple[float, Optional[float]]:
+        """
+        Round an order to the market precision and check it against the limits
+
+        :param exchange: ccxt client the order will be sent through
+        :param price: Limit price, None for market orders
+        :param reference_price: Expected fill price used for the min notional check of market orders
+        :return: (amount, price) rounded for submission
+        :raises ValueError: If the order would be rejected by the exchange
+        """
+        self.attach(exchange)
+        market = exchange.markets.get(symbol)
+        if market is None:
+            raise ValueError(f"Unknown market {symbol}")
+
+        # ccxt rounds locally from the market precision; amounts are truncated
+        try:
+            amount = float(exchange.amount_to_precision(symbol, amount))
+            if price is not None:
+                price = float(exchange.price_to_precision(symbol, price))
+        except ccxt.InvalidOrder as e:
+            raise ValueError(str(e)) from e
+
+        limits = market.get('limits') or {}
+        amount_limits = limits.get('amount') or {}
+        if amount <= 0 or (amount_limits.get('min') and amount < amount_limits['min']):
+            raise ValueError(f"Amount {amount} below minimum {amount_limits.get('min')} for {symbol}")
+        if amount_limits.get('max') and amount > amount_limits['max']:
+            raise ValueError(f"Amount {amount} above maximum {amount_limits['max']} for {symbol}")
+
+        fill_price = price if price is not None else reference_price
+        min_cost = (limits.get('cost') or {}).get('min')
+        if min_cost and fill_price and amount * fill_price < min_cost:
+            raise ValueError(f"Order value {amount * fill_price:.8f} below minimum notional {min_cost} for {symbol}")
+        return amount, price
@@ -0,0 +1,167 @@
+import math
+import numpy as np
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Sequence, Union
+from .store import COLUMNS
+
+# Structured view of one candle row, same bytes as a (n, 6) float64 block
+CANDLE_DTYPE = np.dtype([(name, np.float64) for name in COLUMNS])
+NAN = math.nan
+
+
+class CandleBlock:
+    """
+    Time-ordered candles backed by one (n, 6) float64 array
+
+    Columns are reachable by name and slicing returns another block over
+    the same memory. A block built directly from a CandleStore read is a
+    view of the memory-mapped file and sees in-place rewrites of the forming
+    candle; DataFetcher and MarketScanner copy the tail they return.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data: np.ndarray):
+        """
+        :param data: (n, 6) float64 array with columns COLUMNS
+        """
+        if data.ndim != 2 or data.shape[1] != len(COLUMNS):
+            raise ValueError(f"Expected an (n, {len(COLUMNS)}) candle array, got shape {data.shape}")
+        self.data = data
+
+    @classmethod
+    def from_rows(cls, rows: Union['CandleBlock', np.ndarray, Sequence[Sequence[float]]]) -> 'CandleBlock':
+        """Convert ccxt list-of-lists once at the I/O boundary; arrays and blocks are not copied"""
+        if isinstance(rows, CandleBlock):
+            return rows
+        if not len(rows):
+            return cls(np.empty((0, len(COLUMNS)), dtype=np.float64))
+        return cls(np.asarray(rows, dtype=np.float64).reshape(-1, len(COLUMNS)))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return CandleBlock(self.data[item])
+        return self.data[item]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype, copy=False)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CandleBlock):
+            return NotImplemented
+        return np.array_equal(self.data, other.data)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return 'CandleBlock(0 bars)'
+        return f"CandleBlock({len(self)} bars, {int(self.data[0, 0])}..{int(self.data[-1, 0])})"
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.data[:, 4]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.data[:, 5]
+
+    @property
+    def records(self) -> np.ndarray:
+        """Structured (n,) view with named fields, e.g. block.records['close']"""
+        data = np.ascontiguousarray(self.data)
+        return data.view(CANDLE_DTYPE).reshape(len(data))
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def since(self, timestamp: float) -> 'CandleBlock':
+        """Candles opened at or after timestamp (ms)"""
+        return CandleBlock(self.data[np.searchsorted(self.data[:, 0], timestamp, 'left'):])
+
+    def tolist(self):
+        """ccxt style rows, for JSON and exchange-facing code"""
+        return self.data.tolist()
+
+
+@dataclass(slots=True)
+class Signal:
+    """Outcome of TradingBot.analyze_market for one symbol on its latest bar"""
+    symbol: str
+    trend: str  # 'up', 'down' or 'flat'
+    price: float
+    rsi: float = NAN
+    macd_hist: float = NAN
+    atr: float = NAN
+    confidence: Optional[float] = None  # 0..1, set when a model reviewed the signal
+    reason: str = ''
+    hold: bool = False  # a model advised no action: neither enter nor exit on this bar
+
+    @property
+    def side(self) -> Optional[str]:
+        return {'up': 'buy', 'down': 'sell'}.get(self.trend)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Signal':
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+
+@dataclass(slots=True)
+class OrderRequest:
+    """An order decided by the bot, before it reaches a venue"""
+    symbol: str
+    side: str
+    amount: float
+    order_type: str = 'market'
+    price: Optional[float] = None
+    reference_price: Optional[float] = None
+
+    def params(self) -> Dict:
+        """Keyword arguments of AdvancedTrader.execute_order"""
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class Fill:
+    """Filled part of an order as applied to the tracked portfolio"""
+    symbol: str
+    side: str
+    amount: float
+    price: float
+    fee: float = 0.0
+
+    @classmethod
+    def from_order(cls, order: Dict, price: float, quote_currency: str = 'USDT') -> Optional['Fill']:
+        """
+        Parse a ccxt order dict; None when nothing was filled
+
+        :param price: Fill price used when the order reports no average
+        :param quote_currency: Only fees charged in this currency reduce cash
+        """
+        filled = order.get('filled') or 0.0
+        if filled <= 0:
+            return None
+        fee = order.get('fee') or 0.0
+        if isinstance(fee, dict):
+            fee = (fee.get('cost') or 0.0) if fee.get('currency') in (None, quote_currency) else 0.0
+        return cls(order['symbol'], order['side'], float(filled), float(order.get('average') or price), float(fee))
@@ -0,0 +1,315 @@
+import json
+import time
+import zlib
+import queue
+import struct
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+KINDS = {'raw': 0, 'candle': 1, 'ticker': 2, 'trade': 3, 'book': 4}
+KIND_NAMES = {v: k for k, v in KINDS.items()}
+CODECS = {'zlib': 0, 'zstd': 1, 'lz4': 2}
+
+# Block: magic, codec, record count, first/last ts (ns), raw and compressed sizes
+BLOCK_HEADER = struct.Struct('<4sBIqqII')
+BLOCK_MAGIC = b'TBK1'
+# Record: ts (ns), kind, payload format (0 text, 1 JSON), payload size
+RECORD_HEADER = struct.Struct('<qBBI')
+TEXT, JSON = 0, 1
+
+
+def best_codec() -> str:
+    """zstd, then LZ4, then zlib from the standard library"""
+    if zstandard is not None:
+        return 'zstd'
+    if lz4_frame is not None:
+        return 'lz4'
+    return 'zlib'
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == 'lz4':
+        return lz4_frame.compress(data)
+    return zlib.compress(data, 1)
+
+
+def _decompress(codec_id: int, data: bytes) -> bytes:
+    if codec_id == CODECS['zstd']:
+        if zstandard is None:
+            raise RuntimeError("Recording is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec_id == CODECS['lz4']:
+        if lz4_frame is None:
+            raise RuntimeError("Recording is LZ4-compressed but lz4 is not installed")
+        return lz4_frame.decompress(data)
+    return zlib.decompress(data)
+
+
+class Recorder:
+    def __init__(self,
+                 root: str = 'data/ticks',
+                 codec: Optional[str] = None,
+                 chunk_seconds: float = 3600,
+                 block_bytes: int = 1 << 20,
+                 block_seconds: float = 1.0,
+                 max_pending_blocks: int = 16):
+        """
+        Record market data messages into compressed, time-chunked block files
+
+        Records are framed into an in-memory block; full blocks are
+        compressed and written by a background thread. At most
+        max_pending_blocks wait for the writer, so memory stays bounded;
+        when the writer falls behind, blocks are dropped and counted
+        instead of stalling the caller.
+
+        :param root: Directory of the chunk files and index.jsonl
+        :param codec: 'zstd', 'lz4' or 'zlib', defaults to the best installed
+        :param chunk_seconds: Time span of one chunk file
+        :param block_bytes: Uncompressed size at which a block is sealed
+        :param block_seconds: Age at which a partial block is sealed
+        :param max_pending_blocks: Sealed blocks allowed to wait for the writer
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.codec = codec or best_codec()
+        if self.codec not in CODECS:
+            raise ValueError(f"Unknown codec {self.codec}, expected one of {list(CODECS)}")
+        self.chunk_ns = int(chunk_seconds * 1e9)
+        self.block_bytes = block_bytes
+        self.block_ns = int(block_seconds * 1e9)
+
+        self.recorded = 0
+        self.dropped = 0
+        self._parts: List[bytes] = []
+        self._size = 0
+        self._count = 0
+        self._first = 0
+        self._last = 0
+        self._lock = threading.Lock()
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_pending_blocks)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='tick-recorder', daemon=True)
+        self._thread.start()
+
+    def record(self, kind: str, message, ts: Optional[int] = None):
+        """
+        Append one message
+
+        :param kind: One of KINDS
+        :param message: Raw stream text/bytes (kept as is) or a JSON-serializable object
+        :param ts: Receive time in ns, defaults to now
+        """
+        if ts is None:
+            ts = time.time_ns()
+        if isinstance(message, str):
+            payload, fmt = message.encode(), TEXT
+        elif isinstance(message, bytes):
+            payload, fmt = message, TEXT
+        else:
+            payload, fmt = json.dumps(message, separators=(',', ':')).encode(), JSON
+        header = RECORD_HEADER.pack(ts, KINDS[kind], fmt, len(payload))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Recorder is closed")
+            if not self._count:
+                self._first = ts
+            self._parts.append(header)
+            self._parts.append(payload)
+            self._size += len(header) + len(payload)
+            self._count += 1
+            self._last = ts
+            if self._size >= self.block_bytes or ts - self._first >= self.block_ns:
+                self._seal()
+
+    def _seal(self):
+        # Caller holds the lock
+        if not self._count:
+            return
+        block = (self._first, self._last, self._count, b''.join(self._parts))
+        self._parts, self._size, self._count = [], 0, 0
+        try:
+            self._queue.put_nowait(block)
+            self.recorded += block[2]
+        except queue.Full:
+            self.dropped += block[2]
+            logger.warning(f"Recorder writer is behind, dropped {block[2]} messages")
+
+    def flush(self):
+        """Seal the current block and wait until everything queued is on disk"""
+        with self._lock:
+            self._seal()
+        self._queue.join()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._seal()
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    # --- writer thread ---
+
+    def _run(self):
+        chunk_start, file, name = None, None, None
+        index = open(self.root / 'index.jsonl', 'a')
+        try:
+            while True:
+                try:
+                    block = self._queue.get(timeout=self.block_ns / 1e9)
+                except queue.Empty:
+                    # A quiet feed still gets its partial block on disk
+                    with self._lock:
+                        if self._count and time.time_ns() - self._first >= self.block_ns:
+                            self._seal()
+                    continue
+                try:
+                    if block is None:
+                        return
+                    first, last, count, raw = block
+                    start = first - first % self.chunk_ns
+                    if start != chunk_start:
+                        if file is not None:
+                            file.close()
+                        chunk_start, name = start, f"{start}.ticks"
+                        file = open(self.root / name, 'ab')
+                    data = _compress(self.codec, raw)
+                    offset = file.tell()
+                    file.write(BLOCK_HEADER.pack(BLOCK_MAGIC, CODECS[self.codec], count, first, last,
+                                                 len(raw), len(data)))
+                    file.write(data)
+                    file.flush()
+                    index.write(json.dumps({'file': name, 'offset': offset,
+                                            'first': first, 'last': last, 'count': count}) + '\n')
+                    index.flush()
+                except OSError as e:
+                    logger.error(f"Recorder write failed: {e}")
+                finally:
+                    self._queue.task_done()
+        finally:
+            if file is not None:
+                file.close()
+            index.close()
+
+
+class Replayer:
+    def __init__(self, root: str = 'data/ticks'):
+        """
+        Stream recorded messages back in time order
+
+        :param root: Directory written by Recorder
+        """
+        self.root = Path(root)
+
+    def blocks(self) -> List[Dict]:
+        """Block index entries ordered by time, rebuilt from the chunk files if index.jsonl is missing"""
+        path = self.root / 'index.jsonl'
+        if path.exists():
+            with open(path) as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = list(self._scan())
+        return sorted(entries, key=lambda e: (e['first'], e['file'], e['offset']))
+
+    def _scan(self) -> Iterator[Dict]:
+        for chunk in sorted(self.root.glob('*.ticks')):
+            with open(chunk, 'rb') as f:
+                offset = 0
+                while True:
+                    header = f.read(BLOCK_HEADER.size)
+                    if len(header) < BLOCK_HEADER.size:
+                        break
+                    magic, _, count, first, last, _, size = BLOCK_HEADER.unpack(header)
+                    if magic != BLOCK_MAGIC:
+                        logger.error(f"Corrupt block at {chunk.name}:{offset}")
+                        break
+                    yield {'file': chunk.name, 'offset': offset, 'first': first, 'last': last, 'count': count}
+                    offset += BLOCK_HEADER.size + size
+                    f.seek(offset)
+
+    def _read_block(self, entry: Dict) -> bytes:
+        with open(self.root / entry['file'], 'rb') as f:
+            f.seek(entry['offset'])
+            magic, codec_id, _, _, _, _, size = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+            if magic != BLOCK_MAGIC:
+                raise ValueError(f"Corrupt block at {entry['file']}:{entry['offset']}")
+            return _decompress(codec_id, f.read(size))
+
+    def messages(self,
+                 since: Optional[int] = None,
+                 until: Optional[int] = None,
+                 kinds: Optional[Iterable[str]] = None,
+                 speed: Optional[float] = None) -> Iterator[Tuple[int, str, object]]:
+        """
+        Generator over recorded messages
+
+        Only blocks overlapping [since, until) are read and decompressed.
+
+        :param since: First receive time to include (ns)
+        :param until: Receive time to stop before (ns)
+        :param kinds: Message kinds to include, all by default
+        :param speed: None for as fast as possible, 1.0 for the recorded pace, 10.0 for 10x
+        :return: (ts_ns, kind, message) with text kept as str and JSON decoded
+        """
+        wanted = None if kinds is None else {KINDS[k] for k in kinds}
+        unpack, header_size = RECORD_HEADER.unpack_from, RECORD_HEADER.size
+        origin = clock_origin = None
+        for entry in self.blocks():
+            if (since is not None and entry['last'] < since) or (until is not None and entry['first'] >= until):
+                continue
+            data = self._read_block(entry)
+            pos, end = 0, len(data)
+            while pos < end:
+                ts, kind, fmt, size = unpack(data, pos)
+                pos += header_size
+                payload = data[pos:pos + size]
+                pos += size
+                if (since is not None and ts < since) or (until is not None and ts >= until):
+                    continue
+                if wanted is not None and kind not in wanted:
+                    continue
+                if speed:
+                    if origin is None:
+                        origin, clock_origin = ts, time.monotonic_ns()
+                    delay = (ts - origin) / speed - (time.monotonic_ns() - clock_origin)
+                    if delay > 0:
+                        time.sleep(delay / 1e9)
+                message = json.loads(payload) if fmt == JSON else payload.decode()
+                yield ts, KIND_NAMES.get(kind, 'raw'), message
+
+    def replay_into(self, feed=None, store=None, exchange_id: str = 'binance', **kwargs) -> int:
+        """
+        Push recorded data into live components
+
+        Stream messages go through feed.handle_message, REST candles into the
+        candle store read by DataFetcher, tickers into the feed's price cache.
+
+        :param kwargs: Passed to messages() (since, until, kinds, speed)
+        :return: Number of messages replayed
+        """
+        count = 0
+        for _, kind, message in self.messages(**kwargs):
+            if kind == 'raw' and feed is not None:
+                feed.handle_message(message)
+            elif kind == 'candle' and store is not None:
+                store.write(exchange_id, message['symbol'], message['timeframe'], message['rows'])
+            elif kind == 'ticker' and feed is not None and message.get('last') is not None:
+                feed.prices[message['symbol']] = (float(message['last']), time.time())
+            count += 1
+        return count
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import ccxt
+import numpy as np
+import ccxt.async_support as ccxt_async
+from typing import Dict, Iterable, Optional
+from .store import CandleStore
+from .models import CandleBlock
+from .markets import MarketCache
+from .exchange_pool import ExchangePool, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Exchange API paths behind the scanner's calls; their ccxt costs come from
+# exchange.describe()['api'], the units the ExchangePool limiter is fed with
+OHLCV_ENDPOINT = 'klines'
+TICKERS_ENDPOINT = 'ticker/24hr'
+
+
+def endpoint_cost(exchange, path: str, no_symbol: bool = False, default: float = 1.0) -> float:
+    """
+    ccxt rate-limit cost of an API path, as charged by the exchange's own throttle
+
+    :param path: Endpoint path, looked up in the public API first
+    :param no_symbol: Cost of the call without a symbol (e.g. all tickers), when it differs
+    :param default: ccxt's default cost for endpoints without one
+    """
+    api = exchange.describe().get('api', {})
+    sections = [api.get('public', {})] + [v for k, v in api.items() if k != 'public' and isinstance(v, dict)]
+    while sections:
+        section = sections.pop(0)
+        config = section.get(path)
+        if isinstance(config, dict):
+            return float(config.get('noSymbol' if no_symbol and 'noSymbol' in config else 'cost', default))
+        if isinstance(config, (int, float)):
+            return float(config)
+        sections.extend(v for v in section.values() if isinstance(v, dict))
+    return default
+
+
+class TokenBucket:
+    def __init__(self, rate: Optional[float] = None, capacity: Optional[float] = None,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        Async view of a thread-safe RateLimiter
+
+        :param rate: Tokens (ccxt request cost) refilled per second of a private limiter
+        :param capacity: Maximum burst size, defaults to one second of rate
+        :param limiter: Existing limiter to share, e.g. the ExchangePool one, instead of rate
+        """
+        if limiter is None:
+            if rate is None:
+                raise ValueError("TokenBucket needs a rate or a limiter")
+            limiter = RateLimiter(rate, capacity)
+        self.limiter = limiter
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them"""
+        delay = self.limiter.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class MarketScanner:
+    def __init__(self,
+                 exchange_id: str = 'binance',
+                 store: Optional[CandleStore] = None,
+                 rate: Optional[float] = None,
+                 capacity: Optional[float] = None,
+                 max_concurrency: int = 50,
+                 markets: Optional[MarketCache] = None):
+        """
+        Concurrent OHLCV/ticker scanner over one shared async ccxt session
+
+        :param exchange_id: ccxt exchange id
+        :param store: Candle store shared with DataFetcher
+        :param rate: ccxt request cost per second of a private limiter; by default
+            the scanner takes from the ExchangePool limiter of the exchange, so
+            scans and the sync clients share one budget
+        :param capacity: Burst size of a private limiter
+        :param max_concurrency: Maximum requests in flight
+        :param markets: Market metadata cache shared with the sync clients
+        """
+        self.exchange_id = exchange_id
+        # Rate limiting is done by the shared bucket, not per request
+        self.exchange = getattr(ccxt_async, exchange_id)({'enableRateLimit': False})
+        self.store = store if store is not None else CandleStore()
+        pooled = ExchangePool.shared().get(exchange_id)
+        self.bucket = TokenBucket(rate, capacity) if rate is not None else TokenBucket(limiter=pooled.limiter)
+        self.markets = markets if markets is not None else MarketCache.shared(exchange_id)
+        self.ohlcv_cost = endpoint_cost(self.exchange, OHLCV_ENDPOINT)
+        self.tickers_cost = endpoint_cost(self.exchange, TICKERS_ENDPOINT, no_symbol=True)
+        self._pooled = pooled
+        self._markets_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _ensure_markets(self):
+        """
+        Give the async client the shared markets so ccxt skips its own load_markets
+
+        On a cold cache the pooled sync client loads them once for every client.
+        """
+        async with self._markets_lock:
+            if not self.markets.attach(self.exchange, fetch=False):
+                await asyncio.to_thread(self.markets.attach, self._pooled, True)
+                self.markets.attach(self.exchange, fetch=False)
+
+    async def _call(self, cost: float, method: str, *args, **kwargs):
+        await self.bucket.acquire(cost)
+        async with self._semaphore:
+            return await getattr(self.exchange, method)(*args, **kwargs)
+
+    async def sync(self, symbol: str, timeframe: str = '1h', limit: int = 100) -> int:
+        """Async counterpart of DataFetcher.sync: fetch only the missing tail"""
+        stored = self.store.read(self.exchange_id, symbol, timeframe)
+        if len(stored) < limit:
+            rows = await self._call(self.ohlcv_cost, 'fetch_ohlcv', symbol, timeframe, limit=limit)
+            return self.store.backfill(self.exchange_id, symbol, timeframe, rows)
+
+        added = 0
+        since = int(stored[-1, 0])
+        tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        while True:
+            rows = await self._call(self.ohlcv_cost, 'fetch_ohlcv', symbol, timeframe, since=since)
+            added += self.store.write(self.exchange_id, symbol, timeframe, rows)
+            if not rows or rows[-1][0] <= since or rows[-1][0] + tf_ms > self.exchange.milliseconds():
+                return added
+            since = rows[-1][0]
+
+    async def get_ohlcv(self, symbol: str, timeframe: str = '1h', limit: int = 100) -> CandleBlock:
+        """Sync one symbol and return a copy of its last `limit` candles (see DataFetcher.get_ohlcv)"""
+        await self.sync(symbol, timeframe, limit)
+        return CandleBlock(np.array(self.store.read(self.exchange_id, symbol, timeframe)[-limit:]))
+
+    async def scan(self,
+                   symbols: Iterable[str],
+                   timeframe: str = '1h',
+                   limit: int = 100) -> Dict[str, Dict]:
+        """
+        Fetch candles for every symbol and all tickers concurrently
+
+        :return: {symbol: {'ohlcv': CandleBlock, 'ticker': {...}}} for symbols that succeeded
+        """
+        symbols = list(symbols)
+        await self._ensure_markets()
+        tickers_task = asyncio.ensure_future(self._call(self.tickers_cost, 'fetch_tickers', symbols))
+        results = await asyncio.gather(
+            *(self.get_ohlcv(symbol, timeframe, limit) for symbol in symbols),
+            return_exceptions=True
+        )
+        try:
+            tickers = await tickers_task
+        except ccxt.BaseError as e:
+            logger.warning(f"Ticker fetch failed: {e}")
+            tickers = {}
+
+        scan = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Scan failed for {symbol}: {result}")
+                continue
+            scan[symbol] = {'ohlcv': result, 'ticker': tickers.get(symbol)}
+        return scan
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        await self.exchange.close()
@@ -0,0 +1,188 @@
+import os
+import threading
+import contextlib
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: only writers in one process are serialized
+    fcntl = None
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+_ROW_BYTES = len(COLUMNS) * np.dtype(np.float64).itemsize
+
+
+class CandleStore:
+    def __init__(self, root: str = 'data/candles'):
+        """
+        Persistent OHLCV store, one append-only float64 file per
+        exchange/symbol/timeframe, read back through np.memmap
+
+        Writers of the same file are serialized by a per-file thread lock
+        (the market feed thread and DataFetcher) and an flock on a sidecar
+        .lock file (sharded worker processes and the router's feed); readers
+        need none.
+
+        :param root: Directory holding the candle files
+        """
+        self.root = Path(root)
+        self._maps: Dict[Path, Tuple[Tuple[int, int], np.ndarray]] = {}
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _write_lock(self, path: Path) -> threading.Lock:
+        with self._locks_lock:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.Lock()
+            return lock
+
+    @contextlib.contextmanager
+    def _locked(self, path: Path) -> Iterator[None]:
+        """Exclusive write access to one candle file across threads and processes"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._write_lock(path):
+            if fcntl is None:
+                yield
+                return
+            # backfill swaps the data file, so the lock lives on a file that is never replaced
+            with open(path.with_suffix('.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, exchange_id: str, symbol: str, timeframe: str) -> Path:
+        safe_symbol = symbol.replace('/', '-').replace(':', '_')
+        return self.root / exchange_id / safe_symbol / f"{timeframe}.f64"
+
+    def _map(self, path: Path) -> np.ndarray:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+        size = stat.st_size - stat.st_size % _ROW_BYTES
+        if size == 0:
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+
+        # Another process's backfill replaces the file, possibly at the same size
+        key = (stat.st_ino, size)
+        cached = self._maps.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        view = np.memmap(path, dtype=np.float64, mode='r',
+                         shape=(size // _ROW_BYTES, len(COLUMNS)))
+        self._maps[path] = (key, view)
+        return view
+
+    def read(self,
+             exchange_id: str,
+             symbol: str,
+             timeframe: str,
+             since: Optional[int] = None,
+             until: Optional[int] = None) -> np.ndarray:
+        """
+        Read stored candles as a zero-copy (n, 6) view
+
+        :param since: First open time to include (ms)
+        :param until: Open time to stop before (ms)
+        :return: Read-only array with columns COLUMNS
+        """
+        data = self._map(self._path(exchange_id, symbol, timeframe))
+        if since is None and until is None:
+            return data
+
+        times = data[:, 0]
+        start = 0 if since is None else int(np.searchsorted(times, since, 'left'))
+        stop = len(data) if until is None else int(np.searchsorted(times, until, 'left'))
+        return data[start:stop]
+
+    def last_timestamp(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[int]:
+        """Open time of the newest stored candle, or None for an empty store"""
+        data = self.read(exchange_id, symbol, timeframe)
+        return int(data[-1, 0]) if len(data) else None
+
+    def last_modified(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[float]:
+        """Time of the last write (epoch seconds), or None if nothing is stored"""
+        path = self._path(exchange_id, symbol, timeframe)
+        return path.stat().st_mtime if path.exists() else None
+
+    def write(self,
+              exchange_id: str,
+              symbol: str,
+              timeframe: str,
+              rows: Sequence[Sequence[float]]) -> int:
+        """
+        Merge exchange candles into the store
+
+        Rows older than the last stored candle are ignored, a row with the
+        same open time replaces it (the candle was still forming when it
+        was stored) and newer rows are appended.
+
+        :param rows: ccxt style [timestamp, open, high, low, close, volume] rows
+        :return: Number of new candles appended
+        """
+        if not len(rows):
+            return 0
+
+        new = _sorted_rows(rows)
+        path = self._path(exchange_id, symbol, timeframe)
+        with self._locked(path):
+            last = self.last_timestamp(exchange_id, symbol, timeframe)
+
+            if last is not None:
+                new = new[new[:, 0] >= last]
+                if len(new) and new[0, 0] == last:
+                    with open(path, 'r+b') as f:
+                        f.seek(-_ROW_BYTES, os.SEEK_END)
+                        f.write(new[0].tobytes())
+                    new = new[1:]
+
+            if len(new):
+                with open(path, 'ab') as f:
+                    f.write(np.ascontiguousarray(new).tobytes())
+            else:
+                os.utime(path)
+        return len(new)
+
+    def backfill(self,
+                 exchange_id: str,
+                 symbol: str,
+                 timeframe: str,
+                 rows: Sequence[Sequence[float]]) -> int:
+        """
+        Merge rows that may reach further back than the stored history
+
+        The merged series is written to a new file and swapped in, so views
+        returned by earlier reads stay valid.
+
+        :return: Number of candles added
+        """
+        if not len(rows):
+            return 0
+
+        new = _sorted_rows(rows)
+        path = self._path(exchange_id, symbol, timeframe)
+        with self._locked(path):
+            old = self.read(exchange_id, symbol, timeframe)
+            merged = np.concatenate([old[old[:, 0] < new[0, 0]], new, old[old[:, 0] > new[-1, 0]]])
+
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(np.ascontiguousarray(merged).tobytes())
+            os.replace(tmp, path)
+            self._maps.pop(path, None)
+        return len(merged) - len(old)
+
+
+def _sorted_rows(rows: Sequence[Sequence[float]]) -> np.ndarray:
+    """Rows as an (n, 6) float64 array ordered by open time, last duplicate wins"""
+    data = np.asarray(rows, dtype=np.float64).reshape(-1, len(COLUMNS))
+    data = data[np.argsort(data[:, 0], kind='stable')]
+    if len(data) > 1:
+        data = data[np.append(data[1:, 0] != data[:-1, 0], True)]
+    return data
@@ -0,0 +1,233 @@
+import numpy as np
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+from .store import COLUMNS
+from .analysis import ema
+
+try:
+    import numba
+except ImportError:  # Kernels then run as plain Python loops
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# Signal values: target direction per (symbol, bar)
+LONG, FLAT, SHORT = 1, 0, -1
+TRENDS = {LONG: 'up', FLAT: 'flat', SHORT: 'down'}
+
+
+def kernel(func):
+    """
+    Compile a loop kernel with numba when it is installed
+
+    Kernels must be written in the numba nopython subset (NumPy arrays and
+    scalars only) so the same source runs compiled or interpreted.
+    """
+    if numba is None:
+        return func
+    return numba.njit(cache=True, nogil=True)(func)
+
+
+class Strategy:
+    """
+    Signal generator over a (symbols, bars) candle block
+
+    Subclasses declare the candle columns they read in `inputs` and
+    implement generate(), which returns int8 signals (LONG/FLAT/SHORT) for
+    every bar. evaluate() runs it over a whole history for bulk
+    evaluation, latest() over the last `lookback` bars for the live loop,
+    so both paths share one implementation.
+
+    Signals are target positions: FLAT means no position. Strategies whose
+    bars depend on earlier bars beyond `lookback` (see TrailingStop) return
+    a carry array from new_state() that latest() updates between calls.
+    """
+    inputs: Tuple[str, ...] = ('close',)
+    lookback: int = 100
+
+    def generate(self, inputs: Mapping[str, np.ndarray]) -> np.ndarray:
+        """
+        :param inputs: Declared column -> contiguous (symbols, bars) float64 array
+        :return: (symbols, bars) int8 signals
+        """
+        raise NotImplementedError
+
+    def prepare(self, ohlcv: np.ndarray) -> Dict[str, np.ndarray]:
+        """Slice only the declared columns out of a (symbols, bars, 6) block"""
+        missing = [name for name in self.inputs if name not in COLUMNS]
+        if missing:
+            raise ValueError(f"Unknown candle columns {missing}, expected some of {COLUMNS}")
+        return {name: np.ascontiguousarray(ohlcv[..., COLUMNS.index(name)], dtype=np.float64)
+                for name in self.inputs}
+
+    def evaluate(self, ohlcv: np.ndarray) -> np.ndarray:
+        """
+        Signals on every bar
+
+        :param ohlcv: (bars, 6) or (symbols, bars, 6) candles with columns COLUMNS
+        :return: int8 signals shaped like ohlcv without its last axis
+        """
+        ohlcv = np.asarray(ohlcv)
+        block = ohlcv[None] if ohlcv.ndim == 2 else ohlcv
+        signals = self.generate(self.prepare(block))
+        return signals[0] if ohlcv.ndim == 2 else signals
+
+    def new_state(self, symbols: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        State carried between latest() calls, None for stateless strategies
+
+        :param symbols: Rows for a (symbols, bars, 6) block, None for one series
+        """
+        return None
+
+    def latest(self, ohlcv: np.ndarray, state: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Signals on the last bar from the trailing `lookback` bars
+
+        :param state: Array from new_state(), updated in place
+        """
+        return self.evaluate(np.asarray(ohlcv)[..., -self.lookback:, :])[..., -1]
+
+
+class TrendStrategy(Strategy):
+    inputs = ('close',)
+
+    def __init__(self, ema_fast: int = 12, ema_slow: int = 26, macd_signal: int = 9,
+                 lookback: Optional[int] = None):
+        """
+        EMA crossover confirmed by the MACD histogram, the rule of IndicatorSet.trend
+
+        :param lookback: Live bars used to warm up the EMAs, defaults to 4x the slow span
+        """
+        self.ema_fast = ema_fast
+        self.ema_slow = ema_slow
+        self.macd_signal = macd_signal
+        self.lookback = lookback or 4 * ema_slow
+
+    def generate(self, inputs):
+        close = inputs['close']
+        fast = ema(close, self.ema_fast)
+        slow = ema(close, self.ema_slow)
+        macd = fast - slow
+        hist = macd - ema(macd, self.macd_signal)
+        signals = np.zeros(close.shape, dtype=np.int8)
+        signals[(fast > slow) & (hist > 0)] = LONG
+        signals[(fast < slow) & (hist < 0)] = SHORT
+        return signals
+
+
+@kernel
+def _trailing_stop(close, entries, stop, out, carry, start, commit):
+    # Position state machine; each bar depends on the previous one, so it cannot be vectorized.
+    # carry[s] = (position, extreme, blocked) before bar start[s], overwritten after bar commit[s] - 1
+    for s in range(close.shape[0]):
+        position = int(carry[s, 0])
+        extreme = carry[s, 1]
+        blocked = int(carry[s, 2])
+        for t in range(start[s], close.shape[1]):
+            signal = entries[s, t]
+            price = close[s, t]
+            if signal != blocked:
+                blocked = 0
+            if signal != 0 and signal != position and signal != blocked:
+                position = signal
+                extreme = price
+            elif position == 1:
+                if price > extreme:
+                    extreme = price
+                elif price <= extreme * (1.0 - stop):
+                    position = 0
+                    blocked = 1
+            elif position == -1:
+                if price < extreme:
+                    extreme = price
+                elif price >= extreme * (1.0 + stop):
+                    position = 0
+                    blocked = -1
+            out[s, t] = position
+            if t == commit[s] - 1:
+                carry[s, 0] = position
+                carry[s, 1] = extreme
+                carry[s, 2] = blocked
+
+
+class TrailingStop(Strategy):
+    # new_state() columns: open time of the last committed bar, then the kernel carry
+    STATE_SIZE = 4
+
+    def __init__(self, entry: Strategy, stop_pct: float = 2.0):
+        """
+        Follow another strategy's entries and exit on a trailing stop
+
+        After a stop the position stays flat until the entry signal changes,
+        so a persisting signal does not re-enter on the next bar. The stop
+        depends on every bar since entry, so live use passes a new_state()
+        array to latest() instead of replaying only `lookback` bars.
+
+        :param entry: Strategy providing the entry direction
+        :param stop_pct: Distance of the stop from the best price since entry (%)
+        """
+        self.entry = entry
+        self.stop_pct = stop_pct
+        self.inputs = tuple(dict.fromkeys(entry.inputs + ('close',)))
+        self.lookback = entry.lookback
+
+    def generate(self, inputs):
+        entries = np.ascontiguousarray(self.entry.generate(inputs), dtype=np.int8)
+        symbols, bars = entries.shape
+        out = np.empty(entries.shape, dtype=np.int8)
+        _trailing_stop(inputs['close'], entries, self.stop_pct / 100.0, out,
+                       np.zeros((symbols, 3)), np.zeros(symbols, dtype=np.int64),
+                       np.full(symbols, bars, dtype=np.int64))
+        return out
+
+    def new_state(self, symbols: Optional[int] = None) -> np.ndarray:
+        state = np.zeros((1 if symbols is None else symbols, self.STATE_SIZE))
+        state[:, 0] = -np.inf
+        return state[0] if symbols is None else state
+
+    def latest(self, ohlcv: np.ndarray, state: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Position on the last bar, stepping the stop only over bars newer than `state`
+
+        The last bar may still be forming, so it is evaluated from the
+        committed state but only committed once a newer bar arrives.
+        """
+        if state is None:
+            return super().latest(ohlcv)
+        ohlcv = np.asarray(ohlcv)
+        block = ohlcv[None] if ohlcv.ndim == 2 else ohlcv
+        rows = state[None] if state.ndim == 1 else state
+        window = block[:, -self.lookback:, :]
+        inputs = self.prepare(window)
+        entries = np.ascontiguousarray(self.entry.generate(inputs), dtype=np.int8)
+        symbols, bars = entries.shape
+
+        times = window[..., 0]
+        start = np.array([np.searchsorted(times[s], rows[s, 0], 'right') for s in range(symbols)], dtype=np.int64)
+        # Bars before the window that were never committed cannot be recovered; start at the window
+        start = np.minimum(start, bars - 1)
+        commit = np.full(symbols, bars - 1, dtype=np.int64)
+        carry = np.ascontiguousarray(rows[:, 1:])
+        out = np.zeros(entries.shape, dtype=np.int8)
+        _trailing_stop(inputs['close'], entries, self.stop_pct / 100.0, out, carry, start, commit)
+
+        committed = start < bars - 1
+        rows[committed, 0] = times[committed, bars - 2]
+        rows[committed, 1:] = carry[committed]
+        signals = out[:, -1]
+        return signals[0] if ohlcv.ndim == 2 else signals
+
+
+def stack_windows(candles: Sequence[np.ndarray], bars: int) -> np.ndarray:
+    """
+    Stack the last `bars` candles of several symbols into one (symbols, bars, 6) block
+
+    Series shorter than `bars` are front-padded with their first candle,
+    which keeps EMA-type strategies seeded the same way as on the short series.
+    """
+    block = np.empty((len(candles), bars, len(COLUMNS)))
+    for i, rows in enumerate(candles):
+        rows = np.asarray(rows, dtype=np.float64)[-bars:]
+        block[i, bars - len(rows):] = rows
+        block[i, :bars - len(rows)] = rows[0]
+    return block
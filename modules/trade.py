@@ -1,13 +1,15 @@
-from ccxt import binance
 import time
+import ccxt
+from .markets import MarketCache
+from .exchange_pool import ExchangePool
 
 class Trader:
-    def __init__(self, api_key, secret):
-        self.exchange = binance({
-            'apiKey': api_key,
-            'secret': secret,
-            'enableRateLimit': True  # مهم لمنع تجاوز حد الطلبات
-        })
+    def __init__(self, api_key, secret, markets=None):
+        # عميل مشترك مع بقية الوحدات: جلسة HTTP واحدة ومحدد طلبات واحد لكل بورصة
+        self.exchange = ExchangePool.shared().get('binance', api_key, secret)
+        # بيانات الأسواق (الدقة والحدود) مشتركة مع بقية العملاء ومحفوظة على القرص
+        self.markets = markets if markets is not None else MarketCache.shared('binance')
+        self.markets.attach(self.exchange, fetch=False)
     
     def execute_order(self, symbol, side, amount, max_retries=3):
         """
@@ -19,6 +21,8 @@ class Trader:
         :param max_retries: عدد المحاولات عند الفشل
         :return: نتيجة التنفيذ أو None إذا فشل
         """
+        # التقريب لدقة السوق والتحقق من الحدود محلياً قبل الإرسال
+        amount, _ = self.markets.prepare_order(self.exchange, symbol, amount)
         for attempt in range(max_retries):
             try:
                 order = self.exchange.create_order(
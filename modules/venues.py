@@ -0,0 +1,240 @@
+import time
+import logging
+import threading
+import ccxt
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .markets import MarketCache
+from .exchange_pool import ExchangePool
+
+logger = logging.getLogger(__name__)
+
+
+class ConsolidatedBook:
+    def __init__(self, venues: Sequence[str], max_age: float = 5.0, capacity: int = 256):
+        """
+        Top of book of every symbol on every venue, kept as (symbols, venues) arrays
+
+        Best bid/ask across venues is one argmax/argmin per row, so the whole
+        view is recomputed for hundreds of symbols in a few numpy calls.
+
+        :param venues: Exchange ids, one column each
+        :param max_age: Seconds after which a venue's quote is ignored
+        :param capacity: Initial number of symbol rows, doubled when full
+        """
+        self.venues = list(venues)
+        self.max_age = max_age
+        self.symbols: Dict[str, int] = {}
+        shape = (capacity, len(self.venues))
+        self.bids = np.full(shape, -np.inf)
+        self.asks = np.full(shape, np.inf)
+        self.bid_sizes = np.zeros(shape)
+        self.ask_sizes = np.zeros(shape)
+        self.updated = np.full(shape, -np.inf)
+        self._columns = {venue: i for i, venue in enumerate(self.venues)}
+        self._lock = threading.Lock()
+
+    def _row(self, symbol: str) -> int:
+        row = self.symbols.get(symbol)
+        if row is None:
+            row = self.symbols[symbol] = len(self.symbols)
+            if row == len(self.bids):
+                pad = len(self.bids)
+                self.bids = np.vstack((self.bids, np.full((pad, len(self.venues)), -np.inf)))
+                self.asks = np.vstack((self.asks, np.full((pad, len(self.venues)), np.inf)))
+                self.bid_sizes = np.vstack((self.bid_sizes, np.zeros((pad, len(self.venues)))))
+                self.ask_sizes = np.vstack((self.ask_sizes, np.zeros((pad, len(self.venues)))))
+                self.updated = np.vstack((self.updated, np.full((pad, len(self.venues)), -np.inf)))
+        return row
+
+    def set_quote(self,
+                  venue: str,
+                  symbol: str,
+                  bid: Optional[float],
+                  ask: Optional[float],
+                  bid_size: Optional[float] = None,
+                  ask_size: Optional[float] = None,
+                  now: Optional[float] = None):
+        """Replace one venue's top of book for a symbol"""
+        with self._lock:
+            self._set(self._columns[venue], symbol, bid, ask, bid_size, ask_size,
+                      time.monotonic() if now is None else now)
+
+    def _set(self, col, symbol, bid, ask, bid_size, ask_size, now):
+        row = self._row(symbol)
+        self.bids[row, col] = bid if bid else -np.inf
+        self.asks[row, col] = ask if ask else np.inf
+        self.bid_sizes[row, col] = bid_size or 0.0
+        self.ask_sizes[row, col] = ask_size or 0.0
+        self.updated[row, col] = now
+
+    def update_tickers(self, venue: str, tickers: Dict[str, Dict]):
+        """Apply a ccxt fetch_tickers result under one lock acquisition"""
+        col, now = self._columns[venue], time.monotonic()
+        with self._lock:
+            for symbol, ticker in tickers.items():
+                self._set(col, symbol, ticker.get('bid'), ticker.get('ask'),
+                          ticker.get('bidVolume'), ticker.get('askVolume'), now)
+
+    def update_order_book(self, venue: str, symbol: str, book: Dict):
+        """Apply the top level of a ccxt order book"""
+        bid = book['bids'][0] if book.get('bids') else (None, None)
+        ask = book['asks'][0] if book.get('asks') else (None, None)
+        self.set_quote(venue, symbol, bid[0], ask[0], bid[1], ask[1])
+
+    def best(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        Consolidated best bid and ask per symbol from quotes younger than max_age
+
+        :return: {symbol: {bid, bid_size, bid_venue, ask, ask_size, ask_venue}},
+            sides without a live quote are None
+        """
+        with self._lock:
+            names = list(self.symbols) if symbols is None else [s for s in symbols if s in self.symbols]
+            rows = np.fromiter((self.symbols[s] for s in names), np.int64, len(names))
+            bids, asks = self.bids[rows], self.asks[rows]
+            bid_sizes, ask_sizes = self.bid_sizes[rows], self.ask_sizes[rows]
+            live = time.monotonic() - self.updated[rows] < self.max_age
+
+        bids[~live], asks[~live] = -np.inf, np.inf
+        idx = np.arange(len(names))
+        b, a = bids.argmax(axis=1), asks.argmin(axis=1)
+        best_bid, best_ask = bids[idx, b], asks[idx, a]
+        result = {}
+        for i, symbol in enumerate(names):
+            has_bid, has_ask = np.isfinite(best_bid[i]), np.isfinite(best_ask[i])
+            result[symbol] = {
+                'bid': float(best_bid[i]) if has_bid else None,
+                'bid_size': float(bid_sizes[i, b[i]]) if has_bid else None,
+                'bid_venue': self.venues[b[i]] if has_bid else None,
+                'ask': float(best_ask[i]) if has_ask else None,
+                'ask_size': float(ask_sizes[i, a[i]]) if has_ask else None,
+                'ask_venue': self.venues[a[i]] if has_ask else None,
+            }
+        return result
+
+    def best_venue(self,
+                   symbol: str,
+                   side: str,
+                   venues: Optional[Iterable[str]] = None) -> Optional[Tuple[str, float, float]]:
+        """
+        Venue with the best live price to trade against: lowest ask to buy, highest bid to sell
+
+        :param venues: Only consider these venues (e.g. those we hold an account on)
+        :return: (venue, price, size) or None without a live quote
+        """
+        with self._lock:
+            row = self.symbols.get(symbol)
+            if row is None:
+                return None
+            prices = (self.asks if side == 'buy' else self.bids)[row].copy()
+            sizes = (self.ask_sizes if side == 'buy' else self.bid_sizes)[row].copy()
+            live = time.monotonic() - self.updated[row] < self.max_age
+        worst = np.inf if side == 'buy' else -np.inf
+        prices[~live] = worst
+        if venues is not None:
+            allowed = np.zeros(len(self.venues), dtype=bool)
+            allowed[[self._columns[v] for v in venues if v in self._columns]] = True
+            prices[~allowed] = worst
+        col = int(prices.argmin() if side == 'buy' else prices.argmax())
+        if not np.isfinite(prices[col]):
+            return None
+        return self.venues[col], float(prices[col]), float(sizes[col])
+
+
+class VenueAggregator:
+    def __init__(self, clients: Dict[str, object], max_age: float = 5.0, max_workers: int = 16):
+        """
+        Concurrent ticker/order book polling of several exchanges into one ConsolidatedBook
+
+        :param clients: {exchange_id: sync ccxt client}
+        :param max_age: Seconds a venue's quote stays usable for routing
+        :param max_workers: Exchange calls in flight across all venues
+        """
+        self.clients = dict(clients)
+        self.book = ConsolidatedBook(list(self.clients), max_age)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='venue')
+
+    @classmethod
+    def connect(cls,
+                exchange_ids: Sequence[str],
+                markets_root: str = 'data/markets',
+                markets_ttl: float = 6 * 3600,
+                **kwargs) -> 'VenueAggregator':
+        """Aggregator over the pooled public clients of the given exchanges"""
+        pool = ExchangePool.shared()
+        clients = {}
+        for exchange_id in exchange_ids:
+            client = clients[exchange_id] = pool.get(exchange_id)
+            MarketCache.shared(exchange_id, markets_root, ttl=markets_ttl).attach(client, fetch=False)
+        return cls(clients, **kwargs)
+
+    def _listed(self, venue: str, symbols: List[str]) -> List[str]:
+        markets = getattr(self.clients[venue], 'markets', None)
+        return [s for s in symbols if s in markets] if markets else symbols
+
+    def _fetch_tickers(self, venue: str, symbols: List[str]) -> int:
+        client = self.clients[venue]
+        symbols = self._listed(venue, symbols)
+        if not symbols:
+            return 0
+        if client.has.get('fetchTickers'):
+            # One request for all symbols of the venue
+            tickers = client.fetch_tickers(symbols)
+        else:
+            tickers = {s: client.fetch_ticker(s) for s in symbols}
+        self.book.update_tickers(venue, {s: t for s, t in tickers.items() if s in symbols})
+        return len(tickers)
+
+    def refresh(self, symbols: Iterable[str]) -> Dict[str, bool]:
+        """
+        Fetch tickers of all symbols from every venue in parallel
+
+        A failing venue is logged and keeps its old (aging) quotes.
+
+        :return: {venue: True if its quotes were updated}
+        """
+        symbols = list(symbols)
+        futures = {venue: self._pool.submit(self._fetch_tickers, venue, symbols) for venue in self.clients}
+        results = {}
+        for venue, future in futures.items():
+            try:
+                future.result()
+                results[venue] = True
+            except ccxt.BaseError as e:
+                logger.warning(f"Ticker refresh failed on {venue}: {e}")
+                results[venue] = False
+        return results
+
+    def refresh_order_books(self, symbol: str, limit: int = 5) -> Dict[str, bool]:
+        """Fetch one symbol's order book from every venue listing it, in parallel"""
+        def fetch(venue):
+            self.book.update_order_book(venue, symbol, self.clients[venue].fetch_order_book(symbol, limit))
+
+        futures = {venue: self._pool.submit(fetch, venue)
+                   for venue in self.clients if self._listed(venue, [symbol])}
+        results = {}
+        for venue, future in futures.items():
+            try:
+                future.result()
+                results[venue] = True
+            except ccxt.BaseError as e:
+                logger.warning(f"Order book refresh failed on {venue}: {e}")
+                results[venue] = False
+        return results
+
+    def best_venue(self,
+                   symbol: str,
+                   side: str,
+                   venues: Optional[Iterable[str]] = None) -> Optional[Tuple[str, float, float]]:
+        """Best live venue for an order, refreshing the symbol's quotes once if none is live"""
+        venues = list(venues) if venues is not None else None
+        quote = self.book.best_venue(symbol, side, venues)
+        if quote is None:
+            self.refresh([symbol])
+            quote = self.book.best_venue(symbol, side, venues)
+        return quote
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,89 @@
+import itertools
+import numpy as np
+
+HOUR = 3_600_000
+
+
+class FakeExchange:
+    """
+    بورصة وهمية حتمية بواجهة ccxt المتزامنة
+
+    الشموع تُولد من بذرة ثابتة لكل رمز، والأوامر تُعبأ فوراً بسعر آخر شمعة،
+    فتعطي الاختبارات والقياسات نفس النتيجة في كل تشغيل دون شبكة.
+    """
+    has = {'cancelAllOrders': False, 'fetchTickers': True}
+
+    def __init__(self, bars: int = 5000, seed: int = 7, timeframe_ms: int = HOUR, balance: float = 10000.0,
+                 price_scale: float = 1.0, spread: float = 0.001):
+        self.bars = bars
+        # منصات وهمية متعددة بنفس السلسلة: مضاعف للسعر وفارق بين العرض والطلب
+        self.price_scale = price_scale
+        self.spread = spread
+        self.seed = seed
+        self.timeframe_ms = timeframe_ms
+        self.balance = {'USDT': balance}
+        self.markets = {}
+        self.requests = 0
+        self._series = {}
+        self._ids = itertools.count(1)
+
+    def candles(self, symbol: str) -> np.ndarray:
+        if symbol not in self._series:
+            rng = np.random.default_rng([self.seed, sum(map(ord, symbol))])
+            close = 100 * self.price_scale * np.exp(np.cumsum(rng.normal(0, 0.01, self.bars)))
+            candles = np.empty((self.bars, 6))
+            candles[:, 0] = np.arange(self.bars) * self.timeframe_ms
+            candles[:, 1] = np.concatenate(([close[0]], close[:-1]))
+            candles[:, 2] = np.maximum(candles[:, 1], close) * 1.002
+            candles[:, 3] = np.minimum(candles[:, 1], close) * 0.998
+            candles[:, 4] = close
+            candles[:, 5] = 1000.0
+            self._series[symbol] = candles
+        return self._series[symbol]
+
+    # --- واجهة ccxt ---
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return self.timeframe_ms // 1000
+
+    def milliseconds(self) -> int:
+        return self.bars * self.timeframe_ms
+
+    def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=None):
+        self.requests += 1
+        candles = self.candles(symbol)
+        if since is not None:
+            candles = candles[np.searchsorted(candles[:, 0], since):]
+            return candles[:limit or 1000].tolist()
+        return candles[-(limit or 500):].tolist()
+
+    def _ticker(self, symbol):
+        last = float(self.candles(symbol)[-1, 4])
+        half = last * self.spread / 2
+        return {'symbol': symbol, 'last': last, 'bid': last - half, 'ask': last + half,
+                'bidVolume': 1.0, 'askVolume': 1.0}
+
+    def fetch_ticker(self, symbol):
+        self.requests += 1
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols=None):
+        self.requests += 1
+        return {s: self._ticker(s) for s in symbols or self._series}
+
+    def fetch_order_book(self, symbol, limit=None):
+        self.requests += 1
+        ticker = self._ticker(symbol)
+        return {'symbol': symbol, 'bids': [[ticker['bid'], 1.0]], 'asks': [[ticker['ask'], 1.0]]}
+
+    def fetch_balance(self):
+        self.requests += 1
+        return {'free': dict(self.balance), 'used': {k: 0.0 for k in self.balance}, 'total': dict(self.balance)}
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self.requests += 1
+        price = price or float(self.candles(symbol)[-1, 4])
+        return {'id': str(next(self._ids)), 'clientOrderId': (params or {}).get('clientOrderId'),
+                'symbol': symbol, 'type': type, 'side': side, 'amount': amount, 'price': price,
+                'filled': amount, 'remaining': 0.0, 'cost': amount * price, 'average': price,
+                'status': 'closed'}
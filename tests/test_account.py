@@ -0,0 +1,75 @@
+import ccxt
+import pytest
+from modules.account import AccountState, StaleAccountError
+from modules.advanced_trader import AdvancedTrader
+from modules.markets import MarketCache
+
+
+class FakeBalanceExchange:
+    def __init__(self, usdt=1000.0, btc=0.0):
+        self.total = {'USDT': usdt, 'BTC': btc}
+        self.calls = 0
+        self.down = False
+
+    def fetch_balance(self):
+        self.calls += 1
+        if self.down:
+            raise ccxt.NetworkError('down')
+        return {'free': dict(self.total), 'used': {k: 0.0 for k in self.total}, 'total': dict(self.total)}
+
+
+class TestAccountState:
+    @pytest.fixture
+    def exchange(self):
+        return FakeBalanceExchange()
+
+    def test_reads_from_memory_between_reconciliations(self, exchange):
+        account = AccountState(exchange, reconcile_interval=60)
+        for _ in range(20):
+            assert account.get_balance('USDT') == 1000.0
+        assert exchange.calls == 1
+
+    def test_own_fills_update_balances_once(self, exchange):
+        account = AccountState(exchange)
+        account.get_balance()
+        order = {'clientOrderId': 'a', 'symbol': 'BTC/USDT', 'side': 'buy', 'amount': 0.02,
+                 'filled': 0.01, 'cost': 500.0, 'status': 'open'}
+        account.on_order_update(order)
+        account.on_order_update(order)  # نفس التعبئة لا تُحسب مرتين
+        account.on_order_update({**order, 'filled': 0.02, 'cost': 1000.0, 'status': 'closed',
+                                 'fee': {'cost': 1.0, 'currency': 'USDT'}})
+        assert account.get_balance('BTC') == pytest.approx(0.02)
+        assert account.get_balance('USDT') == pytest.approx(-1.0)
+        assert exchange.calls == 1
+
+    def test_user_data_stream_counts_as_reconciliation(self, exchange):
+        account = AccountState(exchange, reconcile_interval=0)
+        account.handle_account_update({'e': 'outboundAccountPosition',
+                                       'B': [{'a': 'USDT', 'f': '700', 'l': '300'}]})
+        assert account.balances['USDT'] == {'free': 700.0, 'used': 300.0, 'total': 1000.0}
+
+    def test_staleness_bound(self, exchange, monkeypatch):
+        account = AccountState(exchange, reconcile_interval=10, max_staleness=30)
+        account.get_balance()
+        exchange.down = True
+        synced = account.synced_at
+        # فشل المصالحة مقبول ما دامت الحالة أحدث من الحد
+        monkeypatch.setattr('modules.account.time.monotonic', lambda: synced + 20)
+        assert account.get_balance('USDT') == 1000.0
+        monkeypatch.setattr('modules.account.time.monotonic', lambda: synced + 31)
+        with pytest.raises(StaleAccountError):
+            account.get_balance('USDT')
+
+    def test_trader_does_not_hide_stale_state(self, exchange, monkeypatch, tmp_path):
+        account = AccountState(exchange, reconcile_interval=10, max_staleness=30)
+        trader = AdvancedTrader('key', 'secret', markets=MarketCache('binance', tmp_path), account=account)
+        try:
+            assert trader.get_balance('USDT') == 1000.0
+            exchange.down = True
+            synced = account.synced_at
+            monkeypatch.setattr('modules.account.time.monotonic', lambda: synced + 31)
+            # رصيد 0.0 كان سيبدو حساباً فارغاً
+            with pytest.raises(StaleAccountError):
+                trader.get_balance('USDT')
+        finally:
+            trader.executor.stop()
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+import pandas as pd
+from modules.analysis import TechnicalAnalyzer, calculate_rsi, ema, sma, rsi, wilder, _recursive_scan, SCAN_MAX_SERIES
+
+
+@pytest.fixture
+def ohlcv():
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, size=(3, 200)), axis=-1)
+    data = np.empty((3, 200, 6))
+    data[..., 0] = np.arange(200) * 60_000
+    data[..., 1] = close
+    data[..., 2] = close + 1
+    data[..., 3] = close - 1
+    data[..., 4] = close
+    data[..., 5] = rng.uniform(1, 10, size=(3, 200))
+    return data
+
+
+class TestKernels:
+    def test_sma_matches_pandas(self, ohlcv):
+        close = ohlcv[..., 4]
+        expected = pd.Series(close[1]).rolling(20).mean().to_numpy()
+        np.testing.assert_allclose(sma(close, 20)[1], expected, equal_nan=True)
+
+    def test_ema_matches_pandas(self, ohlcv):
+        close = ohlcv[..., 4]
+        expected = pd.Series(close[2]).ewm(span=12, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(ema(close, 12)[2], expected)
+
+    def test_wilder_rsi(self, ohlcv):
+        close = ohlcv[0, :, 4]
+        delta = np.diff(close)
+        gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+        # مرجع حلقي لتنعيم وايلدر
+        avg_gain, avg_loss = gain[:14].mean(), loss[:14].mean()
+        for g, l in zip(gain[14:], loss[14:]):
+            avg_gain = (avg_gain * 13 + g) / 14
+            avg_loss = (avg_loss * 13 + l) / 14
+        expected = 100 - 100 / (1 + avg_gain / avg_loss)
+        assert rsi(close[None])[0, -1] == pytest.approx(expected)
+        assert np.isnan(rsi(close[None])[0, :14]).all()
+
+    def test_scan_and_blocked_paths_agree(self):
+        rng = np.random.default_rng(1)
+        x = 100 + np.cumsum(rng.normal(0, 1, size=(SCAN_MAX_SERIES, 3000)), axis=-1)
+        # الكتل بضرب المصفوفات لعدد كبير من السلاسل، والمجاميع التراكمية للقليل
+        np.testing.assert_allclose(ema(x, 26)[:2], _recursive_scan(x[:2], 2 / 27, 0, x[:2, 0]), rtol=1e-12)
+
+    def test_wilder_short_series(self):
+        assert np.isnan(wilder(np.ones((2, 5)), 14)).all()
+
+    def test_legacy_rsi_still_available(self, ohlcv):
+        assert len(calculate_rsi(pd.Series(ohlcv[0, :, 4]))) == 200
+
+
+class TestTechnicalAnalyzer:
+    def test_batch_shapes(self, ohlcv):
+        indicators = TechnicalAnalyzer().compute(ohlcv)
+        for name, values in indicators.items():
+            assert values.shape == (3, 200), name
+        assert (indicators['bb_upper'][:, -1] > indicators['bb_lower'][:, -1]).all()
+        assert (indicators['atr'][:, -1] > 0).all()
+
+    def test_single_symbol_matches_batch(self, ohlcv):
+        analyzer = TechnicalAnalyzer()
+        batch = analyzer.compute(ohlcv)
+        single = analyzer.compute(ohlcv[1])
+        np.testing.assert_allclose(single['macd'], batch['macd'][1])
+
+    def test_trend(self):
+        close = np.linspace(100, 200, 100)
+        data = np.column_stack([np.arange(100), close, close, close, close, np.ones(100)])
+        analyzer = TechnicalAnalyzer()
+        assert analyzer.trend(analyzer.compute(data)) == 'up'
+        assert analyzer.trend(analyzer.compute(data[::-1])) == 'down'
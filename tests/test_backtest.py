@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from main import TradingBot
+from core.backtest.engine import Backtester, vectorized_backtest
+from core.backtest.exchange import SimulatedExchange
+from core.risk_management.manager import RiskManager
+
+
+def make_candles(n=2000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    candles = np.empty((n, 6))
+    candles[:, 0] = np.arange(n) * 3_600_000
+    candles[:, 1] = np.roll(close, 1)
+    candles[0, 1] = close[0]
+    candles[:, 2] = np.maximum(candles[:, 1], close) * 1.002
+    candles[:, 3] = np.minimum(candles[:, 1], close) * 0.998
+    candles[:, 4] = close
+    candles[:, 5] = 1000.0
+    return candles
+
+
+class TestSimulatedExchange:
+    @pytest.fixture
+    def exchange(self):
+        exchange = SimulatedExchange(initial_balance=1000, fee_rate=0.001, slippage=0.0)
+        exchange.set_bar('BTC/USDT', [0, 100, 101, 99, 100, 50])
+        return exchange
+
+    def test_market_order_fees(self, exchange):
+        order = exchange.execute_order('BTC/USDT', 'buy', 1.0)
+        assert order['status'] == 'closed'
+        assert exchange.cash == pytest.approx(1000 - 100 - 0.1)
+        assert exchange.get_balance('BTC') == 1.0
+
+    def test_partial_fill_by_volume(self, exchange):
+        order = exchange.execute_order('BTC/USDT', 'buy', 6.0)
+        assert order['status'] == 'partially_filled'
+        assert order['filled'] == pytest.approx(5.0)  # 10% من حجم 50
+
+    def test_limit_order_fills_when_crossed(self, exchange):
+        order = exchange.execute_order('BTC/USDT', 'buy', 0.1, order_type='limit', price=98)
+        assert order['status'] == 'open'
+        exchange.set_bar('BTC/USDT', [1, 100, 100, 97, 98.5, 50])
+        assert order['status'] == 'closed'
+        assert order['average'] == 98
+
+    def test_spot_cannot_sell_more_than_held(self, exchange):
+        order = exchange.execute_order('BTC/USDT', 'sell', 1.0)
+        assert order['filled'] == 0
+
+
+class TestBacktester:
+    def test_event_driven_run(self, tmp_path):
+        exchange = SimulatedExchange(initial_balance=10000)
+        bot = TradingBot(data_fetcher=object(), trader=exchange,
+                         risk_manager=RiskManager(), live_trading=True)
+        result = Backtester(bot, exchange).run('BTC/USDT', make_candles())
+        summary = result.summary()
+        assert summary['bars'] == 2000
+        assert summary['trades'] > 0
+        assert 0 <= summary['max_drawdown'] < 1
+        assert result.equity.shape == result.drawdown.shape == (2000,)
+
+    def test_vectorized_matches_manual(self):
+        close = np.array([100.0, 110.0, 99.0, 99.0])
+        positions = np.array([1.0, 1.0, 0.0, 0.0])
+        result = vectorized_backtest(close, positions, initial_balance=1.0, fee_rate=0.0, slippage=0.0)
+        np.testing.assert_allclose(result.equity, [1.0, 1.1, 0.99, 0.99])
+        assert result.drawdown.max() == pytest.approx(0.1)
+        assert len(result.trades) == 2
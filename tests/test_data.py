@@ -1,11 +1,25 @@
 import pytest
 from modules.data import DataFetcher
+from modules.store import CandleStore
+from tests.fakes import FakeExchange
 
 class TestDataFetcher:
     @pytest.fixture
-    def fetcher(self):
-        return DataFetcher(exchange_id='binance')
+    def fetcher(self, tmp_path):
+        # بورصة وهمية حتمية بدل الاتصال الحي
+        fetcher = DataFetcher(exchange_id='binance', store=CandleStore(tmp_path))
+        fetcher.exchange = FakeExchange()
+        return fetcher
 
     def test_get_ohlcv(self, fetcher):
         data = fetcher.get_ohlcv('BTC/USDT', limit=10)
-        assert len(data) <= 10
\ No newline at end of file
+        assert len(data) == 10
+        assert data.tolist() == fetcher.exchange.candles('BTC/USDT')[-10:].tolist()
+
+    def test_get_ohlcv_is_not_rewritten_by_store(self, fetcher):
+        data = fetcher.get_ohlcv('BTC/USDT', limit=10)
+        last = data.tolist()[-1]
+        # الشمعة الجارية تُعاد كتابتها في مكانها داخل الملف
+        fetcher.store.write('binance', 'BTC/USDT', '1h', [[last[0], 1.0, 2.0, 0.5, 1.5, 9.0]])
+        assert fetcher.store.read('binance', 'BTC/USDT', '1h')[-1, 4] == 1.5
+        assert data.tolist()[-1] == last
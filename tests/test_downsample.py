@@ -0,0 +1,24 @@
+import numpy as np
+from modules.downsample import lttb
+
+
+class TestLTTB:
+    def test_short_series_unchanged(self):
+        x = np.arange(5.0)
+        assert np.array_equal(lttb(x, x, 10), np.arange(5))
+
+    def test_keeps_endpoints_and_size(self):
+        rng = np.random.default_rng(0)
+        x = np.arange(100_000.0)
+        y = np.cumsum(rng.normal(size=x.size))
+        kept = lttb(x, y, 1000)
+        assert len(kept) == 1000
+        assert kept[0] == 0 and kept[-1] == x.size - 1
+        assert np.all(np.diff(kept) > 0)
+
+    def test_keeps_spikes(self):
+        # القمم والقيعان المعزولة يجب ألا تضيع عند التقليص
+        y = np.zeros(1000)
+        y[333], y[777] = 50.0, -50.0
+        kept = lttb(np.arange(1000.0), y, 20)
+        assert 333 in kept and 777 in kept
@@ -0,0 +1,52 @@
+import time
+import threading
+import pytest
+from modules.exchange_pool import ExchangePool, RateLimiter
+
+
+def slow_fetch(url, method='GET', headers=None, body=None):
+    """استجابة HTTP وهمية بطيئة بدل الشبكة"""
+    time.sleep(0.05)
+    return []
+
+
+class TestRateLimiter:
+    def test_waits_for_weight(self):
+        limiter = RateLimiter(rate=100, capacity=10)
+        assert limiter.acquire(10) == 0
+        start = time.monotonic()
+        limiter.acquire(5)
+        assert time.monotonic() - start == pytest.approx(0.05, abs=0.03)
+
+
+class TestExchangePool:
+    @pytest.fixture
+    def pool(self):
+        return ExchangePool()
+
+    def test_one_client_per_account_and_one_limiter_per_exchange(self, pool):
+        public = pool.get('binance')
+        assert pool.get('binance') is public
+        account = pool.get('binance', 'key', 'secret')
+        assert account is not public
+        assert account.limiter is public.limiter
+        assert account.exchange.throttle == public.limiter.acquire
+
+    def test_concurrent_identical_calls_are_coalesced(self, pool):
+        client = pool.get('binance')
+        client._fetch = slow_fetch
+        client.exchange.markets = {}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.fetch_time()))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = client.stats()
+        assert len(results) == 5
+        assert stats['requests'] == 1
+        assert stats['coalesced'] == 4
+        assert stats['p99_ms'] >= 50
@@ -0,0 +1,110 @@
+import time
+import ccxt
+import pytest
+from modules.execution import OrderExecutor
+
+
+class FakeOrderExchange:
+    """بورصة وهمية: أخطاء شبكة قابلة للبرمجة لكل رمز وسجل للأوامر"""
+    has = {'cancelAllOrders': True}
+
+    def __init__(self, failures=None, lost_responses=0):
+        self.failures = dict(failures or {})
+        self.lost_responses = lost_responses
+        self.orders = {}
+        self.creates = 0
+
+    def create_order(self, symbol, order_type, side, amount, price=None, params=None):
+        self.creates += 1
+        if self.failures.get(symbol, 0) > 0:
+            self.failures[symbol] -= 1
+            raise ccxt.NetworkError('timeout')
+        order = {'id': str(len(self.orders) + 1), 'clientOrderId': params['clientOrderId'],
+                 'symbol': symbol, 'side': side, 'amount': amount, 'filled': 0.0,
+                 'status': 'open' if order_type == 'limit' else 'closed'}
+        if order_type != 'limit':
+            order['filled'] = amount
+        self.orders[order['id']] = order
+        if self.lost_responses > 0:
+            # الأمر وصل للبورصة لكن الرد ضاع
+            self.lost_responses -= 1
+            raise ccxt.RequestTimeout('response lost')
+        return dict(order)
+
+    def fetch_order(self, order_id, symbol, params=None):
+        if order_id is None:
+            for order in self.orders.values():
+                if order['clientOrderId'] == params['clientOrderId']:
+                    return dict(order)
+            raise ccxt.OrderNotFound('unknown')
+        return dict(self.orders[order_id])
+
+    def cancel_all_orders(self, symbol):
+        for order in self.orders.values():
+            if order['symbol'] == symbol and order['status'] == 'open':
+                order['status'] = 'canceled'
+
+
+class TestOrderExecutor:
+    @pytest.fixture
+    def make_executor(self):
+        executors = []
+
+        def make(exchange, **kwargs):
+            executor = OrderExecutor(exchange, **{'backoff': 0.2, 'poll_interval': 0.05, **kwargs})
+            executors.append(executor)
+            return executor
+        yield make
+        for executor in executors:
+            executor.stop()
+
+    def test_retries_do_not_delay_other_symbols(self, make_executor):
+        executor = make_executor(FakeOrderExchange(failures={'ETH/USDT': 2}))
+        start = time.monotonic()
+        slow = executor.submit('ETH/USDT', 'buy', 1.0)
+        fast = executor.submit('BTC/USDT', 'buy', 1.0)
+        assert fast.result(1)['status'] == 'closed'
+        assert time.monotonic() - start < 0.1
+        # تراجع 0.2 ثم 0.4 ثانية دون حجز خيط المستدعي
+        assert slow.result(2)['status'] == 'closed'
+        assert time.monotonic() - start > 0.4
+
+    def test_lost_response_is_not_resubmitted(self, make_executor):
+        exchange = FakeOrderExchange(lost_responses=1)
+        executor = make_executor(exchange)
+        order = executor.execute('BTC/USDT', 'buy', 1.0, client_order_id='tb-fixed', timeout=2)
+        assert order['clientOrderId'] == 'tb-fixed'
+        assert exchange.creates == 1 and len(exchange.orders) == 1
+        # نفس المعرف مرة أخرى يعيد الأمر الأول
+        assert executor.execute('BTC/USDT', 'buy', 1.0, client_order_id='tb-fixed')['id'] == order['id']
+        assert exchange.creates == 1
+
+    def test_fill_tracking_by_polling(self, make_executor):
+        exchange = FakeOrderExchange()
+        executor = make_executor(exchange)
+        fills = []
+        executor.fill_callbacks.append(lambda order: fills.append(order['filled']))
+        order = executor.execute('BTC/USDT', 'buy', 2.0, 'limit', 100.0, timeout=1)
+        exchange.orders[order['id']].update(filled=2.0, status='closed')
+        deadline = time.monotonic() + 1
+        while not fills and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert fills == [2.0]
+        assert executor.orders[order['clientOrderId']]['status'] == 'closed'
+
+    def test_execution_report_updates_order(self, make_executor):
+        executor = make_executor(FakeOrderExchange(), poll_interval=60)
+        order = executor.execute('BTC/USDT', 'buy', 2.0, 'limit', 100.0, timeout=1)
+        executor.handle_execution_report({'e': 'executionReport', 'c': order['clientOrderId'],
+                                          'X': 'PARTIALLY_FILLED', 'q': '2.0', 'z': '0.5', 'Z': '50.0'})
+        tracked = executor.orders[order['clientOrderId']]
+        assert tracked['filled'] == 0.5 and tracked['remaining'] == 1.5 and tracked['average'] == 100.0
+
+    def test_batch_cancel(self, make_executor):
+        exchange = FakeOrderExchange()
+        executor = make_executor(exchange, poll_interval=60)
+        for symbol in ('BTC/USDT', 'ETH/USDT'):
+            executor.execute(symbol, 'buy', 1.0, 'limit', 10.0, timeout=1)
+        assert executor.cancel_all().result(1) == {'BTC/USDT': True, 'ETH/USDT': True}
+        assert executor.open_orders() == []
+        assert all(o['status'] == 'canceled' for o in exchange.orders.values())
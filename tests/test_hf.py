@@ -1,6 +1,9 @@
-from core.hf_integration import create_hf_integration
+from core.hf_integration import create_hf_integration, HFIntegration
 from config.settings import Settings
+from types import SimpleNamespace
 import logging
+import sys
+import pytest
 
 # إعداد التسجيل
 logging.basicConfig(
@@ -58,5 +61,157 @@ def test_hf_integration():
     except Exception as e:
         logging.error(f"حدث خطأ أثناء الاختبار: {e}", exc_info=True)
 
+def test_lazy_construction_does_not_import_torch():
+    # البناء والاستيراد لا يحمّلان torch/transformers ولا يتصلان بالشبكة.
+    # مستورد يسجل كل محاولة استيراد، فالاختبار لا ينجح لمجرد أن torch غير مثبت
+    import subprocess
+    import sys
+    code = (
+        "import sys\n"
+        "attempts = []\n"
+        "class Recorder:\n"
+        "    def find_spec(self, name, path=None, target=None):\n"
+        "        if name.split('.')[0] in ('torch', 'transformers'):\n"
+        "            attempts.append(name)\n"
+        "        return None\n"
+        "sys.meta_path.insert(0, Recorder())\n"
+        "import main\n"
+        "from core.hf_integration import HFIntegration\n"
+        "hf = HFIntegration('org/model', None, cache_dir='models', system_prompt='x')\n"
+        "assert not hf.is_loaded\n"
+        "del hf\n"
+        "assert attempts == [], attempts\n"
+        "assert 'torch' not in sys.modules and 'transformers' not in sys.modules\n"
+        # المسجل نفسه يعمل: استيراد مباشر يُلتقط
+        "try:\n"
+        "    import torch\n"
+        "except ImportError:\n"
+        "    pass\n"
+        "assert attempts and attempts[0] == 'torch'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+class Ids(list):
+    """موتر رموز وهمي بشكل (1, n)"""
+    shape = property(lambda self: (1, len(self)))
+
+    def to(self, device):
+        return self
+
+
+class StubTorch:
+    """ما تستخدمه HFIntegration من torch فقط"""
+    float16, float32, bfloat16 = 'float16', 'float32', 'bfloat16'
+
+    def __init__(self, capability='AVX2'):
+        self.threads = None
+        self.backends = SimpleNamespace(cpu=SimpleNamespace(get_cpu_capability=lambda: capability))
+
+    def set_num_threads(self, n):
+        self.threads = n
+
+    @staticmethod
+    def no_grad():
+        import contextlib
+        return contextlib.nullcontext()
+
+    @staticmethod
+    def cat(tensors, dim=-1):
+        return Ids(sum(tensors, []))
+
+    @staticmethod
+    def ones_like(ids):
+        return Ids([1] * len(ids))
+
+
+class StubTokenizer:
+    pad_token_id = 0
+
+    def __call__(self, text, return_tensors=None, add_special_tokens=True):
+        return SimpleNamespace(input_ids=Ids(ord(c) for c in text))
+
+    def decode(self, ids, skip_special_tokens=True):
+        return ''.join(map(chr, ids))
+
+
+class StubModel:
+    """forward يعيد ذاكرة KV بعدد الرموز، وgenerate يمدّها في مكانها كما يفعل transformers"""
+    device = 'cpu'
+
+    def __init__(self):
+        self.forward_calls = 0
+        self.generate_calls = []
+
+    def __call__(self, ids, use_cache=False):
+        self.forward_calls += 1
+        return SimpleNamespace(past_key_values=[len(ids)])
+
+    def generate(self, input_ids, attention_mask, past_key_values, pad_token_id, **params):
+        self.generate_calls.append({'cache': list(past_key_values), 'params': params})
+        past_key_values.append(len(input_ids))
+        return [Ids(input_ids + [ord('!')])]
+
+
+class StubPipeline:
+    def __init__(self):
+        self.model, self.tokenizer = StubModel(), StubTokenizer()
+        self.batches = []
+
+    def __call__(self, prompts, batch_size=1, **params):
+        self.batches.append(list(prompts))
+        return [[{'generated_text': p + '?'}] for p in prompts]
+
+
+class TestCpuModes:
+    @pytest.mark.parametrize('mode, capability, dtype, final_mode', [
+        ('fp32', 'AVX2', 'float32', 'fp32'),
+        ('int8', 'AVX2', 'float32', 'int8'),  # التكميم بعد التحميل، والحساب float32
+        ('bf16', 'AVX512', 'bfloat16', 'bf16'),
+        ('bf16', 'AVX2', 'float32', 'fp32'),  # دون دعم bf16 يعود إلى fp32
+    ])
+    def test_dtype_per_mode(self, mode, capability, dtype, final_mode):
+        hf = HFIntegration('org/model', None, device='cpu', cpu_mode=mode, num_threads=2)
+        torch = StubTorch(capability)
+        hf.device = 'cpu'
+        assert hf._configure_cpu(torch) == dtype
+        assert hf.cpu_mode == final_mode and torch.threads == 2
+
+    def test_cuda_uses_fp16(self):
+        hf = HFIntegration('org/model', None, device='cuda')
+        hf.device = 'cuda'
+        assert hf._configure_cpu(StubTorch()) == 'float16'
+
+
+class TestPrefixCache:
+    @pytest.fixture
+    def hf(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, 'torch', StubTorch())
+        hf = HFIntegration('org/model', None, device='cpu', system_prompt='SYS:')
+        hf.model = StubPipeline()
+        hf.tokenizer = hf.model.tokenizer
+        hf._build_prefix_cache(sys.modules['torch'])
+        return hf
+
+    def test_prefix_is_computed_once_and_not_mutated(self, hf):
+        assert list(hf._prefix_ids) == [ord(c) for c in 'SYS:']
+        assert hf._prefix_cache == [4] and hf.model.model.forward_calls == 1
+
+        for prompt in ('a', 'bc'):
+            result = hf.generate_text(prompt, {'max_new_tokens': 4, 'num_return_sequences': 1})
+            assert result['status'] == 'success' and result['text'] == f'SYS:{prompt}!'
+        # كل توليد يبدأ من ذاكرة البادئة نفسها دون إعادة حسابها
+        assert [c['cache'] for c in hf.model.model.generate_calls] == [[4], [4]]
+        assert hf._prefix_cache == [4] and hf.model.model.forward_calls == 1
+        assert 'num_return_sequences' not in hf.model.model.generate_calls[0]['params']
+
+    def test_batch_path(self, hf):
+        single, = hf.generate_batch(['a'])
+        assert single['text'] == 'SYS:a!' and not hf.model.batches
+        # الدفعة المحشوة تضيف البادئة نصاً
+        results = hf.generate_batch(['a', 'b'])
+        assert hf.model.batches == [['SYS:a', 'SYS:b']]
+        assert [r['text'] for r in results] == ['SYS:a?', 'SYS:b?']
+
+
 if __name__ == "__main__":
     test_hf_integration()
\ No newline at end of file
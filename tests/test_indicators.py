@@ -0,0 +1,60 @@
+import json
+import pytest
+import numpy as np
+from modules.analysis import TechnicalAnalyzer
+from modules.indicators import IndicatorSet, RollingStats, RSI
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    return [[i * 60_000, c, c + 1.5, c - 1.5, c, 5.0] for i, c in enumerate(close)]
+
+
+class TestStreamingIndicators:
+    def test_matches_batch_engine(self, candles):
+        batch = TechnicalAnalyzer().compute(np.array(candles))
+        state = IndicatorSet()
+        values = state.update(candles)
+        for name in ('rsi', 'ema_fast', 'ema_slow', 'macd_hist', 'bb_upper', 'atr'):
+            assert values[name] == pytest.approx(batch[name][-1]), name
+        assert state.trend() == TechnicalAnalyzer.trend(batch)
+
+    def test_only_new_candles_are_consumed(self, candles):
+        state = IndicatorSet()
+        state.update(candles[:200])
+        state.update(candles[:250])
+        reference = IndicatorSet()
+        reference.update(candles[:250])
+        assert state.values == pytest.approx(reference.values)
+
+    def test_revise_forming_candle(self, candles):
+        state = IndicatorSet()
+        state.update(candles[:100])
+        forming = list(candles[99])
+        forming[4] += 3.0
+        state.update([forming])
+        reference = IndicatorSet()
+        reference.update(candles[:99] + [forming])
+        assert state.values == pytest.approx(reference.values)
+
+    def test_rolling_stats(self):
+        stats = RollingStats(5)
+        for x in range(1, 11):
+            mean, std = stats.update(float(x))
+        assert mean == pytest.approx(8.0)
+        assert std == pytest.approx(np.std([6, 7, 8, 9, 10]))
+
+    def test_snapshot_roundtrip(self, candles):
+        state = IndicatorSet()
+        state.update(candles[:150])
+        restored = IndicatorSet.restore(json.loads(json.dumps(state.snapshot())))
+        assert restored.update(candles) == pytest.approx(state.update(candles))
+
+    def test_single_indicator_restore(self, candles):
+        rsi = RSI(14)
+        for c in candles[:50]:
+            rsi.update(c[4])
+        copy = RSI.restore(rsi.snapshot())
+        assert copy.update(candles[50][4]) == pytest.approx(rsi.update(candles[50][4]))
@@ -0,0 +1,92 @@
+import time
+import threading
+import pytest
+from core.inference_service import InferenceService, TTLCache
+
+
+class FakeBackend:
+    """نموذج وهمي: كل تمريرة أمامية تستغرق نفس الوقت مهما كان حجم الدفعة"""
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def generate_batch(self, prompts, generation_params=None):
+        time.sleep(self.latency)
+        with self.lock:
+            self.batches.append(list(prompts))
+        return [{"status": "success", "text": p.upper()} for p in prompts]
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+
+    def test_expiry(self):
+        cache = TTLCache(ttl=0.01)
+        cache.put('a', 1)
+        time.sleep(0.02)
+        assert cache.get('a') is None
+
+
+class TestInferenceService:
+    @pytest.fixture
+    def backend(self):
+        return FakeBackend()
+
+    @pytest.fixture
+    def service(self, backend):
+        service = InferenceService(backend, max_batch_size=8, max_wait=0.05)
+        yield service
+        service.close()
+
+    def test_micro_batching(self, service, backend):
+        futures = [service.submit(f"prompt {i}") for i in range(16)]
+        results = [f.result(timeout=5) for f in futures]
+        assert [r['text'] for r in results] == [f"PROMPT {i}" for i in range(16)]
+        assert len(backend.batches) == 2
+        assert service.stats()['recommendations_per_second'] > 1 / backend.latency
+
+    def test_cache_and_coalescing(self, service, backend):
+        first = service.submit("same")
+        second = service.submit("same")
+        assert first is second
+        first.result(timeout=5)
+        assert service.generate("same", timeout=5)['text'] == "SAME"
+        stats = service.stats()
+        assert stats['coalesced'] == 1
+        assert stats['cache_hits'] == 1
+        assert sum(len(b) for b in backend.batches) == 1
+
+    def test_params_are_not_mixed(self, service, backend):
+        a = service.submit("x", {"temperature": 0.1})
+        b = service.submit("y", {"temperature": 0.9})
+        a.result(timeout=5), b.result(timeout=5)
+        assert sorted(map(tuple, backend.batches)) == [("x",), ("y",)]
+
+    def test_short_batch_result_fails_every_request(self):
+        backend = FakeBackend()
+        backend.generate_batch = lambda prompts, params=None: []
+        service = InferenceService(backend, max_batch_size=8, max_wait=0.05)
+        futures = [service.submit(f"prompt {i}") for i in range(3)]
+        assert all(f.result(timeout=5)['status'] == 'error' for f in futures)
+        service.close()
+
+    def test_dead_worker_fails_pending_and_new_requests(self):
+        backend = FakeBackend()
+        # نتيجة ليست قائمة: خطأ خارج معالجة الدفعة يوقف الخيط العامل
+        backend.generate_batch = lambda prompts, params=None: None
+        service = InferenceService(backend, max_batch_size=8, max_wait=0.05)
+        futures = [service.submit(f"prompt {i}") for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+        with pytest.raises(RuntimeError):
+            service.submit("after")
+        service.close()
@@ -0,0 +1,66 @@
+import sqlite3
+import pytest
+from modules.journal import TradeJournal
+
+
+def order(filled, cost, status='open', fee=None, client_id='tb-1', ts=1000):
+    return {'id': '1', 'clientOrderId': client_id, 'symbol': 'BTC/USDT', 'side': 'buy', 'type': 'limit',
+            'amount': 2.0, 'price': 100.0, 'filled': filled, 'cost': cost, 'status': status,
+            'fee': fee, 'timestamp': ts, 'lastTradeTimestamp': ts}
+
+
+class TestTradeJournal:
+    @pytest.fixture
+    def journal(self, tmp_path):
+        journal = TradeJournal(tmp_path / 'journal.db', flush_interval=60)
+        yield journal
+        journal.close()
+
+    def test_cumulative_updates_become_fill_deltas(self, journal):
+        journal.on_order_update(order(0.0, 0.0))
+        journal.on_order_update(order(0.5, 50.0))
+        journal.on_order_update(order(0.5, 50.0))  # تحديث مكرر
+        journal.on_order_update(order(2.0, 203.0, 'closed', {'cost': 0.2, 'currency': 'USDT'}))
+        assert journal.flush()
+
+        assert len(journal.orders('BTC/USDT')) == 4
+        fills = journal.fills('BTC/USDT')
+        assert [f['amount'] for f in fills] == [0.5, 1.5]
+        assert fills[1]['price'] == pytest.approx(102.0)
+        assert fills[1]['fee'] == pytest.approx(0.2)
+
+    def test_queries_by_symbol_and_time(self, journal):
+        for ts in range(10):
+            journal.record_fill('BTC/USDT', 'buy', 1.0, 100.0, ts=ts)
+            journal.record_fill('ETH/USDT', 'buy', 1.0, 10.0, ts=ts)
+        journal.flush()
+        assert len(journal.fills()) == 20
+        assert [f['ts'] for f in journal.fills('ETH/USDT', since=3, until=6)] == [3, 4, 5]
+        assert len(journal.fills('BTC/USDT', limit=2)) == 2
+
+    def test_pnl_aggregation(self, journal):
+        journal.record_fill('BTC/USDT', 'buy', 1.0, 100.0, fee=0.1, fee_currency='USDT')
+        journal.record_fill('BTC/USDT', 'buy', 1.0, 110.0)
+        journal.record_fill('BTC/USDT', 'sell', 1.5, 120.0, fee=0.5, fee_currency='BNB')
+        journal.flush()
+        pnl = journal.pnl()['BTC/USDT']
+        assert pnl['net'] == pytest.approx(0.5)
+        assert pnl['avg_buy'] == pytest.approx(105.0)
+        # 1.5 * (120 - 105) - رسوم USDT فقط
+        assert pnl['realized'] == pytest.approx(22.5 - 0.1)
+
+    def test_signals_keep_the_analysis(self, journal):
+        journal.record_signal('BTC/USDT', {'trend': 'up', 'price': 100.0, 'rsi': 55.0}, ts=5)
+        journal.flush()
+        signal, = journal.signals('BTC/USDT')
+        assert signal['action'] == 'up' and signal['payload']['rsi'] == 55.0
+
+    def test_close_commits_queue(self, tmp_path):
+        journal = TradeJournal(tmp_path / 'journal.db', flush_interval=60)
+        journal.record_fill('BTC/USDT', 'buy', 1.0, 100.0)
+        journal.close()
+        with sqlite3.connect(tmp_path / 'journal.db') as conn:
+            assert conn.execute("SELECT COUNT(*) FROM fills").fetchone()[0] == 1
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        with pytest.raises(RuntimeError):
+            journal.record_fill('BTC/USDT', 'buy', 1.0, 100.0)
@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from core.llm_signals import LLMSignalPipeline, SYSTEM_PROMPT, ANSWER_PREFIX, build_prompt, parse_answer, summarize
+from modules.models import CandleBlock, Signal
+from core.backtest.exchange import SimulatedExchange
+from core.risk_management.manager import RiskManager
+from main import TradingBot, scan_and_trade
+from modules.strategy import TrendStrategy
+from tests.fakes import FakeExchange
+
+
+class ScriptedBackend:
+    """نموذج وهمي يعيد الـ prompt متبوعاً بإكمال محدد مسبقاً، كما يفعل text-generation"""
+    def __init__(self, completion='buy", "confidence": 0.8, "reason": "momentum above resistance"}'):
+        self.completion = completion
+        self.calls = []
+
+    def generate_batch(self, prompts, generation_params=None):
+        self.calls.append((list(prompts), generation_params))
+        return [{'status': 'success', 'text': p + self.completion} for p in prompts]
+
+
+@pytest.fixture
+def candles():
+    return CandleBlock(FakeExchange(bars=100).candles('BTC/USDT'))
+
+
+def signal_for(candles, symbol='BTC/USDT'):
+    return Signal(symbol, 'down', float(candles.close[-1]), rsi=61.2, macd_hist=0.4, atr=1.1)
+
+
+class TestPrompt:
+    def test_prompt_from_indicators(self, candles):
+        summary = summarize(signal_for(candles), candles, window=24)
+        assert summary['support'] == candles[-24:].low.min()
+        prompt = build_prompt(summary)
+        assert 'RSI(14): 61.2' in prompt
+        assert prompt.endswith(ANSWER_PREFIX)
+
+    def test_parse_answers(self):
+        full = SYSTEM_PROMPT + 'Pair: X\nAnswer: ' + ANSWER_PREFIX + 'sell", "confidence": 0.7, "reason": "weak"}\n...'
+        assert parse_answer(full) == {'action': 'sell', 'confidence': 0.7, 'reason': 'weak'}
+        # الإكمال فقط، ونسبة مئوية
+        assert parse_answer('hold", "confidence": 85, "reason": "range"}')['confidence'] == 0.85
+        # مقطوع عند max_new_tokens
+        assert parse_answer(ANSWER_PREFIX + 'buy", "confidence": 0.9, "reason": "bre') == \
+            {'action': 'buy', 'confidence': 0.9, 'reason': 'bre'}
+        assert parse_answer(ANSWER_PREFIX + 'moon", "confidence": 1}') is None
+        assert parse_answer('no json at all') is None
+
+
+class TestLLMSignalPipeline:
+    def test_review_and_cache_per_candle(self, candles):
+        backend = ScriptedBackend()
+        pipeline = LLMSignalPipeline(backend)
+        signals = {s: signal_for(candles, s) for s in ('BTC/USDT', 'ETH/USDT')}
+        reviewed = pipeline.review(signals, {s: candles for s in signals})
+        assert reviewed['BTC/USDT'].trend == 'up'
+        assert reviewed['BTC/USDT'].confidence == 0.8 and reviewed['BTC/USDT'].reason
+        prompts, params = backend.calls[0]
+        assert len(prompts) == 2 and prompts[0].startswith(SYSTEM_PROMPT)
+        assert params['max_new_tokens'] <= 32
+
+        # نفس الشمعة من الذاكرة، والشمعة التالية فقط تُولد
+        pipeline.review(signals, {s: candles for s in signals})
+        assert len(backend.calls) == 1
+        # تحديث الشمعة المتكونة لا يعيد التوليد
+        forming = candles.data.copy()
+        forming[-1, 4] *= 1.01
+        pipeline.review({'BTC/USDT': signals['BTC/USDT']}, {'BTC/USDT': CandleBlock(forming)})
+        assert len(backend.calls) == 1
+        pipeline.review({'BTC/USDT': signals['BTC/USDT']}, {'BTC/USDT': candles[:-1]})
+        assert len(backend.calls) == 2 and len(backend.calls[1][0]) == 1
+        assert pipeline.stats()['cache_hits'] == 3
+
+    def test_low_confidence_and_bad_output(self, candles):
+        signal = Signal('BTC/USDT', 'up', 100.0)
+        low = LLMSignalPipeline(ScriptedBackend('sell", "confidence": 0.3, "reason": "unsure"}'))
+        reviewed = low.review({'BTC/USDT': signal}, {'BTC/USDT': candles})['BTC/USDT']
+        # ثقة منخفضة: تبقى إشارة المؤشرات
+        assert reviewed.trend == 'up' and reviewed.confidence == 0.3
+
+        broken = LLMSignalPipeline(ScriptedBackend('I think the market is bullish'))
+        assert broken.review({'BTC/USDT': signal}, {'BTC/USDT': candles})['BTC/USDT'] == signal
+        assert broken.stats()['errors'] == 1
+        # الإجابة الفاشلة لا تُخزن
+        assert len(broken.cache) == 0
+
+    def test_flat_signal_is_not_sent_to_the_model(self, candles):
+        backend = ScriptedBackend()
+        pipeline = LLMSignalPipeline(backend)
+        flat = Signal('BTC/USDT', 'flat', 100.0)
+        # flat قد تعني الخروج من المركز، فلا يحولها النموذج إلى صفقة
+        assert pipeline.review({'BTC/USDT': flat}, {'BTC/USDT': candles})['BTC/USDT'] == flat
+        assert backend.calls == [] and pipeline.stats()['reviews'] == 0
+
+    def test_hold_neither_enters_nor_exits(self, candles):
+        trader = SimulatedExchange(initial_balance=10000, slippage=0, fee_rate=0)
+        trader.set_bar('BTC/USDT', [0, 100.0, 100.0, 100.0, 100.0, 1e9])
+        pipeline = LLMSignalPipeline(ScriptedBackend('hold", "confidence": 0.9, "reason": "wait"}'))
+        bot = TradingBot(data_fetcher=object(), trader=trader, risk_manager=RiskManager(),
+                         strategy=TrendStrategy(), live_trading=True, llm=pipeline)
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'up', 100.0))
+        assert bot.positions == {'BTC/USDT': 'buy'}
+
+        # الاستراتيجية ما زالت LONG والنموذج يجيب hold: المركز يبقى
+        for trend in ('up', 'down'):
+            held = pipeline.review({'BTC/USDT': Signal('BTC/USDT', trend, 100.0)}, {'BTC/USDT': candles})['BTC/USDT']
+            assert held.hold and held.trend == trend
+            assert bot.execute_trade('BTC/USDT', held) is None
+        assert bot.positions == {'BTC/USDT': 'buy'}
+        # ولا دخول جديد على رمز بلا مركز
+        held = pipeline.review({'ETH/USDT': Signal('ETH/USDT', 'up', 100.0)}, {'ETH/USDT': candles})['ETH/USDT']
+        assert bot.execute_trade('ETH/USDT', held) is None and 'ETH/USDT' not in bot.positions
+
+    def test_backend_with_system_prompt_gets_short_prompts(self, candles):
+        backend = ScriptedBackend()
+        backend.system_prompt = SYSTEM_PROMPT
+        LLMSignalPipeline(backend).review({'BTC/USDT': signal_for(candles)}, {'BTC/USDT': candles})
+        assert not backend.calls[0][0][0].startswith(SYSTEM_PROMPT)
+
+
+class TestScanAndTrade:
+    class Scanner:
+        def __init__(self, exchange):
+            self.exchange = exchange
+
+        async def scan(self, symbols, timeframe='1h'):
+            return {s: {'ohlcv': CandleBlock(self.exchange.candles(s)), 'ticker': None} for s in symbols}
+
+    def test_model_decides_the_trade(self):
+        exchange = FakeExchange(bars=200)
+        backend = ScriptedBackend('sell", "confidence": 0.9, "reason": "overbought"}')
+        bot = TradingBot(data_fetcher=exchange, trader=SimulatedExchange(initial_balance=10000),
+                         risk_manager=RiskManager(), live_trading=False, llm=LLMSignalPipeline(backend))
+        results = asyncio.run(scan_and_trade(bot, self.Scanner(exchange), ['BTC/USDT', 'ETH/USDT']))
+        assert [r['side'] for r in results.values()] == ['sell', 'sell']
+        # دفعة توليد واحدة لكل الرموز
+        assert len(backend.calls) == 1 and len(backend.calls[0][0]) == 2
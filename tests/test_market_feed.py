@@ -0,0 +1,151 @@
+import json
+import time
+import asyncio
+import websockets
+from modules.market_feed import MarketDataFeed, OrderBook
+from modules.store import CandleStore
+
+# رسائل مسجلة بصيغة البث المجمع لـ Binance
+RECORDED = [
+    {'stream': 'btcusdt@depth@100ms',
+     'data': {'e': 'depthUpdate', 's': 'BTCUSDT', 'U': 5, 'u': 9,
+              'b': [['99.0', '1.0']], 'a': []}},
+    {'stream': 'btcusdt@trade',
+     'data': {'e': 'trade', 's': 'BTCUSDT', 'p': '100.2', 'q': '0.1', 'T': 1}},
+    {'stream': 'btcusdt@depth@100ms',
+     'data': {'e': 'depthUpdate', 's': 'BTCUSDT', 'U': 11, 'u': 12,
+              'b': [['100.0', '0'], ['100.1', '0.5']], 'a': [['100.5', '0']]}},
+    {'stream': 'btcusdt@kline_1m',
+     'data': {'e': 'kline', 's': 'BTCUSDT',
+              'k': {'t': 60_000, 'i': '1m', 'o': '99.0', 'h': '101.0', 'l': '98.0',
+                    'c': '100.3', 'v': '12.0', 'x': True}}},
+    {'stream': 'btcusdt@trade',
+     'data': {'e': 'trade', 's': 'BTCUSDT', 'p': '100.4', 'q': '0.2', 'T': 2}},
+]
+
+
+async def replay_server(messages):
+    """خادم محلي يعيد تشغيل الرسائل المسجلة لكل اتصال"""
+    async def handler(ws):
+        for message in messages:
+            await ws.send(json.dumps(message))
+        await ws.wait_closed()
+
+    return await websockets.serve(handler, '127.0.0.1', 0)
+
+
+def snapshot(symbol):
+    # لقطة REST بصيغة ccxt، nonce هو lastUpdateId
+    return {'nonce': 10, 'bids': [['100.0', '1.0'], ['99.5', '2.0']],
+            'asks': [['100.5', '1.5'], ['101.0', '3.0']]}
+
+
+class TestOrderBook:
+    def test_best_levels(self):
+        book = OrderBook()
+        book.apply_snapshot([[100, 1], [99, 2]], [[101, 1], [102, 2]], update_id=5)
+        book.apply_delta([[100.5, 1]], [[101, 0]], update_id=6)
+        assert book.best_bid() == (100.5, 1.0)
+        assert book.best_ask() == (102.0, 2.0)
+        assert book.apply_delta([[200, 1]], [], update_id=6) is False
+
+    def test_sync_drops_events_in_snapshot(self):
+        book = OrderBook()
+        assert book.apply_event(1, 4, [[99, 5]], []) is False
+        assert book.apply_event(5, 7, [[100, 3]], []) is False
+        assert book.sync([[100, 1]], [[101, 1]], update_id=5)
+        # الحدث 1-4 داخل اللقطة، والحدث 5-7 يكملها
+        assert book.bids == {100.0: 3.0} and book.last_update_id == 7
+        assert book.apply_event(8, 9, [], [[101, 0]]) and book.best_ask() is None
+
+    def test_old_snapshot_is_refused(self):
+        book = OrderBook()
+        book.apply_event(20, 25, [[100, 1]], [])
+        assert book.sync([[99, 1]], [], update_id=10) is False
+        assert not book.synced and len(book.pending) == 1
+        assert book.sync([[99, 1]], [], update_id=22)
+        assert book.last_update_id == 25
+
+    def test_gap_unsyncs_the_book(self):
+        book = OrderBook()
+        book.sync([[100, 1]], [], update_id=10)
+        assert book.apply_event(11, 12, [], [])
+        assert book.apply_event(15, 16, [[90, 1]], []) is False
+        assert not book.synced and 90.0 not in book.bids
+        assert book.sync([[100, 2]], [], update_id=14)
+        assert book.bids == {100.0: 2.0, 90.0: 1.0}
+
+
+class TestMarketDataFeed:
+    def test_replay(self, tmp_path):
+        store = CandleStore(tmp_path)
+        # الشمعة السابقة مخزنة، فشمعة البث تكمل السلسلة
+        store.write('binance', 'BTC/USDT', '1m', [[0, 98.0, 99.5, 97.0, 99.0, 5.0]])
+        closes = []
+        snapshots = []
+
+        def fetch(symbol):
+            snapshots.append(symbol)
+            return snapshot(symbol)
+
+        async def run():
+            server = await replay_server(RECORDED)
+            port = server.sockets[0].getsockname()[1]
+            feed = MarketDataFeed(['BTC/USDT'], url=f'ws://127.0.0.1:{port}', store=store,
+                                  snapshot_fetcher=fetch)
+            feed.candle_callbacks.append(lambda s, c, closed: closes.append((s, c[4], closed)))
+            task = asyncio.create_task(feed.run())
+            deadline = time.monotonic() + 5
+            book = feed.get_order_book('BTC/USDT')
+            while (feed.get_price('BTC/USDT') != 100.4 or not book.synced) and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            await feed.close()
+            await task
+            server.close()
+            await server.wait_closed()
+            return feed
+
+        feed = asyncio.run(run())
+        assert feed.get_price('BTC/USDT') == 100.4
+        book = feed.get_order_book('BTC/USDT')
+        assert book.best_bid() == (100.1, 0.5)
+        assert book.best_ask() == (101.0, 3.0)
+        assert snapshots == ['BTC/USDT'] and 99.0 not in book.bids
+        assert closes == [('BTC/USDT', 100.3, True)]
+        assert store.read('binance', 'BTC/USDT', '1m')[-1, 4] == 100.3
+
+    def test_kline_after_stale_store_fills_the_gap(self, tmp_path):
+        minute = 60_000
+        store = CandleStore(tmp_path)
+        store.write('binance', 'BTC/USDT', '1m', [[i * minute, 1.0, 2.0, 0.5, 1.5, 1.0] for i in range(300)])
+        requests = []
+
+        def fetch(symbol, timeframe, since):
+            # صفحات من 100 شمعة حتى الشمعة الجارية 500
+            requests.append(since)
+            return [[t * minute, 1.0, 2.0, 0.5, 1.5, 1.0] for t in range(since // minute, min(since // minute + 100, 501))]
+
+        feed = MarketDataFeed(['BTC/USDT'], store=store, candle_fetcher=fetch)
+        kline = {'e': 'kline', 's': 'BTCUSDT',
+                 'k': {'t': 500 * minute, 'i': '1m', 'o': '1', 'h': '2', 'l': '0.5', 'c': '1.7', 'v': '3', 'x': False}}
+        feed.handle_message(kline)
+
+        times = store.read('binance', 'BTC/USDT', '1m')[:, 0]
+        assert len(times) == 501 and (times[1:] - times[:-1] == minute).all()
+        assert requests[0] == 299 * minute
+        # الشمعة التالية متصلة فتُضاف مباشرة
+        feed.handle_message({**kline, 'k': {**kline['k'], 't': 501 * minute}})
+        assert store.last_timestamp('binance', 'BTC/USDT', '1m') == 501 * minute
+        assert len(requests) == 3
+
+    def test_empty_store_is_left_to_rest_history(self, tmp_path):
+        store = CandleStore(tmp_path)
+        feed = MarketDataFeed(['BTC/USDT'], store=store, candle_fetcher=lambda *args: [])
+        feed.handle_message(RECORDED[3])
+        assert feed.get_candle('BTC/USDT')[4] == 100.3
+        assert store.last_modified('binance', 'BTC/USDT', '1m') is None
+
+    def test_stale_price(self):
+        feed = MarketDataFeed(['BTC/USDT'], max_age=1.0)
+        feed.prices['BTC/USDT'] = (100.0, time.time() - 5)
+        assert feed.get_price('BTC/USDT') is None
@@ -0,0 +1,62 @@
+import os
+import time
+import ccxt
+import pytest
+from modules.markets import MarketCache
+
+MARKET = {
+    'id': 'BTCUSDT', 'symbol': 'BTC/USDT', 'base': 'BTC', 'quote': 'USDT',
+    'baseId': 'BTC', 'quoteId': 'USDT', 'type': 'spot', 'spot': True, 'active': True,
+    'precision': {'amount': 0.00001, 'price': 0.01},
+    'limits': {'amount': {'min': 0.00001, 'max': 9000.0}, 'price': {}, 'cost': {'min': 5.0}},
+}
+
+
+class CountingExchange(ccxt.binance):
+    """عميل binance حقيقي دون شبكة: load_markets يعيد سوقاً ثابتاً ويحصي الطلبات"""
+    loads = 0
+
+    def load_markets(self, reload=False, params={}):
+        CountingExchange.loads += 1
+        self.set_markets([dict(MARKET)])
+        return self.markets
+
+
+class TestMarketCache:
+    @pytest.fixture(autouse=True)
+    def reset_counter(self):
+        CountingExchange.loads = 0
+
+    def test_loads_once_and_persists(self, tmp_path):
+        cache = MarketCache(root=tmp_path)
+        first, second = CountingExchange(), CountingExchange()
+        assert cache.attach(first)
+        assert cache.attach(second)
+        assert CountingExchange.loads == 1
+        assert second.markets['BTC/USDT']['precision']['amount'] == 0.00001
+
+        # بدء تشغيل جديد يقرأ من القرص دون طلب
+        restarted = MarketCache(root=tmp_path)
+        client = CountingExchange()
+        assert restarted.attach(client, fetch=False)
+        assert CountingExchange.loads == 1
+        assert 'BTC/USDT' in client.markets
+
+    def test_expired_disk_cache_is_not_used(self, tmp_path):
+        MarketCache(root=tmp_path).attach(CountingExchange())
+        old = time.time() - 7200
+        os.utime(tmp_path / 'binance.json', (old, old))
+        assert MarketCache(root=tmp_path, ttl=3600).attach(CountingExchange(), fetch=False) is False
+
+    def test_prepare_order_rounds_and_validates(self, tmp_path):
+        cache = MarketCache(root=tmp_path)
+        exchange = CountingExchange()
+        amount, price = cache.prepare_order(exchange, 'BTC/USDT', 0.123456789, 50000.123)
+        assert (amount, price) == (0.12345, 50000.12)
+
+        with pytest.raises(ValueError, match='notional'):
+            cache.prepare_order(exchange, 'BTC/USDT', 0.00005, reference_price=50000)
+        with pytest.raises(ValueError):
+            cache.prepare_order(exchange, 'BTC/USDT', 0.000001)
+        with pytest.raises(ValueError, match='Unknown'):
+            cache.prepare_order(exchange, 'ETH/USDT', 1.0)
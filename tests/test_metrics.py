@@ -0,0 +1,45 @@
+import urllib.request
+import numpy as np
+from core.metrics import Histogram, Metrics
+
+
+class TestHistogram:
+    def test_percentiles_within_bucket_precision(self):
+        rng = np.random.default_rng(0)
+        values = rng.lognormal(mean=13, sigma=1, size=20000).astype(np.int64)  # ~0.4ms نانوثانية
+        histogram = Histogram()
+        for value in values.tolist():
+            histogram.record(value)
+        expected = np.percentile(values, [50, 90, 99, 99.9]) / 1e9
+        np.testing.assert_allclose(histogram.percentiles(), expected, rtol=0.04)
+        assert histogram.count == 20000
+
+
+class TestMetrics:
+    def test_disabled_records_nothing(self):
+        metrics = Metrics(enabled=False)
+
+        @metrics.timed('f')
+        def f(x):
+            return x * 2
+
+        with metrics.span('block'):
+            assert f(2) == 4
+        assert metrics.summary() == {}
+        assert 'span=' not in metrics.prometheus()
+
+    def test_prometheus_endpoint(self):
+        metrics = Metrics(enabled=True)
+        for _ in range(10):
+            with metrics.span('bot.analyze_market'):
+                pass
+        server = metrics.start_http_server(port=0)
+        try:
+            port = server.server_port
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2).read().decode()
+        finally:
+            metrics.stop()
+        assert '# TYPE trading_bot_latency_seconds summary' in body
+        assert 'trading_bot_latency_seconds_count{span="bot.analyze_market"} 10' in body
+        assert 'quantile="0.99"' in body
+        assert metrics.summary()['bot.analyze_market']['count'] == 10
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from modules.models import CandleBlock, Signal, OrderRequest, Fill
+from modules.store import CandleStore
+from tests.fakes import FakeExchange
+
+
+@pytest.fixture
+def candles():
+    return FakeExchange(bars=50).candles('BTC/USDT')
+
+
+class TestCandleBlock:
+    def test_named_columns_are_views(self, candles):
+        block = CandleBlock(candles)
+        assert np.shares_memory(block.close, candles)
+        assert block.close[-1] == candles[-1, 4]
+        assert block.records['high'][3] == candles[3, 2]
+        tail = block[-10:]
+        assert isinstance(tail, CandleBlock) and np.shares_memory(tail.data, candles)
+        assert block.since(candles[40, 0]) == tail
+
+    def test_store_read_is_not_copied(self, candles, tmp_path):
+        store = CandleStore(tmp_path)
+        store.write('binance', 'BTC/USDT', '1h', candles.tolist())
+        data = store.read('binance', 'BTC/USDT', '1h')
+        assert np.shares_memory(CandleBlock(data[-20:]).data, data)
+
+    def test_from_rows(self, candles):
+        rows = candles[:3].tolist()
+        assert CandleBlock.from_rows(rows).tolist() == rows
+        assert len(CandleBlock.from_rows([])) == 0
+        with pytest.raises(ValueError):
+            CandleBlock(np.zeros((3, 5)))
+
+
+class TestRecords:
+    def test_signal_round_trip(self):
+        signal = Signal('BTC/USDT', 'down', 100.0, rsi=30.0)
+        assert signal.side == 'sell' and Signal('BTC/USDT', 'flat', 1.0).side is None
+        assert Signal.from_dict({**signal.to_dict(), 'extra': 1}) == signal
+        with pytest.raises(AttributeError):
+            signal.confidence_score = 1.0  # __slots__
+
+    def test_order_request_params(self):
+        request = OrderRequest('BTC/USDT', 'buy', 0.5, reference_price=100.0)
+        assert request.params()['order_type'] == 'market'
+
+    def test_fill_from_ccxt_order(self):
+        order = {'symbol': 'BTC/USDT', 'side': 'buy', 'filled': 2.0, 'average': 101.0,
+                 'fee': {'cost': 0.3, 'currency': 'BNB'}}
+        assert Fill.from_order(order, 100.0) == Fill('BTC/USDT', 'buy', 2.0, 101.0, 0.0)
+        assert Fill.from_order({**order, 'average': None, 'fee': 0.1}, 100.0).price == 100.0
+        assert Fill.from_order({**order, 'filled': 0.0}, 100.0) is None
@@ -0,0 +1,53 @@
+import json
+import pytest
+from core.backtest.optimizer import Optimizer, grid, random_search
+from tests.test_backtest import make_candles
+
+
+class TestParameterSpaces:
+    def test_grid(self):
+        combos = grid({'ema_fast': [5, 12], 'stop_loss_pct': [1.0, 2.0, 3.0]})
+        assert len(combos) == 6
+        assert {'ema_fast': 5, 'stop_loss_pct': 3.0} in combos
+
+    def test_random_search(self):
+        samples = random_search({'rsi_window': (5, 30), 'risk_per_trade': (0.005, 0.02)}, 20, seed=1)
+        assert all(isinstance(s['rsi_window'], int) and 5 <= s['rsi_window'] <= 30 for s in samples)
+        assert all(0.005 <= s['risk_per_trade'] <= 0.02 for s in samples)
+        assert samples == random_search({'rsi_window': (5, 30), 'risk_per_trade': (0.005, 0.02)}, 20, seed=1)
+
+
+class TestOptimizer:
+    @pytest.fixture
+    def space(self):
+        return {'ema_fast': [5, 12], 'ema_slow': [26], 'stop_loss_pct': [1.0, 2.0]}
+
+    def test_grid_search_is_resumable(self, tmp_path, space):
+        path = tmp_path / 'results.jsonl'
+        candles = make_candles(600)
+        with Optimizer(candles, 'BTC/USDT', results_path=path, max_workers=2) as optimizer:
+            records = optimizer.grid_search(space)
+        assert len(records) == 4
+        assert all(r['bars'] == 600 for r in records)
+        assert len(path.read_text().splitlines()) == 4
+
+        # التشغيل الثاني يقرأ النتائج من الملف ولا ينشئ عمليات
+        with Optimizer(candles, 'BTC/USDT', results_path=path, max_workers=2) as optimizer:
+            again = optimizer.grid_search(space)
+            assert optimizer.pool is None
+        assert [r['key'] for r in again] == [r['key'] for r in records]
+
+        # شموع مختلفة بنفس الطول والفهارس لا تعيد النتائج المحفوظة
+        changed = candles.copy()
+        changed[-1, 4] *= 1.01
+        with Optimizer(changed, 'BTC/USDT', results_path=path, max_workers=2) as optimizer:
+            assert all(optimizer._key(r['params'], 0, 600) not in optimizer.results for r in records)
+
+    def test_walk_forward(self, tmp_path, space):
+        with Optimizer(make_candles(900), 'BTC/USDT', results_path=tmp_path / 'wf.jsonl',
+                       max_workers=2) as optimizer:
+            folds = optimizer.walk_forward(space, train_size=400, test_size=200)
+        assert len(folds) == 2
+        for fold in folds:
+            assert fold['test']['params'] == fold['train']['params']
+            json.dumps(fold)
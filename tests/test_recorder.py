@@ -0,0 +1,92 @@
+import json
+import time
+import threading
+import pytest
+import modules.recorder as recorder_module
+from modules.recorder import Recorder, Replayer
+from modules.market_feed import MarketDataFeed
+from modules.store import CandleStore
+
+SECOND = 1_000_000_000
+
+
+def trade_message(price, ts=1):
+    return json.dumps({'stream': 'btcusdt@trade',
+                       'data': {'e': 'trade', 's': 'BTCUSDT', 'p': str(price), 'T': ts}})
+
+
+class TestRecorder:
+    @pytest.fixture
+    def recorder(self, tmp_path):
+        recorder = Recorder(tmp_path, codec='zlib', chunk_seconds=10, block_bytes=4096, max_pending_blocks=1000)
+        yield recorder
+        recorder.close()
+
+    def test_round_trip_in_time_order(self, recorder, tmp_path):
+        for i in range(1000):
+            recorder.record('raw', trade_message(100 + i), ts=i * SECOND // 10)
+        recorder.record('candle', {'symbol': 'BTC/USDT', 'timeframe': '1h', 'rows': [[0, 1, 2, 0.5, 1.5, 10]]},
+                        ts=1000 * SECOND // 10)
+        recorder.flush()
+
+        replayed = list(Replayer(tmp_path).messages())
+        assert len(replayed) == 1001
+        assert [ts for ts, _, _ in replayed] == sorted(ts for ts, _, _ in replayed)
+        assert replayed[0][1:] == ('raw', trade_message(100))
+        assert replayed[-1][1] == 'candle' and replayed[-1][2]['rows'][0][4] == 1.5
+        # ملف لكل 10 ثوانٍ، والكتلة تُكتب في ملف أول رسالة فيها
+        assert len(list(tmp_path.glob('*.ticks'))) == 10
+
+    def test_time_range_and_kind_filters(self, recorder, tmp_path):
+        for i in range(100):
+            recorder.record('trade' if i % 2 else 'ticker', {'i': i}, ts=i * SECOND)
+        recorder.flush()
+        replayer = Replayer(tmp_path)
+        window = [m['i'] for _, _, m in replayer.messages(since=10 * SECOND, until=20 * SECOND)]
+        assert window == list(range(10, 20))
+        assert all(kind == 'trade' for _, kind, _ in replayer.messages(kinds=['trade']))
+
+    def test_index_rebuilt_from_chunks(self, recorder, tmp_path):
+        for i in range(500):
+            recorder.record('raw', trade_message(i), ts=i * SECOND // 100)
+        recorder.flush()
+        indexed = Replayer(tmp_path).blocks()
+        (tmp_path / 'index.jsonl').unlink()
+        assert Replayer(tmp_path).blocks() == indexed
+
+    def test_accelerated_replay_keeps_pace(self, recorder, tmp_path):
+        for i in range(5):
+            recorder.record('raw', trade_message(i), ts=i * SECOND // 10)
+        recorder.flush()
+        start = time.monotonic()
+        assert len(list(Replayer(tmp_path).messages(speed=4.0))) == 5
+        # 0.4 ثانية مسجلة بسرعة 4x
+        assert time.monotonic() - start == pytest.approx(0.1, abs=0.08)
+
+    def test_bounded_queue_drops_instead_of_blocking(self, tmp_path, monkeypatch):
+        release = threading.Event()
+        monkeypatch.setattr(recorder_module, '_compress', lambda codec, data: release.wait(5) and data)
+        recorder = Recorder(tmp_path, codec='zlib', block_bytes=64, max_pending_blocks=2)
+        # العامل عالق في ضغط الكتلة الأولى، فالطابور يمتلئ
+        for i in range(100):
+            recorder.record('raw', trade_message(i))
+        assert recorder.dropped > 0
+        assert recorder.recorded + recorder.dropped + recorder._count == 100
+        release.set()
+        recorder.close()
+
+
+class TestReplayIntoBot:
+    def test_feed_and_store_see_the_recorded_data(self, tmp_path):
+        recorder = Recorder(tmp_path / 'ticks', codec='zlib')
+        live = MarketDataFeed(['BTC/USDT'], depth=False, recorder=recorder)
+        live.handle_message(trade_message(101.5))
+        recorder.record('candle', {'symbol': 'BTC/USDT', 'timeframe': '1h',
+                                   'rows': [[3_600_000, 1, 2, 0.5, 1.5, 10]]})
+        recorder.close()
+
+        feed = MarketDataFeed(['BTC/USDT'], depth=False)
+        store = CandleStore(tmp_path / 'candles')
+        assert Replayer(tmp_path / 'ticks').replay_into(feed=feed, store=store) == 2
+        assert feed.get_price('BTC/USDT') == 101.5
+        assert store.last_timestamp('binance', 'BTC/USDT', '1h') == 3_600_000
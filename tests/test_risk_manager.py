@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from core.risk_management.manager import RiskManager
 
@@ -16,4 +17,51 @@ class TestRiskManager:
 
     def test_drawdown_validation(self, manager):
         assert manager.validate_trade(0.04) is True
-        assert manager.validate_trade(0.06) is False
\ No newline at end of file
+        assert manager.validate_trade(0.06) is False
+
+class TestPortfolioRisk:
+    @pytest.fixture
+    def manager(self):
+        manager = RiskManager(max_drawdown=0.05, risk_per_trade=0.01,
+                              max_gross_exposure=1.0, max_symbol_exposure=0.3)
+        manager.reset(10000)
+        return manager
+
+    def test_drawdown_from_fills(self, manager):
+        manager.record_fill('BTC/USDT', 'buy', 1.0, 5000.0)
+        assert manager.equity == pytest.approx(10000)
+        manager.mark({'BTC/USDT': 4000.0})
+        # 9000 من قمة 10000
+        assert manager.drawdown == pytest.approx(0.1)
+        assert manager.validate_trade() is False
+        assert manager.size_positions(['ETH/USDT'], ['buy'], 2.0)[0] == 0
+
+    def test_sync_replaces_positions(self, manager):
+        manager.record_fill('BTC/USDT', 'buy', 0.1, 50000.0)
+        manager.sync(9000.0, {'ETH/USDT': 1.0})
+        # مركز BTC لم يعد في الحساب
+        assert manager.quantities == {'ETH/USDT': 1.0}
+        assert manager.cash == 9000.0
+
+    def test_reservations_count_as_exposure(self, manager):
+        manager.mark({'BTC/USDT': 50000.0})
+        manager.reserve('BTC/USDT', 'buy', 0.05)  # أمر 2500 لم تصل تعبئته
+        assert manager.size_positions(['BTC/USDT'], ['buy'], 2.0)[0] == pytest.approx(500)
+        manager.release('BTC/USDT', 'buy', 0.05)
+        assert manager.reserved == {}
+        assert manager.size_positions(['BTC/USDT'], ['buy'], 2.0)[0] == pytest.approx(3000)
+
+    def test_batch_sizing_limits(self, manager):
+        manager.record_fill('BTC/USDT', 'buy', 0.05, 50000.0)  # تعرض 2500
+        sizes = manager.size_positions(['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'XRP/USDT'],
+                                       ['buy', 'buy', 'buy', 'sell'], 2.0)
+        # حد الرمز 3000، والباقي من الحد الإجمالي 7500
+        np.testing.assert_allclose(sizes, [500.0, 3000.0, 3000.0, 1000.0])
+
+    def test_correlation_limit(self, manager):
+        rng = np.random.default_rng(0)
+        base = rng.normal(size=200)
+        returns = np.vstack([base, base + rng.normal(scale=0.01, size=200), rng.normal(size=200)])
+        manager.max_correlation = 0.8
+        sizes = manager.size_positions(['A', 'B', 'C'], ['buy'] * 3, 10.0, returns=returns)
+        assert sizes[0] > 0 and sizes[1] == 0 and sizes[2] > 0
@@ -0,0 +1,134 @@
+import time
+import asyncio
+import pytest
+from modules.scanner import MarketScanner, TokenBucket, endpoint_cost
+from modules.store import CandleStore
+from modules.markets import MarketCache
+from modules.exchange_pool import ExchangePool
+
+HOUR = 3_600_000
+
+
+class FakeAsyncExchange:
+    """بورصة غير متزامنة وهمية بزمن استجابة ثابت"""
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.requests = 0
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return [[i * HOUR, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(limit or 1)]
+
+    async def fetch_tickers(self, symbols):
+        await asyncio.sleep(self.latency)
+        return {s: {'symbol': s, 'last': 1.5} for s in symbols}
+
+    def parse_timeframe(self, timeframe):
+        return 3600
+
+    def milliseconds(self):
+        return 0
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+
+    async def close(self):
+        pass
+
+
+class FakeSyncExchange:
+    """عميل ExchangePool وهمي يحصي load_markets"""
+    def __init__(self):
+        self.loads = 0
+        self.markets, self.currencies = None, None
+
+    def load_markets(self, reload=False):
+        self.loads += 1
+        self.markets, self.currencies = {'BTC/USDT': {'symbol': 'BTC/USDT'}}, {}
+        return self.markets
+
+
+class TestTokenBucket:
+    def test_limits_rate(self):
+        async def run():
+            bucket = TokenBucket(rate=100, capacity=10)
+            start = time.monotonic()
+            for _ in range(30):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        # 10 في الدفعة الأولى ثم 20 بمعدل 100/ثانية
+        assert asyncio.run(run()) == pytest.approx(0.2, abs=0.1)
+
+
+class TestMarketScanner:
+    def test_scan_is_concurrent(self, tmp_path):
+        symbols = [f"SYM{i}/USDT" for i in range(300)]
+
+        async def run():
+            markets = MarketCache('binance', tmp_path)
+            markets.markets, markets.loaded_at = {}, time.time()
+            scanner = MarketScanner(store=CandleStore(tmp_path), rate=1e6, markets=markets)
+            scanner.exchange = FakeAsyncExchange(latency=0.05)
+            start = time.monotonic()
+            result = await scanner.scan(symbols, limit=20)
+            await scanner.close()
+            return result, time.monotonic() - start
+
+        result, elapsed = asyncio.run(run())
+        assert len(result) == 300
+        assert len(result['SYM0/USDT']['ohlcv']) == 20
+        assert result['SYM0/USDT']['ticker']['last'] == 1.5
+        # 300 طلب متسلسل = 15 ثانية
+        assert elapsed < 1.5
+
+    def test_scan_within_pooled_budget(self, tmp_path):
+        symbols = [f"SYM{i}/USDT" for i in range(300)]
+
+        async def run():
+            markets = MarketCache('binance', tmp_path)
+            markets.markets, markets.loaded_at = {}, time.time()
+            scanner = MarketScanner(store=CandleStore(tmp_path), markets=markets)
+            scanner.exchange = FakeAsyncExchange(latency=0)
+            limiter = scanner.bucket.limiter
+            start = time.monotonic()
+            result = await scanner.scan(symbols, limit=20)
+            await scanner.close()
+            return scanner, limiter, result, time.monotonic() - start
+
+        scanner, limiter, result, elapsed = asyncio.run(run())
+        assert len(result) == 300
+        # تكاليف ccxt لا أوزان Binance: klines بـ 0.4 وكل الـ tickers بـ 16
+        assert (scanner.ohlcv_cost, scanner.tickers_cost) == (0.4, 16.0)
+        # 136 وحدة بمعدل 20/ثانية بعد دفعة أولى بحجم ثانية واحدة، بدل نحو 34 ثانية بالأوزان
+        budget = (300 * scanner.ohlcv_cost + scanner.tickers_cost - limiter.capacity) / limiter.rate
+        assert elapsed < budget + 1.5
+
+    def test_endpoint_cost_from_description(self):
+        class Described:
+            def describe(self):
+                return {'api': {'private': {'get': {'klines': {'cost': 5}}},
+                                'public': {'get': {'klines': {'cost': 0.4}, 'ticker/24hr': {'cost': 0.4, 'noSymbol': 16}}}}}
+
+        assert endpoint_cost(Described(), 'klines') == 0.4
+        assert endpoint_cost(Described(), 'ticker/24hr') == 0.4
+        assert endpoint_cost(Described(), 'ticker/24hr', no_symbol=True) == 16
+        assert endpoint_cost(Described(), 'depth') == 1.0
+
+    def test_shares_pooled_limiter_and_markets(self, tmp_path):
+        async def run():
+            scanner = MarketScanner(store=CandleStore(tmp_path), markets=MarketCache('binance', tmp_path))
+            assert scanner.bucket.limiter is ExchangePool.shared().get('binance').limiter
+            scanner.bucket = TokenBucket(1e6)  # بدون انتظار حصة Binance الحقيقية
+            scanner.exchange = FakeAsyncExchange(latency=0)
+            scanner._pooled = FakeSyncExchange()
+            await scanner.scan(['BTC/USDT'], limit=5)
+            await scanner.scan(['BTC/USDT'], limit=5)
+            return scanner
+
+        scanner = asyncio.run(run())
+        # بداية باردة: load_markets واحد عبر العميل المشترك، والعميل غير المتزامن يأخذ نسخته
+        assert scanner._pooled.loads == 1
+        assert scanner.exchange.markets == {'BTC/USDT': {'symbol': 'BTC/USDT'}}
+        assert (tmp_path / 'binance.json').exists()
@@ -0,0 +1,160 @@
+import os
+import time
+import socket
+import threading
+import functools
+import pytest
+from core.sharding import Channel, OrderRouter, RouterClient, ShardedRunner, shard_symbols, export_state, import_state, _worker_main
+from core.risk_management.manager import RiskManager
+from core.llm_signals import LLMSignalPipeline
+from core.backtest.exchange import SimulatedExchange
+from modules.models import Signal
+from main import TradingBot
+from tests.fakes import FakeExchange
+from tests.test_llm_signals import ScriptedBackend
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'XRP/USDT']
+
+
+class Fetcher:
+    """شموع FakeExchange تتقدم عشر شموع في كل طلب"""
+    def __init__(self, crash_marker=None):
+        self.exchange = FakeExchange(bars=400)
+        self.calls = {}
+        self.crash_marker = crash_marker
+
+    def get_ohlcv(self, symbol, limit=100):
+        calls = self.calls[symbol] = self.calls.get(symbol, 0) + 1
+        if self.crash_marker and calls == 2:
+            try:
+                # O_EXCL: عامل واحد فقط ينهار
+                os.close(os.open(self.crash_marker, os.O_CREAT | os.O_EXCL))
+            except FileExistsError:
+                pass
+            else:
+                os._exit(3)
+        return self.exchange.candles(symbol)[:100 + 10 * calls].tolist()
+
+
+def fake_worker_bot(crash_marker, symbols, router):
+    return TradingBot(data_fetcher=Fetcher(crash_marker), trader=router, risk_manager=RiskManager())
+
+
+def router_bot(llm=None):
+    # التحليلات تصل من العمال، فالموجه لا يجلب شموعاً
+    return TradingBot(data_fetcher=object(), trader=SimulatedExchange(initial_balance=10000),
+                      risk_manager=RiskManager(), live_trading=False, llm=llm)
+
+
+class TestChannel:
+    def test_frames_round_trip(self):
+        left, right = socket.socketpair()
+        a, b = Channel(left), Channel(right)
+        message = {'type': 'trade', 'analysis': {'price': 1.5, 'rsi': None}, 'rows': list(range(10000))}
+        a.send(message)
+        a.send({'type': 'state'})
+        assert b.recv() == message
+        assert b.recv() == {'type': 'state'}
+        a.close()
+        assert b.recv() is None
+        b.close()
+
+    def test_shards_are_stable_and_cover_all_symbols(self):
+        shards = shard_symbols(SYMBOLS * 3, 3)
+        assert shards == shard_symbols(SYMBOLS * 3, 3)
+        assert sorted(s for shard in shards for s in shard) == sorted(SYMBOLS * 3)
+        # نفس الرمز دائماً في نفس الجزء
+        assert all(len(set(shard).intersection(other)) == 0
+                   for i, shard in enumerate(shards) for other in shards[i + 1:])
+
+
+class TestOrderRouter:
+    def test_trades_and_state_over_socket(self, tmp_path):
+        router = OrderRouter(router_bot(), str(tmp_path / 'router.sock'))
+        router.start()
+        try:
+            worker = TradingBot(data_fetcher=Fetcher(), trader=object(), risk_manager=RiskManager())
+            client = RouterClient(router.address)
+            analysis = worker.analyze_market('BTC/USDT')
+            result = client.trade('BTC/USDT', analysis)
+            assert analysis.trend == 'flat' or result['status'] == 'simulated'
+            client.call({'type': 'state', 'states': export_state(worker, ['BTC/USDT'])})
+            with pytest.raises(RuntimeError):
+                client.call({'type': 'unknown'})
+
+            restarted = TradingBot(data_fetcher=Fetcher(), trader=object(), risk_manager=RiskManager())
+            import_state(restarted, client.call({'type': 'restore', 'symbols': ['BTC/USDT']})['states'])
+            assert restarted.indicators['BTC/USDT'].snapshot() == worker.indicators['BTC/USDT'].snapshot()
+            client.close()
+        finally:
+            router.close()
+
+    def test_router_reviews_worker_signals(self, tmp_path):
+        backend = ScriptedBackend('sell", "confidence": 0.9, "reason": "overbought"}')
+        bot = router_bot(LLMSignalPipeline(backend))
+        router = OrderRouter(bot, str(tmp_path / 'router.sock'))
+        router.start()
+        try:
+            _worker_main(0, SYMBOLS, router.address, functools.partial(fake_worker_bot, None), cycles=1, interval=0)
+        finally:
+            router.close()
+        # BTC و SOL صاعدان فيُراجعان، و flat لا يُرسل إلى النموذج
+        assert bot.positions == {'BTC/USDT': 'sell', 'SOL/USDT': 'sell'}
+        # كل مراجعة prompt واحد، فتخدمها ذاكرة البادئة
+        assert [len(prompts) for prompts, _ in backend.calls] == [1, 1]
+
+
+class SlowTrader:
+    """منفذ يعبئ كل أمر بعد زمن استجابة، فتتداخل الصفقات المتوازية"""
+    def get_balance(self, currency='USDT'):
+        return 10000.0
+
+    def execute_order(self, symbol, side, amount, order_type='market', price=None, reference_price=None):
+        time.sleep(0.05)
+        return {'symbol': symbol, 'side': side, 'filled': amount, 'average': reference_price, 'status': 'closed'}
+
+
+class TestConcurrentTrades:
+    def test_parallel_workers_respect_exposure_limit(self, tmp_path):
+        # كل صفقة 5000 (1% / 2%)، والحد الإجمالي 10000 يتسع لصفقتين فقط
+        risk = RiskManager(risk_per_trade=0.01, max_gross_exposure=1.0)
+        bot = TradingBot(data_fetcher=object(), trader=SlowTrader(), risk_manager=risk, live_trading=True)
+        router = OrderRouter(bot, str(tmp_path / 'router.sock'))
+        router.start()
+        results = {}
+
+        def worker(symbol):
+            client = RouterClient(router.address)
+            results[symbol] = client.trade(symbol, Signal(symbol, 'up', 100.0))
+            client.close()
+
+        try:
+            threads = [threading.Thread(target=worker, args=(s,)) for s in SYMBOLS]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            router.close()
+        assert sum(1 for r in results.values() if r) == 2
+        assert risk.gross_exposure() == pytest.approx(10000)
+        assert risk.reserved == {}
+
+
+class TestShardedRunner:
+    def test_crashed_worker_restarts_with_its_state(self, tmp_path):
+        runner = ShardedRunner(
+            router_bot(), SYMBOLS, workers=2,
+            address=str(tmp_path / 'router.sock'),
+            worker_factory=functools.partial(fake_worker_bot, str(tmp_path / 'crashed')),
+            cycles=3, interval=0, restart_delay=0
+        )
+        runner.run(poll_interval=0.05)
+
+        # أول عامل يطلب الشموع مرتين ينهار مرة واحدة
+        assert sum(runner.restarts.values()) == 1
+        shard, = runner.restarts
+        assert runner.router.restored[shard] == len(runner.shards[shard])
+        assert sorted(runner.router.states) == sorted(SYMBOLS)
+        assert runner.router.trades >= 3 * len(SYMBOLS)
+        assert not os.path.exists(runner.address)
@@ -0,0 +1,121 @@
+import pytest
+import threading
+import multiprocessing
+import numpy as np
+from modules.store import CandleStore
+from modules.data import DataFetcher
+
+HOUR = 3_600_000
+
+
+def candles(start, count, close=100.0):
+    return [[(start + i) * HOUR, close, close + 1, close - 1, close + i, 10.0] for i in range(count)]
+
+
+def write_in_steps(root, step, backfill=False):
+    # عملية مستقلة بمخزن خاص بها، كعامل موزع أو بث الموجه
+    store, rows = CandleStore(root), candles(0, 200)
+    for i in range(0, len(rows), step):
+        if backfill and i % (4 * step) == 0:
+            store.backfill('binance', 'BTC/USDT', '1h', rows[max(0, i - step):i + step])
+        else:
+            store.write('binance', 'BTC/USDT', '1h', rows[i:i + step])
+
+
+class FakeExchange:
+    """بورصة وهمية تعيد الشموع المطلوبة وتحصي الطلبات"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.calls.append((since, limit))
+        rows = self.rows if since is None else [r for r in self.rows if r[0] >= since]
+        return rows[-limit:] if limit else rows[:500]
+
+    def parse_timeframe(self, timeframe):
+        return 3600
+
+    def milliseconds(self):
+        return self.rows[-1][0] + HOUR // 2
+
+
+class TestCandleStore:
+    @pytest.fixture
+    def store(self, tmp_path):
+        return CandleStore(tmp_path)
+
+    def test_write_and_read(self, store):
+        assert store.write('binance', 'BTC/USDT', '1h', candles(0, 5)) == 5
+        data = store.read('binance', 'BTC/USDT', '1h')
+        assert data.shape == (5, 6)
+        assert isinstance(data, np.memmap)
+        assert store.last_timestamp('binance', 'BTC/USDT', '1h') == 4 * HOUR
+
+    def test_forming_candle_is_replaced(self, store):
+        store.write('binance', 'BTC/USDT', '1h', candles(0, 3))
+        update = candles(2, 3, close=200.0)
+        assert store.write('binance', 'BTC/USDT', '1h', update) == 2
+        data = store.read('binance', 'BTC/USDT', '1h')
+        assert len(data) == 5
+        assert data[2, 1] == 200.0
+
+    def test_range_read(self, store):
+        store.write('binance', 'BTC/USDT', '1h', candles(0, 10))
+        part = store.read('binance', 'BTC/USDT', '1h', since=3 * HOUR, until=6 * HOUR)
+        assert part[:, 0].tolist() == [3 * HOUR, 4 * HOUR, 5 * HOUR]
+
+    def test_backfill_keeps_newer_rows(self, store):
+        store.write('binance', 'BTC/USDT', '1h', candles(5, 5))
+        assert store.backfill('binance', 'BTC/USDT', '1h', candles(0, 7)) == 5
+        assert len(store.read('binance', 'BTC/USDT', '1h')) == 10
+
+    def test_concurrent_writers_keep_one_row_per_candle(self, store):
+        # خيط البث وDataFetcher يكتبان نفس الملف
+        rows = candles(0, 200)
+
+        def writer(step):
+            for i in range(0, len(rows), step):
+                store.write('binance', 'BTC/USDT', '1h', rows[i:i + step])
+
+        threads = [threading.Thread(target=writer, args=(step,)) for step in (1, 3, 7, 11)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        times = store.read('binance', 'BTC/USDT', '1h')[:, 0]
+        assert len(times) == 200 and (np.diff(times) > 0).all()
+
+    def test_writer_processes_keep_one_row_per_candle(self, tmp_path):
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=write_in_steps, args=(str(tmp_path), step, step == 3))
+                     for step in (1, 3, 7, 11)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert [p.exitcode for p in processes] == [0, 0, 0, 0]
+        times = CandleStore(tmp_path).read('binance', 'BTC/USDT', '1h')[:, 0]
+        assert len(times) == 200 and (np.diff(times) > 0).all()
+
+
+class TestDataFetcherSync:
+    @pytest.fixture
+    def fetcher(self, tmp_path):
+        fetcher = DataFetcher(store=CandleStore(tmp_path), refresh_interval=60)
+        fetcher.exchange = FakeExchange(candles(0, 200))
+        return fetcher
+
+    def test_incremental_tail(self, fetcher):
+        assert len(fetcher.get_ohlcv('BTC/USDT', limit=100)) == 100
+        fetcher.exchange.rows = candles(0, 203)
+        fetcher.refresh_interval = 0
+        data = fetcher.get_ohlcv('BTC/USDT', limit=100)
+        assert data[-1][0] == 202 * HOUR
+        # الطلب الثاني يبدأ من آخر شمعة مخزنة فقط
+        assert fetcher.exchange.calls[-1] == (199 * HOUR, None)
+
+    def test_fresh_store_skips_network(self, fetcher):
+        fetcher.get_ohlcv('BTC/USDT', limit=100)
+        fetcher.get_ohlcv('BTC/USDT', limit=100)
+        assert len(fetcher.exchange.calls) == 1
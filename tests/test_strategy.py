@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+from modules.strategy import TrendStrategy, TrailingStop, stack_windows, LONG, FLAT, SHORT
+from modules.indicators import IndicatorSet
+from core.backtest.engine import strategy_backtest
+from core.backtest.exchange import SimulatedExchange
+from core.risk_management.manager import RiskManager
+from modules.models import Signal
+from main import TradingBot
+from tests.fakes import FakeExchange
+
+
+@pytest.fixture
+def exchange():
+    return FakeExchange(bars=600)
+
+
+class TestTrendStrategy:
+    def test_matches_streaming_trend_rule(self, exchange):
+        candles = exchange.candles('BTC/USDT')
+        signals = TrendStrategy().evaluate(candles)
+        state = IndicatorSet()
+        streaming = []
+        for row in candles.tolist():
+            state.update([row])
+            streaming.append(state.trend())
+        expected = np.array([{'up': LONG, 'flat': FLAT, 'down': SHORT}[t] for t in streaming])
+        assert (signals == expected).mean() > 0.99
+
+    def test_block_and_single_symbol_agree(self, exchange):
+        block = np.stack([exchange.candles(s) for s in ('BTC/USDT', 'ETH/USDT')])
+        strategy = TrendStrategy()
+        signals = strategy.evaluate(block)
+        assert signals.shape == (2, 600) and signals.dtype == np.int8
+        assert np.array_equal(signals[1], strategy.evaluate(block[1]))
+        assert np.array_equal(strategy.latest(block), strategy.evaluate(block[:, -strategy.lookback:])[:, -1])
+
+    def test_unknown_input_column(self, exchange):
+        strategy = TrendStrategy()
+        strategy.inputs = ('vwap',)
+        with pytest.raises(ValueError):
+            strategy.evaluate(exchange.candles('BTC/USDT'))
+
+
+class TestTrailingStop:
+    class Always:
+        inputs, lookback = ('close',), 10
+
+        def __init__(self, signal):
+            self.signal = signal
+
+        def generate(self, inputs):
+            return np.full(inputs['close'].shape, self.signal, dtype=np.int8)
+
+    def candles(self, close):
+        candles = np.zeros((len(close), 6))
+        candles[:, 0] = np.arange(len(close))
+        candles[:, 4] = close
+        return candles
+
+    def test_long_exits_on_trailing_stop_and_waits_for_new_signal(self):
+        close = [100, 105, 110, 108, 107, 112, 120]
+        positions = TrailingStop(self.Always(LONG), stop_pct=2.5).evaluate(self.candles(close))
+        # 107 أقل من 110 بأكثر من 2.5%، ثم لا عودة رغم استمرار الإشارة
+        assert positions.tolist() == [1, 1, 1, 1, 0, 0, 0]
+
+    def test_short_stop(self):
+        close = [100, 95, 90, 93, 80]
+        positions = TrailingStop(self.Always(SHORT), stop_pct=3).evaluate(self.candles(close))
+        assert positions.tolist() == [-1, -1, -1, 0, 0]
+
+
+    def test_live_state_matches_full_history(self):
+        candles = FakeExchange(bars=2800).candles('BTC/USDT')
+        strategy = TrailingStop(TrendStrategy(), stop_pct=1.0)
+        expected = strategy.evaluate(candles)
+        state = strategy.new_state()
+        live, replayed = [], []
+        for t in range(1, len(candles)):
+            window = candles[max(0, t + 1 - strategy.lookback):t + 1]
+            # الشمعة المتكونة تُقيَّم أولاً بسعر مختلف ثم بسعرها النهائي
+            forming = window.copy()
+            forming[-1, 4] *= 1.05
+            strategy.latest(forming, state)
+            live.append(strategy.latest(window, state))
+            replayed.append(strategy.latest(window))
+        # إعادة التشغيل على lookback فقط تفقد حالة الوقف
+        assert np.array_equal(live, expected[1:])
+        assert not np.array_equal(replayed, expected[1:])
+
+    def test_block_state_matches_single_series(self, exchange):
+        block = np.stack([exchange.candles(s) for s in ('BTC/USDT', 'ETH/USDT')])
+        strategy = TrailingStop(TrendStrategy(), stop_pct=1.0)
+        states = strategy.new_state(2)
+        for t in range(100, 600, 7):
+            signals = strategy.latest(block[:, :t], states)
+        assert signals.tolist() == strategy.evaluate(block[:, :t])[:, -1].tolist()
+
+
+class TestStrategyInBot:
+    def test_live_windows_match_bulk_evaluation(self, exchange):
+        strategy = TrendStrategy(lookback=80)
+        candles = exchange.candles('BTC/USDT')
+        bot = TradingBot(data_fetcher=object(), trader=object(), risk_manager=RiskManager(), strategy=strategy)
+        # شمعة واحدة في كل استدعاء كما في Backtester
+        trends = [bot.analyze_market('BTC/USDT', [row]).trend for row in candles[:200].tolist()]
+        expected = strategy.evaluate(candles[200 - 80:200])[-1]
+        assert trends[-1] == {LONG: 'up', FLAT: 'flat', SHORT: 'down'}[int(expected)]
+
+        market = {s: exchange.candles(s)[-150:].tolist() for s in ('BTC/USDT', 'ETH/USDT', 'SOL/USDT')}
+        bulk = bot.signals(market)
+        for symbol, rows in market.items():
+            assert bulk[symbol] == bot._strategy_signal(symbol + '-fresh', rows)
+
+    def test_stack_windows_pads_short_series(self, exchange):
+        short = exchange.candles('BTC/USDT')[:30]
+        block = stack_windows([short, exchange.candles('ETH/USDT')], 100)
+        assert block.shape == (2, 100, 6)
+        assert np.array_equal(block[0, -30:], short)
+        assert np.all(block[0, :70] == short[0])
+        strategy = TrendStrategy()
+        assert strategy.evaluate(block[0])[-1] == strategy.evaluate(short)[-1]
+
+    def test_strategy_backtest(self, exchange):
+        block = np.stack([exchange.candles(s) for s in ('BTC/USDT', 'ETH/USDT')])
+        result = strategy_backtest(TrailingStop(TrendStrategy(), 2.0), block, initial_balance=1.0)
+        assert result.equity.shape == (2, 600)
+        assert len(result.trades) > 0
+
+    def test_flat_signal_closes_position(self, exchange):
+        trader = SimulatedExchange(initial_balance=10000, slippage=0, fee_rate=0)
+        trader.set_bar('BTC/USDT', [0, 100.0, 100.0, 100.0, 100.0, 1e9])
+        bot = TradingBot(data_fetcher=object(), trader=trader, risk_manager=RiskManager(),
+                         strategy=TrendStrategy(), live_trading=True)
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'up', 100.0))
+        assert bot.positions == {'BTC/USDT': 'buy'}
+
+        # خروج الوقف المتحرك يصل كإشارة flat
+        order = bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'flat', 100.0))
+        assert order['side'] == 'sell' and order['filled'] > 0
+        assert bot.positions == {}
+        assert bot.risk_manager.quantities['BTC/USDT'] == pytest.approx(0.0)
+
+        # بلا مركز مفتوح تبقى flat بلا أمر
+        assert bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'flat', 100.0)) is None
@@ -0,0 +1,144 @@
+import time
+import ccxt
+import pytest
+from modules.venues import ConsolidatedBook, VenueAggregator
+from modules.models import Signal
+from modules.account import AccountState
+from main import TradingBot
+from core.risk_management.manager import RiskManager
+from tests.fakes import FakeExchange
+
+SYMBOLS = [f"C{i}/USDT" for i in range(300)]
+
+
+class DownExchange(FakeExchange):
+    def fetch_tickers(self, symbols=None):
+        raise ccxt.NetworkError('down')
+
+
+class TestConsolidatedBook:
+    def test_best_bid_and_ask_across_venues(self):
+        book = ConsolidatedBook(['a', 'b', 'c'])
+        book.set_quote('a', 'BTC/USDT', 99.0, 101.0)
+        book.set_quote('b', 'BTC/USDT', 99.5, 100.8, 2.0, 3.0)
+        book.set_quote('c', 'BTC/USDT', 99.8, 101.5)
+        best = book.best()['BTC/USDT']
+        assert (best['bid'], best['bid_venue']) == (99.8, 'c')
+        assert (best['ask'], best['ask_venue'], best['ask_size']) == (100.8, 'b', 3.0)
+        assert book.best_venue('BTC/USDT', 'buy') == ('b', 100.8, 3.0)
+        assert book.best_venue('BTC/USDT', 'sell', venues=['a', 'b'])[0] == 'b'
+
+    def test_stale_quotes_are_ignored(self):
+        book = ConsolidatedBook(['a', 'b'], max_age=5)
+        book.set_quote('a', 'BTC/USDT', 100.0, 100.1, now=time.monotonic() - 10)
+        book.set_quote('b', 'BTC/USDT', 99.0, 101.0)
+        assert book.best_venue('BTC/USDT', 'buy')[0] == 'b'
+        book.set_quote('b', 'BTC/USDT', 99.0, 101.0, now=time.monotonic() - 10)
+        assert book.best_venue('BTC/USDT', 'buy') is None
+        assert book.best()['BTC/USDT']['ask'] is None
+
+    def test_grows_past_capacity(self):
+        book = ConsolidatedBook(['a'], capacity=4)
+        book.update_tickers('a', {s: {'bid': 1.0, 'ask': 2.0} for s in SYMBOLS})
+        assert len(book.best()) == len(SYMBOLS)
+
+
+class TestVenueAggregator:
+    @pytest.fixture
+    def venues(self):
+        # نفس السلسلة على ثلاث منصات بأسعار مختلفة قليلاً
+        return {'binance': FakeExchange(bars=50, price_scale=1.0),
+                'bybit': FakeExchange(bars=50, price_scale=0.99),
+                'okx': FakeExchange(bars=50, price_scale=1.01)}
+
+    def test_refresh_merges_all_symbols_in_one_request_per_venue(self, venues):
+        aggregator = VenueAggregator(venues)
+        assert aggregator.refresh(SYMBOLS) == {'binance': True, 'bybit': True, 'okx': True}
+        assert all(v.requests == 1 for v in venues.values())
+        best = aggregator.book.best()
+        assert len(best) == len(SYMBOLS)
+        assert {b['ask_venue'] for b in best.values()} == {'bybit'}
+        assert {b['bid_venue'] for b in best.values()} == {'okx'}
+        aggregator.close()
+
+    def test_failing_venue_does_not_block_the_others(self, venues):
+        venues['okx'] = DownExchange(bars=50, price_scale=1.01)
+        aggregator = VenueAggregator(venues)
+        assert aggregator.refresh(['BTC/USDT'])['okx'] is False
+        assert aggregator.best_venue('BTC/USDT', 'sell')[0] == 'binance'
+        aggregator.close()
+
+    def test_order_books_update_the_view(self, venues):
+        aggregator = VenueAggregator(venues)
+        assert aggregator.refresh_order_books('BTC/USDT') == {v: True for v in venues}
+        assert aggregator.best_venue('BTC/USDT', 'buy')[0] == 'bybit'
+        aggregator.close()
+
+
+class RecordingTrader:
+    """منفذ وهمي يسجل الأوامر المرسلة إليه"""
+    def __init__(self):
+        self.orders = []
+
+    def get_balance(self, currency='USDT'):
+        return 10000.0
+
+    def execute_order(self, **order):
+        self.orders.append(order)
+        return {**order, 'filled': 0.0}
+
+
+class FundedTrader(RecordingTrader):
+    """منفذ بذاكرة حساب لرصيد ثابت"""
+    def __init__(self, **balance):
+        super().__init__()
+        self.balance = balance
+        self.account = AccountState(self)
+
+    def fetch_balance(self):
+        return {'free': dict(self.balance), 'used': {}, 'total': dict(self.balance)}
+
+
+class TestRouting:
+    def test_execute_trade_routes_to_best_venue(self):
+        clients = {'binance': FakeExchange(bars=50), 'bybit': FakeExchange(bars=50, price_scale=0.99)}
+        traders = {venue: RecordingTrader() for venue in clients}
+        aggregator = VenueAggregator(clients)
+        bot = TradingBot(data_fetcher=object(), trader=traders['binance'], venues=traders,
+                         aggregator=aggregator, risk_manager=RiskManager(), live_trading=True)
+
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'up', 100.0))
+        assert not traders['binance'].orders
+        order, = traders['bybit'].orders
+        assert order['reference_price'] == clients['bybit']._ticker('BTC/USDT')['ask']
+
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'down', 100.0))
+        assert traders['binance'].orders[0]['side'] == 'sell'
+        aggregator.close()
+
+    def test_unfilled_order_opens_no_position(self):
+        trader = RecordingTrader()
+        bot = TradingBot(data_fetcher=object(), trader=trader, risk_manager=RiskManager(), live_trading=True)
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'up', 100.0))
+        assert trader.orders and 'BTC/USDT' not in bot.positions
+        # الإشارة نفسها تُعاد محاولتها في الدورة التالية
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'up', 100.0))
+        assert len(trader.orders) == 2
+
+    def test_routes_only_to_venues_holding_the_balance(self):
+        clients = {'binance': FakeExchange(bars=50), 'bybit': FakeExchange(bars=50, price_scale=0.99)}
+        # bybit أرخص لكنه لا يملك USDT، وbinance لا يملك BTC
+        traders = {'binance': FundedTrader(USDT=10000.0), 'bybit': FundedTrader(USDT=0.0, BTC=0.4)}
+        aggregator = VenueAggregator(clients)
+        bot = TradingBot(data_fetcher=object(), trader=traders['binance'], venues=traders,
+                         aggregator=aggregator, risk_manager=RiskManager(), live_trading=True)
+
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'up', 100.0))
+        assert len(traders['binance'].orders) == 1 and not traders['bybit'].orders
+
+        bot.execute_trade('BTC/USDT', Signal('BTC/USDT', 'down', 100.0))
+        order, = traders['bybit'].orders
+        # الحجم من رأس مال المحفظة، والكمية مقلصة إلى BTC المتاح على bybit
+        assert order['side'] == 'sell' and order['amount'] == pytest.approx(0.4)
+        assert len(traders['binance'].orders) == 1
+        aggregator.close()